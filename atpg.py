@@ -0,0 +1,589 @@
+# atpg.py
+
+import heapq
+import random
+import time
+from faultsim import FaultSimulator
+from logic_evaluator import ASSIGN, GATE_BASE, GATE_FUNCTIONS, GATE_KINDS
+import tracing
+
+TRACE_FAULT = tracing.get('fault')
+
+# PODEM decisions flipped before a fault is given up as aborted
+BACKTRACK_LIMIT = 100
+# generated patterns fault-simulated together for fault dropping
+ATPG_BLOCK = 32
+# backtrack limit of a secondary fault targeted inside an existing cube (dynamic compaction)
+SECONDARY_BACKTRACKS = 10
+
+# per-net value code: good * 3 + faulty, each 0, 1 or X
+X = 2
+ALL_X = X * 3 + X
+
+
+class _Ternary:
+    """0/1/X value with the three-valued & | ^ used to tabulate GATE_FUNCTIONS."""
+    __slots__ = ('v',)
+
+    def __init__(self, v):
+        self.v = v
+
+    def __and__(self, other):
+        if self.v == 0 or other.v == 0:
+            return _Ternary(0)
+        return _Ternary(1 if self.v == 1 and other.v == 1 else X)
+
+    def __or__(self, other):
+        if self.v == 1 or other.v == 1:
+            return _Ternary(1)
+        return _Ternary(0 if self.v == 0 and other.v == 0 else X)
+
+    def __xor__(self, other):
+        if self.v == X or other.v == X:
+            return _Ternary(X)
+        return _Ternary(self.v ^ other.v)
+
+
+def ternary_table(kind):
+    """Output (0/1/X) of a gate kind for every pin combination, index = sum(pin_i * 3**i)."""
+    pins, func = GATE_FUNCTIONS[kind]
+    table = []
+    for index in range(3 ** len(pins)):
+        args = []
+        for _ in pins:
+            args.append(_Ternary(index % 3))
+            index //= 3
+        table.append(func(_Ternary(1), *args).v)
+    return table
+
+
+def code_table(kind):
+    """
+    Good/faulty output code of a gate kind for every combination of pin
+    codes, index = sum(code_i * 9**i), so implication is one lookup per gate.
+    """
+    single = ternary_table(kind)
+    k = len(GATE_FUNCTIONS[kind][0])
+    table = []
+    for index in range(9 ** k):
+        good = faulty = 0
+        scale = 1
+        for _ in range(k):
+            code = index % 9
+            index //= 9
+            good += code // 3 * scale
+            faulty += code % 3 * scale
+            scale *= 3
+        table.append(single[good] * 3 + single[faulty])
+    return table
+
+
+class PodemResult:
+    """Outcome of one PODEM run: 'detected' with its PPI cube, 'redundant' or 'aborted'."""
+
+    def __init__(self, status, cube=None, backtracks=0):
+        self.status = status
+        self.cube = cube            # PPI net ID -> 0/1 for the assigned inputs
+        self.backtracks = backtracks
+
+
+class AtpgResult:
+    """Patterns of a TestGenerator run with the final fault simulation and the per-fault outcome."""
+
+    def __init__(self, patterns, cubes, fault_result, redundant, aborted, elapsed):
+        self.patterns = patterns
+        self.cubes = cubes
+        self.fault_result = fault_result
+        self.redundant = redundant      # full-list faults proven untestable (or structurally unobservable)
+        self.aborted = aborted          # full-list faults given up at the backtrack limit
+        self.elapsed = elapsed
+
+    @property
+    def test_coverage(self) -> float:
+        """Detected faults over the testable ones (untestable faults excluded)."""
+        testable = len(self.fault_result.faults) - len(self.redundant)
+        return len(self.fault_result.detected) / testable if testable else 1.0
+
+    def report(self, evaluator=None, aborted=0):
+        result = self.fault_result
+        print(f"Patterns: {len(self.patterns)} in {self.elapsed:.2f}s")
+        print(f"Faults: {len(result.faults)}, detected {len(result.detected)}, "
+              f"untestable {len(self.redundant)}, aborted {len(self.aborted)}")
+        print(f"Fault coverage: {result.coverage:.2%}, test coverage: {self.test_coverage:.2%}")
+        if aborted and evaluator is not None and self.aborted:
+            print(f"Aborted faults ({len(self.aborted)}):")
+            for f in self.aborted[:aborted]:
+                print(f"  {f.name(evaluator)}")
+            if len(self.aborted) > aborted:
+                print(f"  ... {len(self.aborted) - aborted} more")
+
+
+class TestGenerator:
+    """
+    PODEM test generation over the scan view of a ScanChainSimulator, the
+    same view FaultSimulator uses: the Qs of the chain flops are pseudo
+    primary inputs, the D nets captured back into the chain pseudo primary
+    outputs, and every other undriven net is 0. Each net holds a
+    good/faulty pair of three-valued values; implication is event-driven
+    through per-kind ternary truth tables, with the fault injected at its
+    stem or branch pin. Targets are the collapsed fault list; generated
+    cubes are X-filled into chain vectors and fault-simulated in blocks,
+    dropping every fault they detect.
+    """
+
+    def __init__(self, simulator, backtrack_limit=BACKTRACK_LIMIT, collapse=True):
+        self.simulator = simulator
+        self.fsim = FaultSimulator(simulator, collapse=collapse)
+        self.evaluator = ev = self.fsim.evaluator
+        self.backtrack_limit = backtrack_limit
+        self.tables = {}
+        self.kind = {}
+        for idx in ev.order:
+            kind = ev.drive_kind[idx]
+            if kind >= GATE_BASE:
+                name = GATE_KINDS[kind - GATE_BASE]
+                if name not in self.tables:
+                    self.tables[name] = (ternary_table(name), code_table(name))
+                self.kind[idx] = self.tables[name]
+            elif kind == ASSIGN:
+                self.kind[idx] = None
+        self.fanin = self.fsim.fanin
+        # pseudo primary inputs: Q net of every chain flop, and where it sits in the vector
+        n = len(simulator.cells)
+        self.ppi = {}
+        for inst, positions in simulator.flop_positions.items():
+            if inst in ev.q_ids:
+                self.ppi[ev.q_ids[inst]] = n - 1 - positions[-1]
+        self.baseline = self.initial_values()
+
+    def initial_values(self):
+        """Fault-free values with every PPI at X."""
+        values = bytearray(len(self.evaluator.net_names))
+        for idx in self.ppi:
+            values[idx] = ALL_X
+        self.fault = None
+        self.values = values
+        self.imply(list(self.ppi) + list(self.evaluator.order))
+        return bytes(values)
+
+    def evaluate(self, idx):
+        """Good/faulty code of a driven net from its pins, with the current fault injected."""
+        values = self.values
+        pins = self.fanin[idx]
+        fault = self.fault
+        if fault is not None and fault.reader == idx:
+            codes = [values[dep] for dep in pins]
+            codes[fault.pin] = codes[fault.pin] // 3 * 3 + fault.value
+        else:
+            codes = None
+        tables = self.kind[idx]
+        if tables is None:
+            out = codes[0] if codes else values[pins[0]]
+        else:
+            table = tables[1]
+            if codes is None:
+                n = len(pins)
+                if n == 2:
+                    out = table[values[pins[0]] + 9 * values[pins[1]]]
+                elif n == 1:
+                    out = table[values[pins[0]]]
+                elif n == 3:
+                    out = table[values[pins[0]] + 9 * values[pins[1]] + 81 * values[pins[2]]]
+                else:
+                    out = table[values[pins[0]] + 9 * values[pins[1]] + 81 * values[pins[2]] + 729 * values[pins[3]]]
+            else:
+                index = 0
+                scale = 1
+                for code in codes:
+                    index += code * scale
+                    scale *= 9
+                out = table[index]
+        if fault is not None and fault.reader is None and fault.net == idx:
+            out = out // 3 * 3 + fault.value
+        return out
+
+    def imply(self, changed):
+        """Propagate value changes of the nets in `changed` (already written) through their fanout."""
+        ev = self.evaluator
+        values = self.values
+        fanout_ptr, fanout_idx, unit_pos, order, loop_at = (
+            ev.fanout_ptr, ev.fanout_idx, ev.unit_pos, ev.order, ev.loop_at)
+        heap = []
+        queued = set()
+
+        def schedule(idx, skip=-1):
+            for r in fanout_idx[fanout_ptr[idx]:fanout_ptr[idx + 1]]:
+                p = unit_pos[r]
+                if p != skip and p not in queued:
+                    queued.add(p)
+                    heapq.heappush(heap, p)
+        for idx in changed:
+            if ev.drive_kind[idx]:
+                p = unit_pos[idx]
+                if p not in queued:
+                    queued.add(p)
+                    heapq.heappush(heap, p)
+            else:
+                schedule(idx)
+        while heap:
+            p = heapq.heappop(heap)
+            queued.discard(p)
+            group = loop_at.get(p)
+            if group is None:
+                idx = order[p]
+                code = self.evaluate(idx)
+                if code != values[idx]:
+                    values[idx] = code
+                    schedule(idx)
+                continue
+            # combinational loop: settle from the current values, X where it doesn't
+            before = {idx: values[idx] for idx in group}
+            for _ in range(max(ev.max_iterations, 2 * len(group))):
+                nxt = {idx: self.evaluate(idx) for idx in group}
+                if all(nxt[idx] == values[idx] for idx in group):
+                    break
+                for idx in group:
+                    values[idx] = nxt[idx]
+            else:
+                for idx in group:
+                    if self.evaluate(idx) != values[idx]:
+                        values[idx] = ALL_X
+            for idx in group:
+                if values[idx] != before[idx]:
+                    schedule(idx, skip=p)
+
+    def assign(self, ppi, bit):
+        """Set a PPI to 0, 1 or X (both machines; the fault still applies at a stuck PPI stem)."""
+        fault = self.fault
+        code = bit * 3 + bit
+        if fault is not None and fault.reader is None and fault.net == ppi:
+            code = code // 3 * 3 + fault.value
+        if self.values[ppi] != code:
+            self.values[ppi] = code
+            self.imply([ppi])
+
+    def cone(self, fault):
+        """Driven nets in the fanout cone of the fault site (by order position) and the observed D nets in it."""
+        ev = self.evaluator
+        start = [fault.reader] if fault.reader is not None else [fault.net]
+        seen = set(start)
+        stack = list(start)
+        while stack:
+            idx = stack.pop()
+            for r in ev.fanout_idx[ev.fanout_ptr[idx]:ev.fanout_ptr[idx + 1]]:
+                if r not in seen:
+                    seen.add(r)
+                    stack.append(r)
+        gates = sorted((idx for idx in seen if ev.drive_kind[idx]), key=lambda idx: ev.unit_pos[idx])
+        outputs = [d for d in self.fsim.observed.values() if d in seen]
+        return gates, outputs
+
+    def support(self, nets):
+        """PPIs in the transitive fan-in of `nets`."""
+        seen = set(nets)
+        stack = list(nets)
+        found = []
+        while stack:
+            idx = stack.pop()
+            if idx in self.ppi:
+                found.append(idx)
+            for dep in self.fanin.get(idx, ()):
+                if dep not in seen:
+                    seen.add(dep)
+                    stack.append(dep)
+        return sorted(found, key=lambda idx: self.ppi[idx])
+
+    def objective(self, fault, gates, outputs):
+        """
+        'detected', 'fail', or the (net, value) to aim for next: the fault
+        site's good value opposite the stuck value until it is activated,
+        then a non-blocking value on an X pin of a D-frontier gate.
+        """
+        values = self.values
+        if isinstance(fault.reader, str):
+            good = values[fault.net] // 3
+            if good == X:
+                return fault.net, 1 - fault.value
+            return 'detected' if good != fault.value else 'fail'
+        for d in outputs:
+            good, faulty = divmod(values[d], 3)
+            if good != X and faulty != X and good != faulty:
+                return 'detected'
+        good = values[fault.net] // 3
+        if good == fault.value:
+            return 'fail'
+        if good == X:
+            return fault.net, 1 - fault.value
+        frontier = []
+        for idx in gates:
+            good, faulty = divmod(values[idx], 3)
+            if (good != X and faulty != X) or self.kind[idx] is None:
+                continue
+            for pin, dep in enumerate(self.fanin[idx]):
+                g, f = divmod(values[dep], 3)
+                if fault.reader == idx and pin == fault.pin:
+                    f = fault.value
+                if g != X and f != X and g != f:
+                    frontier.append(idx)
+                    break
+        if not self.x_path(frontier, outputs):
+            return 'fail'
+        for idx in frontier:
+            # D-frontier gate: an X pin value that propagates the difference, or at least keeps it alive
+            choice = None
+            for pin, dep in enumerate(self.fanin[idx]):
+                if values[dep] // 3 != X:
+                    continue
+                for bit in (0, 1):
+                    out = self.try_pin(idx, pin, bit)
+                    g, f = divmod(out, 3)
+                    if g != X and f != X and g != f:
+                        return dep, bit
+                    if choice is None and (g == X or f == X):
+                        choice = (dep, bit)
+            if choice is not None:
+                return choice
+        return 'fail'
+
+    def x_path(self, frontier, outputs) -> bool:
+        """Is there a path of X nets from a D-frontier gate to an observed D?"""
+        ev = self.evaluator
+        values = self.values
+        targets = set(outputs)
+        seen = set(frontier)
+        stack = list(frontier)
+        while stack:
+            idx = stack.pop()
+            if idx in targets:
+                return True
+            for r in ev.fanout_idx[ev.fanout_ptr[idx]:ev.fanout_ptr[idx + 1]]:
+                if r not in seen:
+                    good, faulty = divmod(values[r], 3)
+                    if good == X or faulty == X:
+                        seen.add(r)
+                        stack.append(r)
+        return False
+
+    def try_pin(self, idx, pin, bit):
+        """Code of gate `idx` if pin `pin` (an X) were `bit` in both machines."""
+        dep = self.fanin[idx][pin]
+        saved = self.values[dep]
+        self.values[dep] = bit * 3 + bit
+        try:
+            return self.evaluate(idx)
+        finally:
+            self.values[dep] = saved
+
+    def backtrace(self, net, bit):
+        """Walk an objective back through X pins to an unassigned PPI: (ppi, value) or None."""
+        values = self.values
+        levels = self.evaluator.levels
+        seen = set()
+        while net not in self.ppi:
+            if net in seen or net not in self.kind:
+                return None
+            seen.add(net)
+            pins = self.fanin[net]
+            tables = self.kind[net]
+            if tables is None:
+                net = pins[0]
+                continue
+            table = tables[0]
+            goods = [values[dep] // 3 for dep in pins]
+            decisive = []
+            open_ = []
+            for pin, dep in enumerate(pins):
+                if goods[pin] != X:
+                    continue
+                for b in (0, 1):
+                    index = 0
+                    scale = 1
+                    for q, g in enumerate(goods):
+                        index += (b if q == pin else g) * scale
+                        scale *= 3
+                    out = table[index]
+                    if out == bit:
+                        decisive.append((levels[dep], dep, b))
+                    elif out == X:
+                        open_.append((levels[dep], dep, b))
+            if decisive:
+                # one pin settles it: take the easiest
+                _, net, bit = min(decisive)
+            elif open_:
+                # every pin matters: start with the hardest
+                _, net, bit = max(open_)
+            else:
+                return None
+        if values[net] // 3 != X:
+            return None
+        return net, bit
+
+    def podem(self, fault, fixed=None, limit=None) -> PodemResult:
+        """
+        PODEM for one fault: decisions on PPIs only, backtracking up to the
+        limit. `fixed` (PPI → bit) is a cube the test has to extend; its bits
+        are never flipped, so 'redundant' then only means no extension exists.
+        """
+        limit = self.backtrack_limit if limit is None else limit
+        self.values = bytearray(self.baseline)
+        self.fault = fault
+        if isinstance(fault.reader, str):
+            gates, outputs = [], []
+        else:
+            # inject: the stuck value at the stem, or re-evaluate the reader of the branch
+            if fault.reader is None and not self.evaluator.drive_kind[fault.net]:
+                self.values[fault.net] = self.values[fault.net] // 3 * 3 + fault.value
+                self.imply([fault.net])
+            else:
+                self.imply([fault.reader if fault.reader is not None else fault.net])
+            gates, outputs = self.cone(fault)
+        for ppi, bit in (fixed or {}).items():
+            self.assign(ppi, bit)
+        relevant = self.support(outputs or [fault.net])
+        stack = []   # [ppi, value, flipped]
+        backtracks = 0
+        while True:
+            target = self.objective(fault, gates, outputs)
+            if target == 'detected':
+                cube = dict(fixed or {})
+                cube.update((ppi, bit) for ppi, bit, _ in stack)
+                return PodemResult('detected', cube, backtracks)
+            decision = None
+            if target != 'fail':
+                decision = self.backtrace(*target)
+                if decision is None:
+                    # heuristics found no way in: branch on any open PPI feeding the outputs
+                    for ppi in relevant:
+                        if self.values[ppi] // 3 == X:
+                            decision = (ppi, 0)
+                            break
+            if decision is not None:
+                stack.append([decision[0], decision[1], False])
+                self.assign(*decision)
+                continue
+            # conflict: undo flipped decisions, flip the latest open one
+            while stack and stack[-1][2]:
+                ppi, _, _ = stack.pop()
+                self.assign(ppi, X)
+            if not stack:
+                return PodemResult('redundant', backtracks=backtracks)
+            backtracks += 1
+            if backtracks > limit:
+                return PodemResult('aborted', backtracks=backtracks)
+            stack[-1][1] ^= 1
+            stack[-1][2] = True
+            self.assign(stack[-1][0], stack[-1][1])
+
+    def vector(self, cube, fill='random', rng=None) -> str:
+        """Chain vector ('0'/'1'/'X' when fill is 'x') of a PPI cube; unassigned bits are filled."""
+        chars = ['X'] * len(self.simulator.cells)
+        for ppi, position in self.ppi.items():
+            if ppi in cube:
+                chars[position] = str(cube[ppi])
+        if fill == 'x':
+            return ''.join(chars)
+        if fill == 'zero':
+            return ''.join('0' if c == 'X' else c for c in chars)
+        return ''.join(str(rng.getrandbits(1)) if c == 'X' else c for c in chars)
+
+    def run(self, target=1.0, fill='random', seed=0, block=ATPG_BLOCK, compact=0) -> AtpgResult:
+        """
+        Generate patterns until every target fault is detected, proven
+        untestable or aborted, or `target` fault coverage of the targets is
+        reached. The result's fault simulation covers the full list. With
+        compact=N each cube is extended (dynamic compaction) by targeting up
+        to N later faults with its bits fixed, before it is filled.
+        """
+        started = time.monotonic()
+        fsim = self.fsim
+        rng = random.Random(seed)
+        collapsed = fsim.collapsed
+        targets = [f for f in (collapsed.simulated if collapsed else fsim.faults) if fsim.is_observable(f)]
+        untestable = {f for f in (collapsed.simulated if collapsed else fsim.faults) if not fsim.is_observable(f)}
+        patterns = []
+        cubes = []
+        detected = set()
+        redundant = set()
+        aborted = set()
+        total = len(targets)
+        pending = []   # (fault, vector) not yet fault-simulated
+        claimed = set()   # secondary faults of the pending cubes
+
+        def flush():
+            if not pending:
+                return
+            vectors = [vec for _, vec in pending]
+            hits = fsim.simulate([f for f in targets if f not in detected], vectors, len(vectors))
+            detected.update(hits)
+            for fault, _ in pending:
+                if fault not in detected:
+                    # PODEM's cube did not hold up in the two-valued simulation (combinational loops)
+                    aborted.add(fault)
+            pending.clear()
+            claimed.clear()
+            if TRACE_FAULT.info:
+                TRACE_FAULT(f"  {len(patterns)} patterns, {len(detected)}/{total} targets detected, "
+                            f"{len(redundant)} untestable, {len(aborted)} aborted")
+
+        def open_fault(fault):
+            return not (fault in detected or fault in redundant or fault in aborted or fault in claimed)
+
+        def extend(cube, faults, start):
+            # dynamic compaction: secondary targets inside the primary cube's free bits
+            tries = 0
+            for fault in faults[start:]:
+                if tries >= compact or len(cube) == len(self.ppi):
+                    break
+                if not open_fault(fault) or any(fault is f for f, _ in pending):
+                    continue
+                tries += 1
+                outcome = self.podem(fault, fixed=cube, limit=min(SECONDARY_BACKTRACKS, self.backtrack_limit))
+                if outcome.status == 'detected':
+                    cube = outcome.cube
+                    claimed.add(fault)
+            return cube
+
+        def generate(faults):
+            for i, fault in enumerate(faults):
+                if total and len(detected) >= target * total:
+                    break
+                if fault in claimed:
+                    # targeted by a pending cube: see whether it held up first
+                    flush()
+                if not open_fault(fault):
+                    continue
+                if any(fault is f for f, _ in pending):
+                    continue
+                outcome = self.podem(fault)
+                if outcome.status == 'redundant':
+                    redundant.add(fault)
+                elif outcome.status == 'aborted':
+                    aborted.add(fault)
+                else:
+                    cube = extend(outcome.cube, faults, i + 1) if compact else outcome.cube
+                    vec = self.vector(cube, fill, rng)
+                    patterns.append(vec)
+                    cubes.append(self.vector(cube, 'x'))
+                    pending.append((fault, vec))
+                    if len(pending) >= block:
+                        flush()
+            flush()
+
+        generate(targets)
+        if collapsed is not None:
+            # dominance-dropped faults whose dominated fault was not detected
+            residual = [f for f in collapsed.residual(detected) if fsim.is_observable(f)]
+            targets.extend(residual)
+            total = len(targets)
+            generate(residual)
+        fault_result = fsim.run(patterns)
+        if collapsed is not None:
+            rep = collapsed.representative
+            untestable_full = [f for f in fsim.faults if rep[f] in redundant or rep[f] in untestable
+                               or not fsim.is_observable(f)]
+            aborted_full = [f for f in fsim.faults if rep[f] in aborted and f not in fault_result.detected]
+        else:
+            untestable_full = [f for f in fsim.faults if f in redundant or f in untestable]
+            aborted_full = [f for f in fsim.faults if f in aborted and f not in fault_result.detected]
+        untestable_full = [f for f in untestable_full if f not in fault_result.detected]
+        return AtpgResult(patterns, cubes, fault_result, untestable_full, aborted_full, time.monotonic() - started)
@@ -0,0 +1,264 @@
+# bdd.py
+
+import sys
+
+# level of the two terminal nodes, below every variable
+TERMINAL = sys.maxsize
+
+
+class Node:
+    """
+    A node of a reduced ordered BDD. Nodes are hash-consed by their manager,
+    so two nodes are the same function exactly when they are the same object.
+    & | ^ ~ build new functions, which lets the GATE_EXPRESSIONS of the
+    compiled evaluator run on BDDs with M = manager.true.
+    """
+    __slots__ = ('manager', 'var', 'low', 'high')
+
+    def __init__(self, manager, var, low, high):
+        self.manager = manager
+        self.var = var
+        self.low = low
+        self.high = high
+
+    def __and__(self, other):
+        return self.manager.ite(self, other, self.manager.false)
+
+    def __or__(self, other):
+        return self.manager.ite(self, self.manager.true, other)
+
+    def __xor__(self, other):
+        return self.manager.ite(self, ~other, other)
+
+    def __invert__(self):
+        return self.manager.ite(self, self.manager.false, self.manager.true)
+
+    def __repr__(self):
+        if self.var == TERMINAL:
+            return 'TRUE' if self is self.manager.true else 'FALSE'
+        return f"<BDD {self.manager.names[self.var]} @{id(self):x}>"
+
+
+class BDD:
+    """
+    Reduced ordered BDD manager: variables are ordered by index (the order
+    they were added), nodes live in a unique table keyed by (var, low, high)
+    and every operation goes through ite() and its computed table. Nothing
+    recurses on the Python stack: a BDD is as deep as it has variables, so
+    ite() and the walks below keep explicit stacks instead.
+    """
+
+    def __init__(self):
+        self.false = Node(self, TERMINAL, None, None)
+        self.true = Node(self, TERMINAL, None, None)
+        self.names = []
+        self.unique = {}
+        self.computed = {}
+
+    def add_var(self, name=None):
+        """New variable after all existing ones; returns its node."""
+        index = len(self.names)
+        self.names.append(name if name is not None else f"x{index}")
+        return self.node(index, self.false, self.true)
+
+    def var(self, index):
+        return self.node(index, self.false, self.true)
+
+    def constant(self, bit):
+        return self.true if bit else self.false
+
+    def node(self, var, low, high):
+        if low is high:
+            return low
+        key = (var, low, high)
+        found = self.unique.get(key)
+        if found is None:
+            found = self.unique[key] = Node(self, var, low, high)
+        return found
+
+    def ite(self, f, g, h):
+        """if f then g else h."""
+        true, false = self.true, self.false
+        computed, node = self.computed, self.node
+        stack = [(f, g, h)]
+        out = []   # results of the finished calls
+        push, pop, emit = stack.append, stack.pop, out.append
+        while stack:
+            call = pop()
+            if len(call) == 2:
+                # both cofactors done: low and high are the last two results
+                key, var = call
+                high = out.pop()
+                found = computed[key] = node(var, out.pop(), high)
+                emit(found)
+                continue
+            f, g, h = call
+            if f is true:
+                emit(g)
+            elif f is false or g is h:
+                emit(h)
+            elif g is true and h is false:
+                emit(f)
+            else:
+                found = computed.get(call)
+                if found is not None:
+                    emit(found)
+                    continue
+                fv, gv, hv = f.var, g.var, h.var
+                var = min(fv, gv, hv)
+                push((call, var))
+                if fv == var:
+                    f0, f1 = f.low, f.high
+                else:
+                    f0 = f1 = f
+                if gv == var:
+                    g0, g1 = g.low, g.high
+                else:
+                    g0 = g1 = g
+                if hv == var:
+                    h0, h1 = h.low, h.high
+                else:
+                    h0 = h1 = h
+                push((f1, g1, h1))
+                push((f0, g0, h0))
+        return out[0]
+
+    def clear_cache(self):
+        self.computed = {}
+
+    def fold(self, f, leaf, step):
+        """
+        Bottom-up over the nodes under f, each once: leaf(n) for a terminal,
+        step(n, low result, high result) for the rest; returns f's result.
+        """
+        memo = {}
+        stack = [f]
+        while stack:
+            n = stack[-1]
+            if n in memo:
+                stack.pop()
+            elif n.var == TERMINAL:
+                memo[n] = leaf(n)
+                stack.pop()
+            elif n.low in memo and n.high in memo:
+                memo[n] = step(n, memo[n.low], memo[n.high])
+                stack.pop()
+            else:
+                stack.append(n.high)
+                stack.append(n.low)
+        return memo[f]
+
+    def restrict(self, f, assignment: dict):
+        """f with the variables of `assignment` (index → 0/1) fixed."""
+        def step(n, low, high):
+            if n.var in assignment:
+                return high if assignment[n.var] else low
+            return self.node(n.var, low, high)
+        return self.fold(f, lambda n: n, step)
+
+    def exists(self, f, variables):
+        """∃ variables . f"""
+        variables = set(variables)
+
+        def step(n, low, high):
+            return low | high if n.var in variables else self.node(n.var, low, high)
+        return self.fold(f, lambda n: n, step)
+
+    def evaluate(self, f, assignment) -> int:
+        """Value of f under `assignment` (index → 0/1, or a sequence indexed by variable)."""
+        n = f
+        while n.var != TERMINAL:
+            n = n.high if assignment[n.var] else n.low
+        return 1 if n is self.true else 0
+
+    def support(self, f) -> set:
+        found = set()
+        seen = set()
+        stack = [f]
+        while stack:
+            n = stack.pop()
+            if n.var == TERMINAL or n in seen:
+                continue
+            seen.add(n)
+            found.add(n.var)
+            stack.append(n.low)
+            stack.append(n.high)
+        return found
+
+    def size(self, f) -> int:
+        """Nodes reachable from f, terminals included."""
+        seen = set()
+        stack = [f]
+        while stack:
+            n = stack.pop()
+            if n in seen:
+                continue
+            seen.add(n)
+            if n.var != TERMINAL:
+                stack.append(n.low)
+                stack.append(n.high)
+        return len(seen)
+
+    def satcount(self, f, variables) -> int:
+        """Assignments of `variables` (which must cover the support of f) that make f true."""
+        variables = sorted(variables)
+        position = {var: i for i, var in enumerate(variables)}
+        last = len(variables)
+
+        def pos(n):
+            return last if n.var == TERMINAL else position[n.var]
+
+        def step(n, low, high):
+            # assignments of the variables from n's position on
+            p = pos(n)
+            return (low << (pos(n.low) - p - 1)) + (high << (pos(n.high) - p - 1))
+        return self.fold(f, lambda n: 1 if n is self.true else 0, step) << pos(f)
+
+    def assignments(self, f, variables):
+        """Every assignment (tuple of 0/1 in `variables` order) of `variables` that makes f true."""
+        variables = sorted(variables)
+        last = len(variables)
+        stack = [(f, 0, ())]
+        while stack:
+            n, i, bits = stack.pop()
+            if n is self.false:
+                continue
+            if i == last:
+                if n is self.true:
+                    yield bits
+                continue
+            var = variables[i]
+            low, high = (n.low, n.high) if n.var == var else (n, n)
+            # high pushed first so assignments come out in increasing order
+            stack.append((high, i + 1, bits + (1,)))
+            stack.append((low, i + 1, bits + (0,)))
+
+    def transfer(self, f, target, var_map: dict):
+        """Copy of f in manager `target`, variable i renamed to var_map[i]."""
+        def leaf(n):
+            return target.true if n is self.true else target.false
+        return self.fold(f, leaf, lambda n, low, high: target.ite(target.var(var_map[n.var]), high, low))
+
+
+class BddLanes:
+    """
+    BitParallelEvaluator lane storage where a net's 'word' is a BDD over the
+    vector bits: one propagate covers every pattern at once, symbolically.
+    The width argument is ignored.
+    """
+    name = 'bdd'
+
+    def __init__(self, manager=None):
+        self.manager = manager if manager is not None else BDD()
+
+    def ones(self, width):
+        return self.manager.true
+
+    def zeros(self, width):
+        return self.manager.false
+
+    def constant(self, bit, width):
+        return self.manager.constant(bit)
+
+    def same(self, a, b):
+        return a is b
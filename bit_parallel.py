@@ -0,0 +1,179 @@
+# bit_parallel.py
+
+from logic_evaluator import LogicEvaluator
+
+# patterns evaluated per gate operation
+DEFAULT_WIDTH = 1024
+
+
+class IntLanes:
+    """
+    Lane storage as plain Python ints: bit p of a net's word is its value
+    in pattern p. Python ints are arbitrary precision, so one bitwise
+    operation covers the whole block regardless of width.
+    """
+    name = 'int'
+
+    def ones(self, width):
+        return (1 << width) - 1
+
+    def zeros(self, width):
+        return 0
+
+    def constant(self, bit, width):
+        return self.ones(width) if bit else self.zeros(width)
+
+    def same(self, a, b):
+        return a == b
+
+    def counter_bit(self, bit, base, width):
+        """Word holding bit `bit` of the integers base, base+1, ..., base+width-1."""
+        period = 1 << (bit + 1)
+        if base % period == 0 and width % period == 0:
+            # aligned block: the bit is a square wave, half a period low then high
+            half = 1 << bit
+            unit = ((1 << half) - 1) << half
+            return unit * (((1 << width) - 1) // ((1 << period) - 1))
+        if (base >> bit) == ((base + width - 1) >> bit):
+            # the bit doesn't toggle anywhere in the block
+            return self.constant((base >> bit) & 1, width)
+        return self.from_chars(['1' if ((base + p) >> bit) & 1 else '0' for p in range(width)], width)
+
+    def from_chars(self, chars, width):
+        """Word from one '0'/'1' char per pattern (pattern 0 first)."""
+        return int(''.join(reversed(chars)), 2) if chars else 0
+
+    def to_chars(self, word, width):
+        """One '0'/'1' char per pattern (pattern 0 first)."""
+        return format(word, f'0{width}b')[::-1]
+
+
+class NumpyLanes(IntLanes):
+    """Lane storage as NumPy uint64 arrays, 64 patterns per element."""
+    name = 'numpy'
+
+    def __init__(self):
+        import numpy as np
+        self.np = np
+
+    def _elements(self, width):
+        # the tail of a partial block is padding and never read back
+        return (width + 63) // 64
+
+    def ones(self, width):
+        return self.np.full(self._elements(width), 0xFFFFFFFFFFFFFFFF, dtype='<u8')
+
+    def zeros(self, width):
+        return self.np.zeros(self._elements(width), dtype='<u8')
+
+    def same(self, a, b):
+        return bool(self.np.array_equal(a, b))
+
+    def counter_bit(self, bit, base, width):
+        np = self.np
+        patterns = np.arange(base, base + 64 * self._elements(width), dtype=np.uint64)
+        bits = ((patterns >> np.uint64(bit)) & np.uint64(1)).astype(np.uint8)
+        return np.packbits(bits, bitorder='little').view('<u8').copy()
+
+    def from_chars(self, chars, width):
+        np = self.np
+        bits = np.frombuffer(''.join(chars).encode('ascii'), dtype=np.uint8) - ord('0')
+        padded = 64 * self._elements(width)
+        if len(bits) < padded:
+            bits = np.concatenate([bits, np.zeros(padded - len(bits), dtype=np.uint8)])
+        return np.packbits(bits, bitorder='little').view('<u8').copy()
+
+    def to_chars(self, word, width):
+        np = self.np
+        bits = np.unpackbits(word.view(np.uint8), bitorder='little')[:width]
+        return (bits + ord('0')).tobytes().decode('ascii')
+
+
+def make_lanes(backend):
+    if backend == 'int':
+        return IntLanes()
+    if backend == 'numpy':
+        return NumpyLanes()
+    if backend == 'bdd':
+        from bdd import BddLanes
+        return BddLanes()
+    raise ValueError(f"Unknown bit-parallel backend '{backend}'")
+
+
+class BitParallelEvaluator:
+    """
+    Evaluates a built LogicEvaluator model for a block of patterns at once.
+    Every net holds a word (see IntLanes / NumpyLanes) instead of a 0/1
+    value, and each gate is one bitwise expression from GATE_EXPRESSIONS,
+    run through the model's compiled evaluate function (netlist_compiler.py).
+    """
+
+    def __init__(self, evaluator: LogicEvaluator, backend='int'):
+        if evaluator.order is None:
+            evaluator.build_model()
+        self.evaluator = evaluator
+        self.lanes = make_lanes(backend)
+        self.compiled = evaluator.compiled or evaluator.compile()
+
+    def propagate(self, values, width):
+        """Settle every driven net in `values` (list of words by net ID) for `width` patterns."""
+        self.compiled(values, self.lanes.ones(width), self.lanes.same)
+        return values
+
+    def capture(self, q_words: dict, width, cycles=2, se_map=None, si_map=None, reset_map=None) -> dict:
+        """
+        Word-parallel LogicEvaluator.capture: q_words maps flop instance → word
+        of its Q across the block. se/si/reset maps hold one scalar per flop
+        that applies to every pattern. Returns {inst_name: word}.
+        """
+        ev = self.evaluator
+        lanes = self.lanes
+        zero = lanes.zeros(width)
+        current_q = dict(q_words)
+        for _ in range(cycles):
+            values = [zero] * len(ev.net_names)
+            for inst, word in current_q.items():
+                if inst in ev.q_ids:
+                    values[ev.q_ids[inst]] = word
+            self.propagate(values, width)
+            new_q = {}
+            for inst in current_q:
+                reset_val = 1 if reset_map is None else reset_map.get(inst, 1)
+                if reset_val == 0:
+                    new_q[inst] = zero
+                    continue
+                if inst in ev.sdff_cells:
+                    se = se_map.get(inst, 0) if se_map else 0
+                    si = si_map.get(inst, 0) if si_map else 0
+                    if se:
+                        new_q[inst] = lanes.constant(si, width)
+                    else:
+                        new_q[inst] = values[ev.d_ids[inst]] if inst in ev.d_ids else zero
+                elif inst in ev.dff_cells:
+                    new_q[inst] = values[ev.d_ids[inst]] if inst in ev.d_ids else zero
+            current_q = new_q
+        return current_q
+
+    def vector_words(self, vectors, length):
+        """
+        Transpose a block of '0'/'1' vectors (each right-aligned to `length`
+        chars, as a scan load would leave them) into one word per char position.
+        """
+        width = len(vectors)
+        rows = [v[-length:].rjust(length, '0') for v in vectors]
+        return [self.lanes.from_chars(col, width) for col in zip(*rows)]
+
+    def counter_words(self, base, width, length):
+        """Words for the consecutive vectors base .. base+width-1, MSB char first."""
+        return [self.lanes.counter_bit(length - 1 - k, base, width) for k in range(length)]
+
+    def words_to_vectors(self, words, width):
+        """Inverse of vector_words: one '0'/'1' string per pattern."""
+        columns = [self.lanes.to_chars(w, width) for w in words]
+        return [''.join(chars) for chars in zip(*columns)]
+
+
+def blocks(count, width, start=0):
+    """(base, block_width) pairs covering range(start, count)."""
+    for base in range(start, count, width):
+        yield base, min(width, count - base)
@@ -0,0 +1,83 @@
+# checkpoint.py
+
+import os
+import pickle
+import time
+
+CHECKPOINT_FORMAT = 1
+CHECKPOINT_EXT = 'ckpt'
+# default seconds between checkpoints of the command line sweeps
+DEFAULT_INTERVAL = 60
+
+
+def checkpoint_path(result_path):
+    return f"{result_path}.{CHECKPOINT_EXT}"
+
+
+class SweepCheckpoint:
+    """
+    Periodic checkpoint of an exhaustive sweep, next to its result file.
+    Vectors are produced in order, so the completed work is the range
+    start .. done-1; each save records `done`, the synced size of the
+    result file at that point and the partial SignatureStats (stream runs),
+    in one pickle replaced atomically. A resumed run cuts the result file
+    back to that size (dropping rows written after the last checkpoint) and
+    appends from `done`, so at most one interval of work is lost.
+    """
+
+    def __init__(self, result_path, identity, interval=DEFAULT_INTERVAL):
+        self.path = checkpoint_path(result_path)
+        self.result_path = result_path
+        self.identity = identity
+        self.interval = interval
+        self.last = time.monotonic()
+
+    def due(self) -> bool:
+        return bool(self.interval) and time.monotonic() - self.last >= self.interval
+
+    def save(self, out, done, stats=None):
+        state = {
+            'format': CHECKPOINT_FORMAT,
+            'identity': self.identity,
+            'done': done,
+            'size': out.sync(),
+            'stats': stats,
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.last = time.monotonic()
+
+    def load(self):
+        """The saved state, or None when there is nothing to resume; raises if it belongs to another sweep."""
+        try:
+            with open(self.path, 'rb') as f:
+                state = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        if state.get('format') != CHECKPOINT_FORMAT:
+            raise ValueError(f"{self.path}: unsupported checkpoint format {state.get('format')}")
+        for key, value in self.identity.items():
+            if state['identity'].get(key) != value:
+                raise ValueError(f"{self.path}: {key} differs from this run "
+                                 f"({state['identity'].get(key)!r} != {value!r})")
+        size = os.path.getsize(self.result_path)
+        if size < state['size']:
+            raise ValueError(f"{self.result_path} is shorter than its checkpoint ({size} < {state['size']} bytes)")
+        return state
+
+    def restore(self, state):
+        """Cut the result file back to the checkpointed size; returns the first vector still to run."""
+        with open(self.result_path, 'r+b') as f:
+            f.truncate(state['size'])
+        self.last = time.monotonic()
+        return state['done']
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
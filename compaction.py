@@ -0,0 +1,173 @@
+# compaction.py
+
+import heapq
+import random
+import time
+from bit_parallel import DEFAULT_WIDTH
+from faultsim import FaultSimResult
+
+COMPACTION_METHODS = ('reverse', 'greedy')
+
+
+def cube_masks(cube):
+    """(care, value) ints of a '0'/'1'/'X' cube, char 0 the most significant bit."""
+    care = int(''.join('0' if c in 'Xx' else '1' for c in cube), 2)
+    value = int(''.join('1' if c == '1' else '0' for c in cube), 2)
+    return care, value
+
+
+def merge_cubes(cubes) -> list:
+    """
+    Merge compatible test cubes (no bit specified 0 in one and 1 in the
+    other) first-fit, most specified cubes first; every input cube is
+    contained in exactly one output cube, so every test survives.
+    """
+    if not cubes:
+        return []
+    length = len(cubes[0])
+    merged = []   # [care, value]
+    masks = [cube_masks(cube) for cube in cubes]
+    for care, value in sorted(masks, key=lambda m: -bin(m[0]).count('1')):
+        for slot in merged:
+            if (slot[0] & care) & (slot[1] ^ value) == 0:
+                slot[0] |= care
+                slot[1] |= value
+                break
+        else:
+            merged.append([care, value])
+    out = []
+    for care, value in merged:
+        chars = []
+        for k in range(length - 1, -1, -1):
+            chars.append(str((value >> k) & 1) if (care >> k) & 1 else 'X')
+        out.append(''.join(chars))
+    return out
+
+
+def fill_cubes(cubes, fill='random', seed=0) -> list:
+    """Chain vectors of cubes, unspecified bits set to 0 or seeded random bits."""
+    rng = random.Random(seed)
+    out = []
+    for cube in cubes:
+        if fill == 'zero':
+            out.append(''.join('0' if c in 'Xx' else c for c in cube))
+        else:
+            out.append(''.join(str(rng.getrandbits(1)) if c in 'Xx' else c for c in cube))
+    return out
+
+
+def target_detections(fsim, vectors, width=DEFAULT_WIDTH) -> dict:
+    """
+    Detection masks (fault → patterns detecting it) of the faults a compacted
+    set has to keep detecting: the whole list, or with collapsing the
+    simulated representatives plus the dominance residual, so the expanded
+    coverage over the full list is preserved too.
+    """
+    collapsed = fsim.collapsed
+    if collapsed is None:
+        return fsim.detections(fsim.faults, vectors, width)
+    masks = fsim.detections(collapsed.simulated, vectors, width)
+    masks.update(fsim.detections(collapsed.residual(masks), vectors, width))
+    return masks
+
+
+def reverse_order(masks, count) -> list:
+    """
+    Reverse-order fault simulation: patterns applied last to first with fault
+    dropping keep only the patterns that detect a not yet dropped fault, which
+    is the last detecting pattern of every fault. Original order is kept.
+    """
+    return sorted({mask.bit_length() - 1 for mask in masks.values()})
+
+
+def greedy_cover(masks, count) -> list:
+    """
+    Greedy set cover: repeatedly take the pattern detecting the most faults
+    not yet covered, then drop chosen patterns (latest first) whose faults are
+    all covered by the others. Patterns come in the order they were chosen.
+    """
+    detects = [[] for _ in range(count)]
+    for i, mask in enumerate(masks.values()):
+        while mask:
+            low = mask & -mask
+            detects[low.bit_length() - 1].append(i)
+            mask ^= low
+    covered = bytearray(len(masks))
+    heap = [(-len(faults), p) for p, faults in enumerate(detects) if faults]
+    heapq.heapify(heap)
+    chosen = []
+    while heap:
+        gain, p = heapq.heappop(heap)
+        fresh = sum(1 for i in detects[p] if not covered[i])
+        if not fresh:
+            continue
+        if fresh != -gain:
+            # stale gain: requeue with the current one (lazy greedy)
+            heapq.heappush(heap, (-fresh, p))
+            continue
+        chosen.append(p)
+        for i in detects[p]:
+            covered[i] = 1
+    times = [0] * len(masks)
+    for p in chosen:
+        for i in detects[p]:
+            times[i] += 1
+    kept = []
+    for p in reversed(chosen):
+        if all(times[i] > 1 for i in detects[p]):
+            for i in detects[p]:
+                times[i] -= 1
+        else:
+            kept.append(p)
+    kept.reverse()
+    return kept
+
+
+class CompactionResult:
+    """Original and compacted pattern sets with the fault simulation of both."""
+
+    def __init__(self, method, vectors, patterns, before, after, shift_cycles, elapsed):
+        self.method = method
+        self.vectors = vectors
+        self.patterns = patterns
+        self.before = before
+        self.after = after
+        self.shift_cycles = shift_cycles   # (before, after) clock cycles to apply the sets
+        self.elapsed = elapsed
+
+    @property
+    def ratio(self) -> float:
+        """Compacted pattern count as a fraction of the original."""
+        return len(self.patterns) / len(self.vectors) if self.vectors else 1.0
+
+    def report(self):
+        before, after = self.shift_cycles
+        print(f"Patterns: {len(self.vectors)} -> {len(self.patterns)} ({1 - self.ratio:.1%} removed, "
+              f"{self.method}) in {self.elapsed:.2f}s")
+        print(f"Shift cycles: {before} -> {after}")
+        print(f"Fault coverage: {self.before.coverage:.2%} -> {self.after.coverage:.2%} "
+              f"({len(self.before.detected)} -> {len(self.after.detected)} detected)")
+
+
+def compact_patterns(fsim, vectors, method='reverse', width=DEFAULT_WIDTH) -> CompactionResult:
+    """
+    Static compaction of chain vectors against the FaultSimulator's fault
+    list: one fault simulation without dropping gives every fault's detecting
+    patterns, 'reverse' or 'greedy' picks a subset detecting the same faults,
+    and the subset is fault-simulated again to confirm the coverage.
+    """
+    if method not in COMPACTION_METHODS:
+        raise ValueError(f"unknown compaction method '{method}' (choose from {', '.join(COMPACTION_METHODS)})")
+    started = time.monotonic()
+    vectors = list(vectors)
+    masks = target_detections(fsim, vectors, width)
+    pick = reverse_order if method == 'reverse' else greedy_cover
+    patterns = [vectors[p] for p in pick(masks, len(vectors))]
+    first = {fault: (mask & -mask).bit_length() - 1 for fault, mask in masks.items()}
+    if fsim.collapsed is not None:
+        first = fsim.collapsed.expand(first)
+    unobservable = [f for f in fsim.faults if not fsim.is_observable(f)]
+    before = FaultSimResult(fsim.faults, first, unobservable, len(vectors), time.monotonic() - started)
+    after = fsim.run(patterns, width)
+    cycles = (fsim.simulator.shift_cycles(len(vectors)), fsim.simulator.shift_cycles(len(patterns)))
+    return CompactionResult(method, vectors, patterns, before, after, cycles, time.monotonic() - started)
@@ -0,0 +1,223 @@
+# design_cache.py
+"""
+On-disk cache of parsed designs. Entries are pickles, and pickle.loads()
+runs arbitrary code from whatever file it is given: anyone who can write to
+the cache directory can run code as every user of it. The directory is
+therefore created private to its owner (0700, entries 0600), and entries
+are only read from a directory owned by the current user that nobody else
+can write to; otherwise the cache is skipped.
+"""
+
+import os
+import pickle
+import zlib
+import hashlib
+import tracing
+from design_db import DesignDatabase
+from verilog_reader import read_design
+
+TRACE_DESIGN = tracing.get('design')
+
+# bump when DesignDatabase.state() or LogicEvaluator.model_state() change shape
+FORMAT_VERSION = 1
+# cache location, overridable with WRAPSIM_CACHE_DIR; WRAPSIM_CACHE=0 turns it off
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'wrapsim')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+MAGIC = b'WSDC'
+
+
+class DesignCache:
+    """
+    On-disk cache of parsed designs: the DesignDatabase plus the levelized
+    LogicEvaluator model, keyed by the SHA-256 of the netlist and cell
+    library sources. Entries are zlib-compressed pickles of plain
+    dicts/lists/bytes; the least recently used ones are evicted once the
+    directory grows past max_bytes.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES, enabled=None):
+        self.directory = directory or os.environ.get('WRAPSIM_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+        if enabled is None:
+            enabled = os.environ.get('WRAPSIM_CACHE', '1') != '0'
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.trusted = None   # directory checked by trusted_directory()
+
+    def key(self, netlist, library=None) -> str:
+        h = hashlib.sha256()
+        h.update(f"wrapsim-design-v{FORMAT_VERSION}\0".encode())
+        for path in (netlist, library):
+            if path is None:
+                h.update(b'\0')
+                continue
+            with open(path, 'rb') as f:
+                h.update(f.read())
+            h.update(b'\0')
+        return h.hexdigest()
+
+    def path(self, key) -> str:
+        return os.path.join(self.directory, f"{key}.wsdc")
+
+    def trusted_directory(self) -> bool:
+        """
+        Whether entries may be unpickled from the directory: it is ours and
+        not writable by group or others (see the module docstring).
+        """
+        if self.trusted is None:
+            try:
+                st = os.stat(self.directory)
+            except FileNotFoundError:
+                return False
+            getuid = getattr(os, 'getuid', None)
+            self.trusted = (getuid is None or st.st_uid == getuid()) and not st.st_mode & 0o022
+            if not self.trusted and TRACE_DESIGN.info:
+                TRACE_DESIGN(f"[design_cache] Not using {self.directory}: "
+                             "owned by another user or writable by others")
+        return self.trusted
+
+    def make_directory(self):
+        """Create the cache directory private to this user."""
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        try:
+            os.chmod(self.directory, 0o700)
+        except OSError:
+            pass
+        self.trusted = None
+
+    def load(self, key):
+        """Cached {'design': ..., 'model': ...} state, or None on a miss."""
+        if not self.enabled:
+            return None
+        path = self.path(key)
+        if not self.trusted_directory():
+            self.misses += 1
+            return None
+        try:
+            with open(path, 'rb') as f:
+                blob = f.read()
+            if blob[:4] != MAGIC:
+                raise ValueError("bad magic")
+            entry = pickle.loads(zlib.decompress(blob[4:]))
+            if entry.get('version') != FORMAT_VERSION:
+                raise ValueError("stale format")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            # unreadable entry: treat as a miss, it's rewritten on store()
+            if TRACE_DESIGN.info:
+                TRACE_DESIGN(f"[design_cache] Ignoring corrupt entry {path}: {e}")
+            self.misses += 1
+            return None
+        # mtime marks the entry as recently used for eviction
+        os.utime(path)
+        self.hits += 1
+        return entry
+
+    def store(self, key, design_state, model_state):
+        if not self.enabled:
+            return
+        self.make_directory()
+        if not self.trusted_directory():
+            return
+        entry = {'version': FORMAT_VERSION, 'design': design_state, 'model': model_state}
+        blob = MAGIC + zlib.compress(pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL))
+        path = self.path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+            f.write(blob)
+        # atomic, so concurrent runs never see a half-written entry
+        os.replace(tmp, path)
+        self.stores += 1
+        self.evict(keep=path)
+
+    def evict(self, keep=None):
+        """Drop least recently used entries (never `keep`) until the cache fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.wsdc'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses,
+                'stores': self.stores, 'evictions': self.evictions}
+
+    def report(self):
+        """One line of the counters for the design trace."""
+        counters = ', '.join(f"{name} {count}" for name, count in self.stats().items())
+        TRACE_DESIGN(f"[design_cache] {self.directory}: {counters}")
+
+
+# the cache load_design() uses unless given one, shared so the counters cover the whole run
+_default_cache = None
+
+
+def default_cache() -> DesignCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = DesignCache()
+    return _default_cache
+
+
+def default_library(netlist):
+    """lib_cells.v next to the netlist, if there is one."""
+    path = os.path.join(os.path.dirname(os.path.abspath(netlist)), 'lib_cells.v')
+    return path if os.path.exists(path) else None
+
+
+def load_design(netlist, library=None, cache=None):
+    """
+    (ast, DesignDatabase) for a netlist. On a cache hit the database comes
+    back with its levelized model attached and ast is None; on a miss the
+    netlist is read (verilog_reader.py, pyverilog only as a fallback) and
+    the result stored. The cache counters go to the design trace at debug.
+    """
+    from logic_evaluator import LogicEvaluator
+    if cache is None:
+        cache = default_cache()
+    if library is None:
+        library = default_library(netlist)
+    key = cache.key(netlist, library) if cache.enabled else None
+    entry = cache.load(key) if key else None
+    if entry is not None:
+        design = DesignDatabase.from_state(entry['design'])
+        design.model_state = entry['model']
+        if TRACE_DESIGN.info:
+            TRACE_DESIGN(f"[design_cache] Hit {key[:12]} for {netlist}")
+        if TRACE_DESIGN.debug:
+            cache.report()
+        return None, design
+
+    ast, design = read_design(netlist)
+    if key:
+        evaluator = LogicEvaluator(ast, design=design)
+        evaluator.build_model()
+        cache.store(key, design.state(), evaluator.model_state())
+        design.model_state = evaluator.model_state()
+        if TRACE_DESIGN.info:
+            TRACE_DESIGN(f"[design_cache] Stored {key[:12]} for {netlist}")
+        if TRACE_DESIGN.debug:
+            cache.report()
+    return ast, design
@@ -0,0 +1,270 @@
+# design_db.py
+
+from collections import defaultdict
+
+# cell-name substrings that VerilogScanDFT reports as logic gates
+GATE_CELL_NAMES = ['aoi', 'oai', 'and', 'or', 'nand', 'nor', 'xor', 'xnor', 'clkinv']
+
+# positional port order for flops instantiated without port names
+SDFF_POSITIONAL_PORTS = ['d', 'se', 'si', 'ck', 'rn', 'q', 'qn']
+DFF_POSITIONAL_PORTS = ['d', 'ck', 'rn', 'q', 'qn']
+
+# gate ports that drive a net; every other port is an input
+OUTPUT_PORTS = ('y', 'z', 'zn')
+
+# top-level inputs that don't get a wrapper boundary cell
+WBC_EXCLUDED_INPUTS = {'clk', 'reset', 'en'}
+WBC_INPUTS = ['CFI', 'WINT', 'WEXT', 'WRCK', 'DFT_sdi']
+WBC_OUTPUTS = ['CFO', 'DFT_sdo']
+
+
+def extract_name(node):
+    """Net name of a port/assign expression, e.g. 'n_6' or 'out[3]'."""
+    import pyverilog.vparser.ast as vast
+    if isinstance(node, vast.Identifier):
+        return node.name
+    if isinstance(node, vast.Pointer):
+        # produce exactly "busname[index]" to match Verilog nets
+        return f"{node.var.name}[{node.ptr.value}]"
+    if isinstance(node, vast.IntConst):
+        return node.value
+    # Handle Lvalue and Rvalue objects
+    if hasattr(node, 'name'):
+        return node.name
+    if hasattr(node, 'var') and hasattr(node, 'ptr'):
+        return f"{node.var.name}[{node.ptr.value}]"
+    # Try to access the underlying node
+    if hasattr(node, 'node'):
+        return extract_name(node.node)
+    # Try to get the first child if it's a container
+    if hasattr(node, 'children') and callable(node.children):
+        children = list(node.children())
+        if children:
+            return extract_name(children[0])
+    # fallback
+    return str(node)
+
+
+def expand_bus(name, msb, lsb):
+    """Per-bit port names of a bus, MSB first: in[3:0] → in3, in2, in1, in0."""
+    bit_range = range(msb, lsb - 1, -1) if msb >= lsb else range(msb, lsb + 1)
+    return [f"{name}{i}" for i in bit_range]
+
+
+class DesignDatabase:
+    """
+    Everything WrapSim needs from a netlist, collected once:
+    modules and their ports, flops, gates, nets, drivers and fanout.
+    VerilogScanDFT, ExtestModeDFT and LogicEvaluator all read from it
+    instead of walking the AST themselves.
+    """
+
+    def __init__(self):
+        # module names in definition order, and their expanded I/O
+        self.modules = []
+        self.module_io = {}
+        self.instantiated_modules = set()
+        self.top_module = None
+        # (cell, instance) lists, in netlist order
+        self.flipflops = []
+        self.scan_flops = []
+        self.gates = []
+        # flop instance → D/Q/SE/SI net, and the flop instance sets
+        self.d_inputs = {}
+        self.q_outputs = {}
+        self.se_inputs = {}
+        self.si_inputs = {}
+        self.sdff_cells = set()
+        self.dff_cells = set()
+        # every other instance: type, port map (portname_lower → net) and input nets
+        self.gate_types = {}
+        self.gate_ports = {}
+        self.gate_inputs = defaultdict(list)
+        # net → gate instance, or source net of an assign
+        self.signal_drivers = {}
+        # net → [(instance, port)] reading it
+        self.fanout = defaultdict(list)
+        # every net name seen, in first-seen order
+        self.nets = {}
+        # LogicEvaluator.model_state() when loaded from the design cache
+        self.model_state = None
+
+    @classmethod
+    def from_ast(cls, ast):
+        """Build the database in one iterative pre-order pass over a pyverilog AST."""
+        # pyverilog is only needed here, not for databases loaded from the cache
+        import pyverilog.vparser.ast as vast
+        db = cls()
+        stack = [(ast, None)]
+        while stack:
+            node, module = stack.pop()
+            if isinstance(node, vast.ModuleDef):
+                module = node.name
+                db.add_module(node)
+            elif isinstance(node, vast.InstanceList):
+                db.instantiated_modules.add(node.module)
+                for inst in node.instances:
+                    db.add_instance(node.module, inst.name, db.instance_ports(node.module, inst))
+            elif isinstance(node, vast.Assign):
+                db.add_assign(extract_name(node.left), extract_name(node.right))
+            stack.extend((child, module) for child in reversed(node.children()))
+        db.finish()
+        return db
+
+    def add_module(self, node):
+        import pyverilog.vparser.ast as vast
+        self.modules.append(node.name)
+        input_names = []
+        output_names = []
+        for item in node.children():
+            if not isinstance(item, vast.Decl):
+                continue
+            for decl in item.list:
+                signal_base = decl.name if isinstance(decl.name, str) else decl.name.name
+                width = decl.width
+                if width is None:
+                    expanded = [signal_base]
+                else:
+                    expanded = expand_bus(signal_base, int(width.msb.value), int(width.lsb.value))
+                if isinstance(decl, vast.Input):
+                    input_names.extend(expanded)
+                elif isinstance(decl, vast.Output):
+                    output_names.extend(expanded)
+        self.add_module_io(node.name, input_names, output_names)
+
+    def add_module_io(self, name, input_names, output_names):
+        self.module_io[name] = {
+            'input_count': len(input_names),
+            'output_count': len(output_names),
+            'input_names': input_names,
+            'output_names': output_names
+        }
+
+    def instance_ports(self, module, inst):
+        """portname_lower → net for one instance; unnamed flop ports map by position."""
+        mtype = module.lower()
+        ports = {}
+        for idx, p in enumerate(inst.portlist or ()):
+            pname = getattr(p, 'portname', None)
+            # Extract the net/signal name from .expr or .argname
+            if hasattr(p, 'expr'):
+                netname = extract_name(p.expr)
+            elif hasattr(p, 'argname'):
+                netname = extract_name(p.argname)
+            else:
+                netname = None
+            if pname is not None:
+                ports[pname.lower()] = netname
+            else:
+                if 'sdff' in mtype:
+                    pos_names = SDFF_POSITIONAL_PORTS
+                elif 'dff' in mtype:
+                    pos_names = DFF_POSITIONAL_PORTS
+                else:
+                    pos_names = []
+                if idx < len(pos_names):
+                    ports[pos_names[idx]] = netname
+        return ports
+
+    def add_instance(self, module, inst_name, ports):
+        cell = module.lower()
+        for pname, net in ports.items():
+            self.nets.setdefault(net, None)
+        if 'sdff' in cell:
+            self.scan_flops.append((cell, inst_name))
+            self.sdff_cells.add(inst_name)
+            self.d_inputs[inst_name] = ports.get('d')
+            self.q_outputs[inst_name] = ports.get('q')
+            self.se_inputs[inst_name] = ports.get('se')
+            self.si_inputs[inst_name] = ports.get('si')
+        elif 'dff' in cell:
+            self.flipflops.append((cell, inst_name))
+            self.dff_cells.add(inst_name)
+            self.d_inputs[inst_name] = ports.get('d')
+            self.q_outputs[inst_name] = ports.get('q')
+        else:
+            if any(gate in cell for gate in GATE_CELL_NAMES):
+                self.gates.append((cell, inst_name))
+            # a combinational/library cell
+            self.gate_types[inst_name] = cell
+            self.gate_ports[inst_name] = ports
+            # classify ports: y,z,zn are outputs, rest are inputs
+            for pname, net in ports.items():
+                if pname in OUTPUT_PORTS:
+                    self.signal_drivers[net] = inst_name
+                else:
+                    self.gate_inputs[inst_name].append(net)
+        for pname, net in ports.items():
+            if pname not in OUTPUT_PORTS and pname != 'q' and pname != 'qn':
+                self.fanout[net].append((inst_name, pname))
+
+    def add_assign(self, lhs, rhs):
+        if lhs and rhs and lhs != 'None' and rhs != 'None':
+            self.nets.setdefault(lhs, None)
+            self.nets.setdefault(rhs, None)
+            self.signal_drivers[lhs] = rhs
+            self.fanout[rhs].append((lhs, 'assign'))
+
+    # attributes saved by state(), in a form that pickles compactly
+    STATE_FIELDS = ('modules', 'module_io', 'instantiated_modules', 'top_module',
+                    'flipflops', 'scan_flops', 'gates', 'd_inputs', 'q_outputs',
+                    'se_inputs', 'si_inputs', 'sdff_cells', 'dff_cells', 'gate_types',
+                    'gate_ports', 'gate_inputs', 'signal_drivers', 'fanout', 'nets')
+
+    def state(self) -> dict:
+        """Plain dict/list/set snapshot of the database (see design_cache.py)."""
+        state = {name: getattr(self, name) for name in self.STATE_FIELDS}
+        state['gate_inputs'] = dict(self.gate_inputs)
+        state['fanout'] = dict(self.fanout)
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        db = cls()
+        for name in cls.STATE_FIELDS:
+            setattr(db, name, state[name])
+        db.gate_inputs = defaultdict(list, state['gate_inputs'])
+        db.fanout = defaultdict(list, state['fanout'])
+        return db
+
+    def finish(self):
+        # top-level module: defined but never instantiated (first in definition order)
+        candidates = [m for m in self.modules if m not in self.instantiated_modules]
+        self.top_module = candidates[0] if candidates else None
+
+    def clock_nets(self) -> dict:
+        """Flop instance → net on its CK pin (flops with CK unconnected are left out)."""
+        flops = self.sdff_cells | self.dff_cells
+        clocks = {}
+        for net, readers in self.fanout.items():
+            for inst, pname in readers:
+                if pname == 'ck' and inst in flops:
+                    clocks[inst] = net
+        return clocks
+
+    def wrapper_boundary_cells(self):
+        """Wrapper Boundary Cells for the top-level module's ports (inputs, then outputs)."""
+        cells = []
+        if not self.top_module or self.top_module not in self.module_io:
+            return cells
+        io = self.module_io[self.top_module]
+        for name in sorted(io['input_names']):
+            if name not in WBC_EXCLUDED_INPUTS:
+                cells.append({
+                    'cell_type': 'WBC',
+                    'instance': f'WBC_{name}',
+                    'direction': 'input',
+                    'signal': name,
+                    'inputs': WBC_INPUTS,
+                    'outputs': WBC_OUTPUTS
+                })
+        for name in sorted(io['output_names']):
+            cells.append({
+                'cell_type': 'WBC',
+                'instance': f'WBC_{name}',
+                'direction': 'output',
+                'signal': name,
+                'inputs': WBC_INPUTS,
+                'outputs': WBC_OUTPUTS
+            })
+        return cells
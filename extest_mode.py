@@ -2,12 +2,8 @@
 
 import re
 import os
-import numpy as np
-import matplotlib.pyplot as plt
-from pyverilog.vparser.parser import parse
-import pyverilog.vparser.ast as vast
-from tabulate import tabulate
-from graphviz import Digraph
+from design_db import DesignDatabase
+from design_cache import load_design
 
 class ExtestModeDFT:
     def __init__(self, filepath):
@@ -20,6 +16,7 @@ class ExtestModeDFT:
         self.module_io = {}
         self.wbc_cells = []
         self.ast = None
+        self.design = None  # DesignDatabase shared with LogicEvaluator
         
         #Extest-specific attributes
         self.main_core = None
@@ -28,109 +25,26 @@ class ExtestModeDFT:
         self.extest_scan_chain = []
 
     def parse_file(self):
-        self.ast, _ = parse([self.filepath])
+        # parsed once per netlist; repeat runs load the cached design instead
+        self.ast, self.design = load_design(self.filepath)
         print("Parsed netlist file successfully.")
 
     def extract_design_info(self):
-        module_defs = set()
-        instantiated_modules = set()
-
-        def visit(node):
-            if isinstance(node, vast.ModuleDef):
-                module_defs.add(node.name)
-                self.modules.append(node.name)
-                input_names = []
-                output_names = []
-                print(f"Processing module: {node.name}")
-
-                for item in node.children():
-                    if isinstance(item, vast.Decl):
-                        print(f"  Found Decl: {type(item)}")
-                        for decl in item.list:
-                            print(f"    Declaration: {type(decl)} - {decl}")
-                            signal_base = decl.name if isinstance(decl.name, str) else decl.name.name
-                            width = decl.width
-                            print(f"      Signal: {signal_base}, Width: {width}")
-
-                            if width is None:
-                                if isinstance(decl, vast.Input):
-                                    input_names.append(signal_base)
-                                    print(f"      Added input: {signal_base}")
-                                elif isinstance(decl, vast.Output):
-                                    output_names.append(signal_base)
-                                    print(f"      Added output: {signal_base}")
-                            else:
-                                msb = int(width.msb.value)
-                                lsb = int(width.lsb.value)
-                                bit_range = range(msb, lsb - 1, -1) if msb >= lsb else range(msb, lsb + 1)
-                                expanded = [f"{signal_base}{i}" for i in bit_range]
-                                if isinstance(decl, vast.Input):
-                                    input_names.extend(expanded)
-                                    print(f"      Added input bus: {expanded}")
-                                elif isinstance(decl, vast.Output):
-                                    output_names.extend(expanded)
-                                    print(f"      Added output bus: {expanded}")
-
-                self.module_io[node.name] = {
-                    'input_count': len(input_names),
-                    'output_count': len(output_names),
-                    'input_names': input_names,
-                    'output_names': output_names
-                }
-                print(f"  Module {node.name} I/O: {len(input_names)} inputs, {len(output_names)} outputs")
-
-            elif isinstance(node, vast.InstanceList):
-                instantiated_modules.add(node.module)
-
-                for inst in node.instances:
-                    cell = node.module.lower()
-                    name = inst.name
-
-                    if "sdff" in cell:
-                        self.scan_flops.append((cell, name))
-                    elif "dff" in cell:
-                        self.flipflops.append((cell, name))
-                    elif any(gate in cell for gate in ['aoi', 'oai', 'and', 'or', 'nand', 'nor', 'xor', 'xnor', 'clkinv']):
-                        self.gates.append((cell, name))
-
-            for c in node.children():
-                visit(c)
-
-        visit(self.ast)
-
-        #determine top-level module (defined but never instantiated)
-        top_candidates = module_defs - instantiated_modules
-        top_module = next(iter(top_candidates), None)
+        if self.design is None:
+            self.design = DesignDatabase.from_ast(self.ast)
+        design = self.design
+        self.modules = list(design.modules)
+        self.flipflops = list(design.flipflops)
+        self.scan_flops = list(design.scan_flops)
+        self.gates = list(design.gates)
+        self.module_io = dict(design.module_io)
+        for name, io in self.module_io.items():
+            print(f"  Module {name} I/O: {io['input_count']} inputs, {io['output_count']} outputs")
 
         #add the Wrapper Boundary Cells for top-level module only (main core)
-        excluded_inputs = {'clk', 'reset', 'en'}
-        wbc_inputs = ['CFI', 'WINT', 'WEXT', 'WRCK', 'DFT_sdi']
-        wbc_outputs = ['CFO', 'DFT_sdo']
-
-        if top_module and top_module in self.module_io:
-            print(f"Top-level module identified: {top_module}")
-            io = self.module_io[top_module]
-
-            for name in sorted(io['input_names']):
-                if name not in excluded_inputs:
-                    self.wbc_cells.append({
-                        'cell_type': 'WBC',
-                        'instance': f'WBC_{name}',
-                        'direction': 'input',
-                        'signal': name,
-                        'inputs': wbc_inputs,
-                        'outputs': wbc_outputs
-                    })
-
-            for name in sorted(io['output_names']):
-                self.wbc_cells.append({
-                    'cell_type': 'WBC',
-                    'instance': f'WBC_{name}',
-                    'direction': 'output',
-                    'signal': name,
-                    'inputs': wbc_inputs,
-                    'outputs': wbc_outputs
-                })
+        if design.top_module and design.top_module in self.module_io:
+            print(f"Top-level module identified: {design.top_module}")
+        self.wbc_cells = design.wrapper_boundary_cells()
 
     def initialize_three_cores(self):
         """
@@ -215,6 +129,7 @@ class ExtestModeDFT:
             print(f"  {i+1}. {cell['instance']} ({cell['direction']}) - {cell['signal']}")
 
     def display_extest_summary(self):
+        from tabulate import tabulate
         print("\n=== EXTEST MODE SUMMARY ===")
         
         print("\n[ Main Core (with WBCs) ]")
@@ -238,10 +153,11 @@ class ExtestModeDFT:
         print("\n[ Extest Scan Chain (WBCs only) ]")
         print(tabulate(self.extest_scan_chain, headers="keys") or "None")
 
-    def create_extest_schematic(self, output_file="extest_schematic"):
+    def create_extest_schematic(self, output_file="extest_schematic", view=True):
         """
         Create schematic showing three cores and extest scan chain, and show connections from WBCs to left/right core flip-flops.
         """
+        from graphviz import Digraph
         dot = Digraph(comment="Extest Mode Schematic")
         
         #Set graph attributes for better layout
@@ -366,7 +282,7 @@ class ExtestModeDFT:
                     color="green", style="dashed", 
                     label=f"WBC_out[{i}]->right_count_reg[{i}]")
         
-        dot.render(output_file, view=True, format="pdf")
+        dot.render(output_file, view=view, format="pdf")
 
     def run(self):
         """
@@ -2,8 +2,13 @@
 
 from extest_mode import ExtestModeDFT
 from logic_evaluator import LogicEvaluator
+from bit_parallel import BitParallelEvaluator, DEFAULT_WIDTH
 from main import VerilogScanDFT
-import csv
+import tracing
+from sweep import exhaustive_sweep
+
+TRACE_EXTEST = tracing.get('extest')
+
 class ExtestCell:
     def __init__(self, name, cell_type, direction=None, signal=None):
         self.name = name
@@ -13,11 +18,25 @@ class ExtestCell:
         self.value = 0  # Current value in the WBC
 
 class ExtestSimulator:
-    def __init__(self, extest_analyzer: ExtestModeDFT):
+    #Map WBC values to flip-flops by bit position
+    #Based on simple_counter.v: count_reg_3->out[3], count_reg_2->out[2], count_reg_1->out[1], count_reg_0->out[0]
+    FLOP_TO_BIT = {
+        'count_reg_3': 3,  # MSB
+        'count_reg_2': 2,
+        'count_reg_1': 1, 
+        'count_reg_0': 0   # LSB
+    }
+
+    def __init__(self, extest_analyzer: ExtestModeDFT, next_state=False, propagate_mode='compiled', verbose=True):
         self.extest_analyzer = extest_analyzer
+        # core evaluators answer functional captures from a next-state table (see logic_evaluator.py)
+        self.next_state = next_state
+        # LogicEvaluator.PROPAGATE_MODES entry the core evaluators capture with
+        self.propagate_mode = propagate_mode
         self.wbc_cells = []
         self.history = []
-        self.verbose = True
+        self.verbose = verbose
+        self.engine = None  # bit-parallel evaluator, built on first batch run
         
         #initialize WBC cells from the extest scan chain
         for cell in extest_analyzer.extest_scan_chain:
@@ -38,17 +57,22 @@ class ExtestSimulator:
         """
         Set up logic evaluators for left and right cores
         """
-        print("\n=== Setting up Core Logic Evaluators ===")
+        if self.verbose:
+            print("\n=== Setting up Core Logic Evaluators ===")
         
         #Use the same netlist but with prefixed instance names
         #We'll need to create modified netlists for left and right cores
         #For now, we'll use the original netlist and handle the naming in simulation
         
-        #initialize evaluators (they'll be configured during capture)
-        self.left_evaluator = LogicEvaluator(self.extest_analyzer.ast)
-        self.right_evaluator = LogicEvaluator(self.extest_analyzer.ast)
+        #initialize evaluators (they'll be built on first capture) from the analyzer's design database
+        design = self.extest_analyzer.design
+        self.left_evaluator = LogicEvaluator(self.extest_analyzer.ast, propagate_mode=self.propagate_mode,
+                                             design=design, next_state=self.next_state)
+        self.right_evaluator = LogicEvaluator(self.extest_analyzer.ast, propagate_mode=self.propagate_mode,
+                                              design=design, next_state=self.next_state)
         
-        print("Logic evaluators initialized for left and right cores")
+        if self.verbose:
+            print("Logic evaluators initialized for left and right cores")
 
     def shift_in(self, test_vector):
         """
@@ -80,23 +104,17 @@ class ExtestSimulator:
         input_wbcs = [wbc for wbc in self.wbc_cells if wbc.direction == 'input']
         output_wbcs = [wbc for wbc in self.wbc_cells if wbc.direction == 'output']
         
-        #build evaluators for left and right cores
-        self.left_evaluator.build_model()
-        self.right_evaluator.build_model()
+        #build evaluators for left and right cores (once)
+        for evaluator in (self.left_evaluator, self.right_evaluator):
+            if evaluator.order is None:
+                evaluator.build_model()
         
         #Initialize Q values for left and right cores
         #We'll use the WBC values to set initial Q values
         left_q = {}
         right_q = {}
         
-        #Map WBC values to flip-flops by bit position
-        #Based on simple_counter.v: count_reg_3->out[3], count_reg_2->out[2], count_reg_1->out[1], count_reg_0->out[0]
-        flop_to_bit = {
-            'count_reg_3': 3,  # MSB
-            'count_reg_2': 2,
-            'count_reg_1': 1, 
-            'count_reg_0': 0   # LSB
-        }
+        flop_to_bit = self.FLOP_TO_BIT
         
         #Map input WBCs to left core flip-flops
         for i, wbc in enumerate(input_wbcs):
@@ -137,21 +155,16 @@ class ExtestSimulator:
             print("\n[SHIFT-OUT] Loading core values into WBCs")
         
         #debug: Print the actual Q values from the evaluators
-        print(f"DEBUG: left_final_q = {self.left_final_q}")
-        print(f"DEBUG: right_final_q = {self.right_final_q}")
+        if TRACE_EXTEST.debug:
+            TRACE_EXTEST(f"DEBUG: left_final_q = {self.left_final_q}")
+            TRACE_EXTEST(f"DEBUG: right_final_q = {self.right_final_q}")
         
         #separate input and output WBCs
         input_wbcs = [wbc for wbc in self.wbc_cells if wbc.direction == 'input']
         output_wbcs = [wbc for wbc in self.wbc_cells if wbc.direction == 'output']
         
         #Create a mapping from flip-flop instance name to bit position
-        #Based on simple_counter.v: count_reg_3->out[3], count_reg_2->out[2], count_reg_1->out[1], count_reg_0->out[0]
-        flop_to_bit = {
-            'count_reg_3': 3,  # MSB
-            'count_reg_2': 2,
-            'count_reg_1': 1, 
-            'count_reg_0': 0   # LSB
-        }
+        flop_to_bit = self.FLOP_TO_BIT
         
         #Load left core values into input WBCs
         #Create a list to hold values in correct bit order
@@ -215,63 +228,95 @@ class ExtestSimulator:
         self.verbose = verbose
         self.history = []  # Clear history for each run
         
-        if verbose:
-            print(f"\n=== RUNNING EXTEST MODE: {test_vector} ===")
-        
-        # Phase 1: Shift-in test vector into WBCs
-        self.shift_in(test_vector)
-        
-        # Phase 2: Capture - simulate left and right cores
-        self.capture(cycles=1)
-        
-        # Phase 3: Shift-out - generate signature
-        signature = self.shift_out()
-        
-        if verbose:
-            self.print_trace()
-            print(f"\nFinal Extest Signature: {signature}")
+        #verbose also turns the evaluators' trace on or off for this run
+        with tracing.verbosity(verbose):
+            if verbose:
+                print(f"\n=== RUNNING EXTEST MODE: {test_vector} ===")
+            
+            # Phase 1: Shift-in test vector into WBCs
+            self.shift_in(test_vector)
+            
+            # Phase 2: Capture - simulate left and right cores
+            self.capture(cycles=1)
+            
+            # Phase 3: Shift-out - generate signature
+            signature = self.shift_out()
+            
+            if verbose:
+                self.print_trace()
+                print(f"\nFinal Extest Signature: {signature}")
         
         return signature
 
-def exhaustive_extest_test(simulator, wbc_count):
+    def run_extest_batch(self, test_vectors, backend='int'):
+        """
+        Extest signatures for a block of vectors in a single bit-parallel pass.
+        Gives the same signature for each vector as run_extest().
+        """
+        width = len(test_vectors)
+        for vec in test_vectors:
+            if len(vec) != len(self.wbc_cells):
+                raise ValueError(f"Test vector length {len(vec)} doesn't match WBC count {len(self.wbc_cells)}")
+        engine = self.batch_engine(backend)
+        words = engine.vector_words(test_vectors, len(self.wbc_cells))
+        return engine.words_to_vectors(self.signature_words(engine, words, width), width)
+
+    def batch_engine(self, backend='int'):
+        if self.engine is None or self.engine.lanes.name != backend:
+            if self.left_evaluator.order is None:
+                self.left_evaluator.build_model()
+            self.engine = BitParallelEvaluator(self.left_evaluator, backend=backend)
+        return self.engine
+
+    def signature_words(self, engine, words, width):
+        """Signature word per WBC for the vector words of run_extest_batch()."""
+        zero = engine.lanes.zeros(width)
+
+        #both cores are the same netlist, so one engine serves left and right
+        input_idx = [i for i, wbc in enumerate(self.wbc_cells) if wbc.direction == 'input']
+        output_idx = [i for i, wbc in enumerate(self.wbc_cells) if wbc.direction == 'output']
+        se_map = {inst: 0 for inst in self.left_evaluator.sdff_cells}
+        si_map = {inst: 0 for inst in self.left_evaluator.sdff_cells}
+
+        sig_words = []
+        for side in (input_idx, output_idx):
+            core_q = {}
+            for i, idx in enumerate(side):
+                for flop_name, flop_bit in self.FLOP_TO_BIT.items():
+                    if flop_bit == i:
+                        core_q[flop_name] = words[idx]
+            final_q = engine.capture(core_q, width, cycles=1, se_map=se_map, si_map=si_map)
+            core_values = [zero] * 4
+            for flop_name, word in final_q.items():
+                if flop_name in self.FLOP_TO_BIT:
+                    core_values[self.FLOP_TO_BIT[flop_name]] = word
+            sig_words.extend(core_values[i] if i < 4 else words[idx] for i, idx in enumerate(side))
+        return sig_words
+
+    def run_range(self, base, width, length=None, backend='int'):
+        """Signatures of the WBC vectors base .. base+width-1, see run_extest_batch()."""
+        length = len(self.wbc_cells) if length is None else length
+        return self.run_extest_batch([format(i, f'0{length}b') for i in range(base, base + width)], backend)
+
+def exhaustive_extest_test(simulator, wbc_count, bit_parallel=True, width=DEFAULT_WIDTH, backend='int',
+                           csv_filename=None, workers=1, shard=None, stream=False,
+                           result_format='csv', index=False,
+                           checkpoint=None, resume=False):
     """
-    Run exhaustive test for all possible WBC input vectors
+    Run exhaustive test for all possible WBC input vectors, see sweep.exhaustive_sweep()
     """
-    print(f"\n=== Exhaustive Extest Test: {2**wbc_count} vectors ===")
-    results = {}
-    
-    # Create CSV file for results
-    csv_filename = f"extest_results_{wbc_count}bit.csv"
-    with open(csv_filename, 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(['Input Vector', 'Output Signature'])
-        
-        for i in range(2**wbc_count):
-            vec = format(i, f'0{wbc_count}b')
-            print(f"Testing vector {i+1}/{2**wbc_count}: {vec}")
-            
-            # Run simulation with minimal output
-            sig = simulator.run_extest(vec, verbose=False)
-            results[vec] = sig
-            
-            # Write to CSV
-            writer.writerow([vec, sig])
-            
-            # Print every 100th result to avoid overwhelming output
-            if (i + 1) % 100 == 0 or i < 10:
-                print(f"  {vec} -> {sig}")
-    
-    print(f"\nResults saved to: {csv_filename}")
-    print(f"Total vectors tested: {len(results)}")
-    
-    # Analyze results
-    unique_signatures = set(results.values())
-    print(f"Unique signatures: {len(unique_signatures)}")
-    print(f"Collision rate: {1 - len(unique_signatures)/len(results):.2%}")
-    
-    return results
+    return exhaustive_sweep(simulator, 'extest', wbc_count, bit_parallel, width, backend,
+                            csv_filename, workers, shard, stream, result_format, index,
+                            checkpoint, resume)
 
 if __name__ == "__main__":
+    import argparse
+    from sharding import parse_shard
+    parser = argparse.ArgumentParser(description="EXTEST sample vectors and exhaustive test")
+    parser.add_argument('--shard', type=parse_shard, metavar='k/N',
+                        help="run only shard k of N (0-based) into a partial file for 'wrapsim.py merge'")
+    args = parser.parse_args()
+
     # Initialize Extest Mode
     extest_analyzer = ExtestModeDFT("./simple_counter.v")
     extest_analyzer.run()
@@ -301,4 +346,4 @@ if __name__ == "__main__":
         print("="*40)
     
     # Don't run exhaustive test for now
-    exhaustive_extest_test(simulator, len(simulator.wbc_cells)) 
\ No newline at end of file
+    exhaustive_extest_test(simulator, len(simulator.wbc_cells), shard=args.shard) 
\ No newline at end of file
@@ -0,0 +1,195 @@
+# fault_collapse.py
+
+import csv
+from faultsim import Fault, fault_list, fault_readers
+from logic_evaluator import ASSIGN, GATE_BASE, GATE_FUNCTIONS, GATE_KINDS
+
+# kind → (good truth table, [(pin faulty table for SA0, SA1)], (output SA0, SA1) tables)
+_LOCAL_TABLES = {}
+
+
+def local_tables(kind):
+    """
+    Truth tables (bit x = output for input combination x, pin 0 the LSB) of
+    a gate kind fault-free and under every single stuck-at on its pins and
+    output. Equal faulty tables are equivalent faults; the faults detected
+    by a combination are those whose table differs from the good one there.
+    """
+    tables = _LOCAL_TABLES.get(kind)
+    if tables is None:
+        if kind == 'assign':
+            pins, func = ('a',), (lambda M, a: a)
+        else:
+            pins, func = GATE_FUNCTIONS[kind]
+        k = len(pins)
+
+        def table(forced_pin=None, forced=0):
+            out = 0
+            for x in range(1 << k):
+                bits = [(x >> i) & 1 for i in range(k)]
+                if forced_pin is not None:
+                    bits[forced_pin] = forced
+                out |= func(1, *bits) << x
+            return out
+        full = (1 << (1 << k)) - 1
+        tables = _LOCAL_TABLES[kind] = (
+            table(),
+            [(table(i, 0), table(i, 1)) for i in range(k)],
+            (0, full),
+        )
+    return tables
+
+
+class CollapsedFaults:
+    """
+    A fault list collapsed by structural equivalence and dominance, with
+    the mapping back to the full list:
+      • representative  full-list fault → its equivalence class representative
+      • simulated       representatives still to fault-simulate
+      • dominates       dropped representative → a simulated representative it
+                        dominates (every test of the latter detects it)
+    expand() turns the outcome of simulating `simulated` into detection of
+    the full list; a dropped fault whose dominated fault went undetected is
+    returned by residual() and must be simulated itself, so coverage stays
+    exact.
+    """
+
+    def __init__(self, faults, representative, simulated, dominates):
+        self.faults = faults
+        self.representative = representative
+        self.simulated = simulated
+        self.dominates = dominates
+
+    @property
+    def ratio(self) -> float:
+        """Simulated faults as a fraction of the full list."""
+        return len(self.simulated) / len(self.faults) if self.faults else 1.0
+
+    def residual(self, detected) -> list:
+        """Dropped representatives whose dominated fault is not in `detected`."""
+        return [f for f, g in self.dominates.items() if g not in detected]
+
+    def expand(self, detected) -> dict:
+        """
+        Full-list detection from representative detection (fault → first
+        detecting pattern). A fault implied by dominance gets the pattern of
+        its dominated fault, an upper bound on its own first detection.
+        """
+        rep_detected = dict(detected)
+        for f, g in self.dominates.items():
+            if f not in rep_detected and g in detected:
+                rep_detected[f] = detected[g]
+        out = {}
+        for fault in self.faults:
+            p = rep_detected.get(self.representative[fault])
+            if p is not None:
+                out[fault] = p
+        return out
+
+    def write(self, path, evaluator):
+        """CSV of the full list: each fault, its class representative, and the fault whose detection implies it."""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Fault', 'Representative', 'Dominates'])
+            for fault in self.faults:
+                rep = self.representative[fault]
+                dominated = self.dominates.get(rep)
+                writer.writerow([fault.name(evaluator), rep.name(evaluator),
+                                 dominated.name(evaluator) if dominated is not None else ''])
+
+
+def collapse_faults(evaluator, faults=None) -> CollapsedFaults:
+    """
+    Equivalence then dominance collapsing over every gate and assign of the
+    model, from the local_tables() of its kind. A gate's pin fault is the
+    branch fault when its input net has fanout, otherwise that net's stem
+    fault; faults are never merged across fanout stems or flops (the scan
+    view's inputs and outputs). Dominance drops an output fault only in
+    favour of a pin fault that stays simulated, and not inside combinational
+    loops, where a fault can change its own gate's inputs.
+    """
+    ev = evaluator
+    if ev.order is None:
+        ev.build_model()
+    faults = fault_list(ev) if faults is None else list(faults)
+    known = {f: f for f in faults}
+    readers = fault_readers(ev)
+    parent = {f: f for f in faults}
+
+    def find(f):
+        while parent[f] is not f:
+            parent[f] = parent[parent[f]]
+            f = parent[f]
+        return f
+
+    def union(a, b):
+        a, b = find(a), find(b)
+        if a is not b:
+            # the earlier fault in the list stays representative
+            if order[b] < order[a]:
+                a, b = b, a
+            parent[b] = a
+    order = {f: i for i, f in enumerate(faults)}
+
+    def pin_fault(idx, pin, dep, value):
+        if len(readers.get(dep, ())) > 1:
+            return known.get(Fault(dep, value, idx, pin))
+        return known.get(Fault(dep, value))
+
+    # local fault sites of every gate: (kind tables, [pin (SA0, SA1)], (out SA0, SA1))
+    sites = []
+    for idx in ev.order:
+        kind = ev.drive_kind[idx]
+        if kind == ASSIGN:
+            name = 'assign'
+        elif kind >= GATE_BASE:
+            name = GATE_KINDS[kind - GATE_BASE]
+        else:
+            continue
+        deps = ev.fanin_idx[ev.fanin_ptr[idx]:ev.fanin_ptr[idx + 1]]
+        pins = [(pin_fault(idx, pin, dep, 0), pin_fault(idx, pin, dep, 1)) if ev.net_names[dep] else (None, None)
+                for pin, dep in enumerate(deps)]
+        out = tuple(known.get(Fault(idx, v)) for v in (0, 1))
+        sites.append((idx, local_tables(name), pins, out))
+
+    # equivalence: equal faulty truth tables
+    for _, (good, pin_tables, out_tables), pins, out in sites:
+        by_table = {}
+        for faults_at, tables in list(zip(pins, pin_tables)) + [(out, out_tables)]:
+            for f, table in zip(faults_at, tables):
+                if f is not None:
+                    by_table.setdefault(table, []).append(f)
+        for members in by_table.values():
+            for f in members[1:]:
+                union(members[0], f)
+    representative = {f: find(f) for f in faults}
+
+    # dominance: an output fault detected by every test of a pin fault; a class
+    # some other fault was dropped in favour of stays, so chains never form
+    dropped = {}
+    targets = set()
+    loop_nets = {idx for group in ev.loop_groups for idx in group}
+    for idx, (good, pin_tables, out_tables), pins, out in sites:
+        if idx in loop_nets:
+            continue
+        for f, out_table in zip(out, out_tables):
+            if f is None:
+                continue
+            rep = representative[f]
+            if rep in dropped or rep in targets:
+                continue
+            tests = out_table ^ good
+            for faults_at, tables in zip(pins, pin_tables):
+                for g, table in zip(faults_at, tables):
+                    if g is None:
+                        continue
+                    g_rep = representative[g]
+                    g_tests = table ^ good
+                    if g_rep is not rep and g_rep not in dropped and g_tests and g_tests & ~tests == 0:
+                        dropped[rep] = g_rep
+                        targets.add(g_rep)
+                        break
+                if rep in dropped:
+                    break
+    simulated = [f for f in faults if representative[f] is f and f not in dropped]
+    return CollapsedFaults(faults, representative, simulated, dropped)
@@ -0,0 +1,378 @@
+# faultsim.py
+
+import heapq
+import time
+from bit_parallel import DEFAULT_WIDTH, blocks
+from logic_evaluator import ASSIGN, GATE_BASE, GATE_EXPRESSIONS, GATE_KIND_FUNCTIONS, GATE_KINDS
+import tracing
+
+TRACE_FAULT = tracing.get('fault')
+
+
+class Fault:
+    """
+    A single stuck-at fault. A stem fault (reader None) holds `net` at
+    `value` for every reader. A branch fault only affects one reader of a
+    net with fanout > 1: pin `pin` of the driver of net ID `reader`, or the
+    D pin of flop instance `reader` (a str, pin None).
+    """
+    __slots__ = ('net', 'value', 'reader', 'pin')
+
+    def __init__(self, net, value, reader=None, pin=None):
+        self.net = net
+        self.value = value
+        self.reader = reader
+        self.pin = pin
+
+    def key(self):
+        return (self.net, self.value, self.reader, self.pin)
+
+    def __eq__(self, other):
+        return isinstance(other, Fault) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def name(self, evaluator) -> str:
+        """e.g. 'n_5/SA0', 'g4.B/SA1' (branch into gate g4) or 'count_reg_1.D/SA0'."""
+        if self.reader is None:
+            site = evaluator.net_names[self.net]
+        elif isinstance(self.reader, str):
+            site = f"{self.reader}.D"
+        elif evaluator.drive_kind[self.reader] == ASSIGN:
+            site = f"{evaluator.net_names[self.reader]}<-{evaluator.net_names[self.net]}"
+        else:
+            drv = evaluator.signal_drivers[evaluator.net_names[self.reader]]
+            kind = GATE_KINDS[evaluator.drive_kind[self.reader] - GATE_BASE]
+            site = f"{drv}.{GATE_EXPRESSIONS[kind][0][self.pin].upper()}"
+        return f"{site}/SA{self.value}"
+
+
+def fault_readers(evaluator):
+    """Net ID → [(reader net ID, pin)] over gate/assign inputs, plus [(flop inst, None)] for D pins."""
+    ev = evaluator
+    readers = {}
+    for idx in ev.order:
+        for pin, dep in enumerate(ev.fanin_idx[ev.fanin_ptr[idx]:ev.fanin_ptr[idx + 1]]):
+            readers.setdefault(dep, []).append((idx, pin))
+    for inst, d in ev.d_ids.items():
+        readers.setdefault(d, []).append((inst, None))
+    return readers
+
+
+def fault_list(evaluator) -> list:
+    """
+    Uncollapsed stuck-at faults of the model: SA0/SA1 on every net stem
+    that is driven, read or a flop Q, and on every reader pin of nets with
+    fanout > 1 (with a single reader the branch is the stem).
+    """
+    ev = evaluator
+    if ev.order is None:
+        ev.build_model()
+    readers = fault_readers(ev)
+    q_nets = set(ev.q_ids.values())
+    faults = []
+    for idx, name in enumerate(ev.net_names):
+        if not name:
+            continue  # unconnected pins
+        branches = readers.get(idx, ())
+        if not (ev.drive_kind[idx] or branches or idx in q_nets):
+            continue
+        faults.append(Fault(idx, 0))
+        faults.append(Fault(idx, 1))
+        if len(branches) > 1:
+            for reader, pin in branches:
+                faults.append(Fault(idx, 0, reader, pin))
+                faults.append(Fault(idx, 1, reader, pin))
+    return faults
+
+
+def read_vectors(path) -> list:
+    """Chain vectors of a result file (CSV or packed), or of a text file with one vector per line ('#' comments)."""
+    from result_io import is_packed
+    from signature_index import open_rows
+    with open(path, 'rb') as f:
+        head = f.read(4096)
+    if is_packed(path) or b'Output Signature' in head:
+        rows = open_rows(path)
+        try:
+            return [vec for vec, _ in rows]
+        finally:
+            rows.close()
+    vectors = []
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                vectors.append(line)
+    return vectors
+
+
+def write_vectors(path, vectors, header=None):
+    """Text pattern file read_vectors() reads back: one vector (or 'X' cube) per line, '#' header."""
+    with open(path, 'w') as f:
+        if header:
+            for line in header.splitlines():
+                f.write(f"# {line}\n")
+        for vec in vectors:
+            f.write(vec + "\n")
+
+
+class FaultSimResult:
+    """Outcome of FaultSimulator.run(): first detecting pattern of every fault, and the per-pattern curve."""
+
+    def __init__(self, faults, detected, unobservable, patterns, elapsed, simulated=None):
+        self.faults = faults
+        self.detected = detected           # fault -> index of its first detecting pattern
+        self.unobservable = unobservable   # faults with no structural path to a captured D
+        self.patterns = patterns
+        self.elapsed = elapsed
+        self.simulated = len(faults) if simulated is None else simulated   # faults actually simulated
+
+    @property
+    def coverage(self) -> float:
+        return len(self.detected) / len(self.faults) if self.faults else 1.0
+
+    def undetected(self) -> list:
+        return [f for f in self.faults if f not in self.detected]
+
+    def curve(self) -> list:
+        """Cumulative detected faults after each pattern."""
+        new = [0] * self.patterns
+        for p in self.detected.values():
+            new[p] += 1
+        total = 0
+        for p in range(self.patterns):
+            total += new[p]
+            new[p] = total
+        return new
+
+    def report(self, evaluator=None, per_pattern=False, undetected=0):
+        total = len(self.faults)
+        print(f"Patterns: {self.patterns}")
+        print(f"Faults: {total}, detected {len(self.detected)}, undetected {total - len(self.detected)} "
+              f"({len(self.unobservable)} structurally unobservable)")
+        if self.simulated != total:
+            print(f"Simulated {self.simulated} faults after collapsing ({self.simulated / total:.1%} of the list)")
+        print(f"Fault coverage: {self.coverage:.2%} in {self.elapsed:.2f}s")
+        if per_pattern and total:
+            print("Coverage per pattern (patterns detecting new faults):")
+            last = 0
+            for p, count in enumerate(self.curve()):
+                if count != last:
+                    print(f"  pattern {p}: +{count - last} -> {count / total:.2%}")
+                    last = count
+        if undetected and evaluator is not None:
+            missed = self.undetected()
+            print(f"Undetected faults ({len(missed)}):")
+            for f in missed[:undetected]:
+                print(f"  {f.name(evaluator)}")
+            if len(missed) > undetected:
+                print(f"  ... {len(missed) - undetected} more")
+
+
+class FaultSimulator:
+    """
+    Parallel-pattern single-fault propagation (PPSFP) over the scan view of
+    a ScanChainSimulator: chain flop Qs are the inputs, the D nets captured
+    back into the chain are the observation points, every other undriven
+    net is 0 (as in capture). Each block of patterns is simulated fault-free
+    once through the compiled bit-parallel evaluator; then every remaining
+    fault is injected into an overlay and only the nets whose word changes
+    are re-evaluated, in level order, so the work per fault is bounded by
+    its fanout cone. A fault is dropped at its first detecting pattern.
+    """
+
+    def __init__(self, simulator, faults=None, collapse=False):
+        self.simulator = simulator
+        self.evaluator = ev = simulator.evaluator
+        if ev.order is None:
+            ev.build_model()
+        self.engine = simulator.batch_engine('int')
+        self.faults = fault_list(ev) if faults is None else list(faults)
+        # captured flops: chain flops whose D is loaded back into the chain
+        chain = {cell.name for cell in simulator.cells if cell.cell_type.lower() != 'wbc'}
+        self.observed = {inst: ev.d_ids[inst] for inst in chain
+                         if inst in ev.d_ids and (inst in ev.sdff_cells or inst in ev.dff_cells)}
+        self.functions = {}
+        for idx in ev.order:
+            kind = ev.drive_kind[idx]
+            if kind >= GATE_BASE:
+                self.functions[idx] = GATE_KIND_FUNCTIONS[kind - GATE_BASE]
+        self.fanin = {idx: tuple(ev.fanin_idx[ev.fanin_ptr[idx]:ev.fanin_ptr[idx + 1]]) for idx in ev.order}
+        self.observable = self.observable_nets()
+        self.collapsed = None
+        if collapse:
+            from fault_collapse import collapse_faults
+            self.collapsed = collapse_faults(ev, self.faults)
+
+    def observable_nets(self) -> set:
+        """Nets with a structural path to an observed D net."""
+        seen = set(self.observed.values())
+        stack = list(seen)
+        while stack:
+            idx = stack.pop()
+            for dep in self.fanin.get(idx, ()):
+                if dep not in seen:
+                    seen.add(dep)
+                    stack.append(dep)
+        return seen
+
+    def is_observable(self, fault) -> bool:
+        if isinstance(fault.reader, str):
+            return fault.reader in self.observed
+        if fault.reader is not None:
+            return fault.reader in self.observable
+        return fault.net in self.observable
+
+    def good_values(self, vectors):
+        """Fault-free word of every net for a block of chain vectors."""
+        engine = self.engine
+        words = engine.vector_words(vectors, len(self.simulator.cells))
+        values = [0] * len(self.evaluator.net_names)
+        for inst, word in self.simulator.flop_words(words).items():
+            if inst in self.evaluator.q_ids:
+                values[self.evaluator.q_ids[inst]] = word
+        engine.propagate(values, len(vectors))
+        return values
+
+    def detect(self, fault, good, ones) -> int:
+        """Word of the patterns (of this block) that detect `fault`."""
+        ev = self.evaluator
+        stuck = ones if fault.value else 0
+        reader = fault.reader
+        if isinstance(reader, str):
+            # D pin of a flop: only that flop captures the stuck value
+            return (good[fault.net] ^ stuck) if reader in self.observed else 0
+        if (good[fault.net] ^ stuck) == 0:
+            return 0   # not activated by any pattern of the block
+        functions, fanin = self.functions, self.fanin
+        fanout_ptr, fanout_idx, unit_pos, order = ev.fanout_ptr, ev.fanout_idx, ev.unit_pos, ev.order
+        faulty = {}
+        forced = fault.net if reader is None else None
+
+        def evaluate(idx, current):
+            pins = [current(dep) for dep in fanin[idx]]
+            if idx == reader:
+                pins[fault.pin] = stuck
+            func = functions.get(idx)
+            return func(ones, *pins) if func is not None else pins[0]
+
+        def current(dep):
+            value = faulty.get(dep)
+            return good[dep] if value is None else value
+
+        heap = []
+        queued = set()
+
+        def schedule(idx, skip=-1):
+            for r in fanout_idx[fanout_ptr[idx]:fanout_ptr[idx + 1]]:
+                p = unit_pos[r]
+                if p != skip and p not in queued:
+                    queued.add(p)
+                    heapq.heappush(heap, p)
+
+        if reader is None:
+            faulty[fault.net] = stuck
+            schedule(fault.net)
+        else:
+            queued.add(unit_pos[reader])
+            heap.append(unit_pos[reader])
+        loop_at = ev.loop_at
+        while heap:
+            p = heapq.heappop(heap)
+            group = loop_at.get(p)
+            if group is None:
+                idx = order[p]
+                if idx == forced:
+                    continue
+                value = evaluate(idx, current)
+                if value != current(idx):
+                    faulty[idx] = value
+                    schedule(idx)
+                continue
+            # combinational loop: the same bounded unit-delay settle as the compiled
+            # evaluator, from all-zero loop nets, with the fault in place
+            state = {idx: (stuck if idx == forced else 0) for idx in group}
+
+            def in_loop(dep):
+                value = state.get(dep)
+                return current(dep) if value is None else value
+            for _ in range(max(ev.max_iterations, 2 * len(group))):
+                nxt = {idx: (stuck if idx == forced else evaluate(idx, in_loop)) for idx in group}
+                if nxt == state:
+                    break
+                state = nxt
+            for idx in group:
+                if state[idx] != current(idx):
+                    faulty[idx] = state[idx]
+                    schedule(idx, skip=p)
+        diff = 0
+        for d in self.observed.values():
+            value = faulty.get(d)
+            if value is not None:
+                diff |= value ^ good[d]
+        return diff
+
+    def simulate(self, faults, vectors, width) -> dict:
+        """First detecting pattern of every observable fault of `faults` detected by `vectors`."""
+        active = [f for f in faults if self.is_observable(f)]
+        detected = {}
+        for base, block_width in blocks(len(vectors), width):
+            if not active:
+                break
+            good = self.good_values(vectors[base:base + block_width])
+            ones = (1 << block_width) - 1
+            remaining = []
+            for fault in active:
+                diff = self.detect(fault, good, ones)
+                if diff:
+                    # lowest set bit = first pattern of the block detecting it
+                    detected[fault] = base + (diff & -diff).bit_length() - 1
+                else:
+                    remaining.append(fault)
+            active = remaining
+            if TRACE_FAULT.info:
+                TRACE_FAULT(f"  {base + block_width} patterns, {len(detected)} detected, {len(active)} remaining")
+        return detected
+
+    def detections(self, faults, vectors, width=DEFAULT_WIDTH) -> dict:
+        """
+        Every detecting pattern of every observable fault of `faults`, as a
+        mask with bit p set when vectors[p] detects it (no fault dropping).
+        """
+        active = [f for f in faults if self.is_observable(f)]
+        masks = {}
+        for base, block_width in blocks(len(vectors), width):
+            good = self.good_values(vectors[base:base + block_width])
+            ones = (1 << block_width) - 1
+            for fault in active:
+                diff = self.detect(fault, good, ones)
+                if diff:
+                    masks[fault] = masks.get(fault, 0) | (diff << base)
+            if TRACE_FAULT.info:
+                TRACE_FAULT(f"  {base + block_width} patterns, {len(masks)} faults detected")
+        return masks
+
+    def run(self, vectors, width=DEFAULT_WIDTH) -> FaultSimResult:
+        """
+        Fault-simulate `vectors` (chain vectors as for run()) in blocks of
+        `width`, dropping detected faults. With collapse=True only the
+        collapsed list is simulated, then the dominance residual, and the
+        outcome is expanded back to the full list.
+        """
+        started = time.monotonic()
+        vectors = list(vectors)
+        unobservable = [f for f in self.faults if not self.is_observable(f)]
+        if self.collapsed is None:
+            detected = self.simulate(self.faults, vectors, width)
+            simulated = len(self.faults)
+        else:
+            collapsed = self.collapsed
+            detected = self.simulate(collapsed.simulated, vectors, width)
+            residual = collapsed.residual(detected)
+            detected.update(self.simulate(residual, vectors, width))
+            detected = collapsed.expand(detected)
+            simulated = len(collapsed.simulated) + len(residual)
+        return FaultSimResult(self.faults, detected, unobservable, len(vectors), time.monotonic() - started,
+                              simulated)
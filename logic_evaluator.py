@@ -1,11 +1,192 @@
 # logic_evaluator.py
 
-from pyverilog.vparser.ast import InstanceList, Assign, Identifier, Pointer, IntConst
-from collections import defaultdict
+from design_db import DesignDatabase
+from collections import defaultdict, OrderedDict
+from collections.abc import MutableMapping
+from array import array
+import heapq
+import tracing
+
+TRACE_MODEL = tracing.get('model')
+TRACE_PROPAGATE = tracing.get('propagate')
+TRACE_FLOPS = tracing.get('flops')
+TRACE_CAPTURE = tracing.get('capture')
+
+# Logic of every supported cell as an expression over its input pins.
+# M is the all-ones value: 1 for scalar evaluation, or a word/lane mask when
+# many patterns are packed into one value (see bit_parallel.py), so the same
+# expressions serve both engines.
+GATE_EXPRESSIONS = {
+    'inv':     (('a',), 'M ^ a'),
+    'nand':    (('a', 'b'), 'M ^ (a & b)'),
+    'and':     (('a', 'b'), 'a & b'),
+    'nor':     (('a', 'b'), 'M ^ (a | b)'),
+    'or':      (('a', 'b'), 'a | b'),
+    'xnor':    (('a', 'b'), 'M ^ a ^ b'),
+    'xor':     (('a', 'b'), 'a ^ b'),
+    # OAI2BB2:  Y = ~((~(A0N & A1N)) & (B0 | B1))
+    'oai2bb2': (('a0n', 'a1n', 'b0', 'b1'), 'M ^ ((M ^ (a0n & a1n)) & (b0 | b1))'),
+    # AOI2BB1:  Y = ~((~(A0N | A1N)) | B0)
+    'aoi2bb1': (('a0n', 'a1n', 'b0'), 'M ^ ((M ^ (a0n | a1n)) | b0)'),
+    # AOI21: Y = ~ (B0 | (A0 & A1))
+    'aoi21':   (('a0', 'a1', 'b0'), 'M ^ (b0 | (a0 & a1))'),
+}
+
+# kind → (input pins, callable(M, *pin_values))
+GATE_FUNCTIONS = {
+    kind: (pins, eval(f"lambda M, {', '.join(pins)}: {expr}"))
+    for kind, (pins, expr) in GATE_EXPRESSIONS.items()
+}
+
+
+# drive_kind codes per net ID (see LogicEvaluator.intern_nets)
+UNDRIVEN    = 0
+ASSIGN      = 1
+UNSUPPORTED = 2
+GATE_BASE   = 3
+GATE_KINDS  = list(GATE_EXPRESSIONS)
+GATE_KIND_FUNCTIONS = [GATE_FUNCTIONS[kind][1] for kind in GATE_KINDS]
+
+# next-state tables: a flat table up to this many flops, an LRU of words above it
+NEXT_STATE_TABLE_BITS = 16
+NEXT_STATE_LRU_SIZE = 1 << 16
+
+
+def gate_kind(gtype):
+    """
+    Map a library cell type (e.g. 'oai2bb2xl') to its GATE_EXPRESSIONS key.
+    The substring tests run in a fixed order and the first match wins,
+    so every engine classifies a cell the same way.
+    """
+    for kind in ('inv', 'nand', 'and', 'nor', 'or', 'xnor', 'xor', 'oai2bb2', 'aoi2bb1', 'aoi21'):
+        if kind in gtype:
+            return kind
+    raise NotImplementedError(f"Gate type '{gtype}' not supported")
+
+
+class SignalView(MutableMapping):
+    """
+    Name-keyed view of the evaluator's bytearray of net values: callers keep
+    using net names while evaluation works on integer IDs. Names outside the
+    model are kept in a side dict. Writes through the view are not seen by
+    event mode; use LogicEvaluator.set_primary_inputs for that.
+    """
+
+    def __init__(self, net_ids, values):
+        self.net_ids = net_ids
+        self.values = values
+        self.extra = {}
+
+    def __getitem__(self, net):
+        idx = self.net_ids.get(net)
+        if idx is None:
+            return self.extra[net]
+        return self.values[idx]
+
+    def __setitem__(self, net, val):
+        idx = self.net_ids.get(net)
+        if idx is None:
+            self.extra[net] = val
+        else:
+            self.values[idx] = val
+
+    def __delitem__(self, net):
+        idx = self.net_ids.get(net)
+        if idx is None:
+            del self.extra[net]
+        else:
+            self.values[idx] = 0
+
+    def __iter__(self):
+        yield from self.net_ids
+        yield from self.extra
+
+    def __len__(self):
+        return len(self.net_ids) + len(self.extra)
+
+    def clear(self):
+        self.values[:] = bytes(len(self.values))
+        self.extra.clear()
+
+
+class NextStateTable:
+    """
+    Memoized next-state function of a functional capture (SE=0, no reset)
+    for a fixed tuple of flops: flop-state word -> next word, bit i being
+    flops[i]. Each word is computed once, by one ordinary capture cycle, the
+    first time it is needed. Up to `table_bits` flops the memo is a flat
+    array indexed by the word; above that an LRU of `lru_size` words
+    (NEXT_STATE_TABLE_BITS / NEXT_STATE_LRU_SIZE when not given).
+    """
+
+    def __init__(self, evaluator, flops, table_bits=None, lru_size=None):
+        if table_bits is None:
+            table_bits = NEXT_STATE_TABLE_BITS
+        if lru_size is None:
+            lru_size = NEXT_STATE_LRU_SIZE
+        self.evaluator = evaluator
+        self.flops = flops
+        self.lru_size = lru_size
+        if len(flops) <= table_bits:
+            self.table = array('q', [-1]) * (1 << len(flops))
+            self.lru = None
+        else:
+            self.table = None
+            self.lru = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def word(self, q: dict) -> int:
+        word = 0
+        for i, inst in enumerate(self.flops):
+            if q[inst]:
+                word |= 1 << i
+        return word
+
+    def state(self, word) -> dict:
+        return {inst: (word >> i) & 1 for i, inst in enumerate(self.flops)}
+
+    def compute(self, word) -> int:
+        self.misses += 1
+        return self.word(self.evaluator.capture_cycle(self.state(word)))
+
+    def next(self, word) -> int:
+        table = self.table
+        if table is not None:
+            nxt = table[word]
+            if nxt < 0:
+                nxt = table[word] = self.compute(word)
+            else:
+                self.hits += 1
+            return nxt
+        lru = self.lru
+        nxt = lru.get(word)
+        if nxt is None:
+            nxt = lru[word] = self.compute(word)
+            if len(lru) > self.lru_size:
+                lru.popitem(last=False)
+        else:
+            self.hits += 1
+            lru.move_to_end(word)
+        return nxt
+
 
 class LogicEvaluator:
-    def __init__(self, ast):
+    # propagate() modes: 'compiled' (the default) runs generated straight-line code
+    # (see netlist_compiler.py), 'levelized' evaluates each driver once in level order,
+    # 'event' re-evaluates only drivers whose inputs changed since the last propagate,
+    # 'iterative' is the original sweep-until-stable unit-delay simulation
+    PROPAGATE_MODES = ('compiled', 'levelized', 'event', 'iterative')
+
+    def __init__(self, ast, propagate_mode='compiled', design=None, next_state=False):
+        if propagate_mode not in self.PROPAGATE_MODES:
+            raise ValueError(f"Unknown propagate mode '{propagate_mode}'")
         self.ast = ast
+        # DesignDatabase to read the model from; built from `ast` when not given
+        self.design = design
+        self.propagate_mode = propagate_mode
+        # upper bound on sweeps: whole network in iterative mode, per loop in levelized mode
+        self.max_iterations = 10
         # flop-instance → D-net   (e.g. '\count_reg[3]' → 'n_6')
         self.d_inputs    = {}
         # flop-instance → Q-net   (e.g. '\count_reg[3]' → 'out[3]')
@@ -18,119 +199,285 @@ class LogicEvaluator:
         self.gate_ports  = {}
         # net-name → driver (either a gate-instance or another net via assign)
         self.signal_drivers = {}
-        # net-name → logic value (0/1) during propagate
+        # net-name → logic value (0/1) during propagate; a SignalView over
+        # self.values once build_model() has assigned net IDs
         self.signal_values  = {}
-
-    def _extract_name(self, node):
-        if isinstance(node, Identifier):
-            return node.name
-        if isinstance(node, Pointer):
-            # produce exactly "busname[index]" to match Verilog nets
-            return f"{node.var.name}[{node.ptr.value}]"
-        if isinstance(node, IntConst):
-            return node.value
-        # Handle Lvalue and Rvalue objects
-        if hasattr(node, 'name'):
-            return node.name
-        if hasattr(node, 'var') and hasattr(node, 'ptr'):
-            return f"{node.var.name}[{node.ptr.value}]"
-        # Try to access the underlying node
-        if hasattr(node, 'node'):
-            return self._extract_name(node.node)
-        # Try to get the first child if it's a container
-        if hasattr(node, 'children') and callable(node.children):
-            children = list(node.children())
-            if children:
-                return self._extract_name(children[0])
-        # fallback
-        return str(node)
+        # driven net IDs in evaluation order, set by levelize()
+        self.order = None
+        # event mode: pending (level, order position) heap and the positions in it
+        self.event_queue  = []
+        self.event_queued = set()
+        # event mode: False until one full propagate has settled signal_values
+        self.settled = False
+        # Q net IDs driven by the previous capture cycle (event mode)
+        self.event_primaries = set()
+        # number of driver evaluations, to compare the cost of the modes
+        self.evaluations = 0
+        # generated evaluate(v, M=1, same=eq) for 'compiled' mode and its netlist hash
+        self.compiled = None
+        self.netlist_hash = None
+        # next_state: functional captures go through a NextStateTable per flop tuple
+        self.next_state = next_state
+        self.next_state_tables = {}
 
     def build_model(self):
         """
-        Walk the AST and fill:
+        Fill the model from the design database (built from self.ast if none was given):
           • self.d_inputs, self.q_outputs for every sdff/dff cell
           • self.gate_types, self.gate_ports for every other cell
           • self.signal_drivers to point each net at its gate-driver or assign source
-        Also, track SE and SI for SDFFs.
+        Also, track SE and SI for SDFFs. The dicts are shared with the database, not copied.
         """
-        self.sdff_cells = set()
-        self.dff_cells = set()
-        self.se_inputs = {}  # SDFF instance -> SE net
-        self.si_inputs = {}  # SDFF instance -> SI net
-        def visit(node):
-            if isinstance(node, InstanceList):
-                mtype = node.module.lower()
-                for inst in node.instances:
-                    inst_name = inst.name
-                    # Diagnostic print
-                    print(f"Instance: {inst_name}, inst: {inst}, portlist: {getattr(inst, 'portlist', None)}")
-                    ports = {}
-                    # Try named ports first
-                    if hasattr(inst, 'portlist') and inst.portlist:
-                        for idx, p in enumerate(inst.portlist):
-                            # If portname is missing, fallback to positional mapping
-                            pname = getattr(p, 'portname', None)
-                            # Extract the net/signal name from .expr or .argname
-                            if hasattr(p, 'expr'):
-                                netname = self._extract_name(p.expr)
-                            elif hasattr(p, 'argname'):
-                                netname = self._extract_name(p.argname)
-                            else:
-                                netname = None
-                            if pname is not None:
-                                ports[pname.lower()] = netname
-                            else:
-                                # Positional mapping for SDFFRX1 and DFFRX1
-                                if 'sdff' in mtype:
-                                    pos_names = ['d', 'se', 'si', 'ck', 'rn', 'q', 'qn']
-                                elif 'dff' in mtype:
-                                    pos_names = ['d', 'ck', 'rn', 'q', 'qn']
-                                else:
-                                    pos_names = []
-                                if idx < len(pos_names):
-                                    ports[pos_names[idx]] = netname
-                    if 'sdff' in mtype:
-                        print(f"SDFF Instance: {inst_name}, Ports: {ports}")
-                        self.sdff_cells.add(inst_name)
-                        self.d_inputs  [inst_name] = ports.get('d')
-                        self.q_outputs [inst_name] = ports.get('q')
-                        self.se_inputs [inst_name] = ports.get('se')
-                        self.si_inputs [inst_name] = ports.get('si')
-                    elif 'dff' in mtype:
-                        print(f"DFF Instance: {inst_name}, Ports: {ports}")
-                        self.dff_cells.add(inst_name)
-                        self.d_inputs  [inst_name] = ports.get('d')
-                        self.q_outputs [inst_name] = ports.get('q')
-                    else:
-                        # a combinational/library cell
-                        self.gate_types [inst_name] = mtype
-                        self.gate_ports [inst_name] = ports
-                        # Debug: Print port mappings for gates
-                        print(f"Gate {inst_name} ({mtype}) ports: {ports}")
-                        # classify ports: y,z,zn are outputs, rest are inputs
-                        for pname, net in ports.items():
-                            if pname in ('y','z','zn'):
-                                self.signal_drivers[net] = inst_name
-                            else:
-                                self.gate_inputs[inst_name].append(net)
-            elif isinstance(node, Assign):
-                # Handle assign statements properly
-                lhs = self._extract_name(node.left)
-                rhs = self._extract_name(node.right)
-                print(f"  Assign: {lhs} = {rhs}")
-                if lhs and rhs and lhs != 'None' and rhs != 'None':
-                    self.signal_drivers[lhs] = rhs
-                    print(f"    Added signal driver: {lhs} driven by {rhs}")
-                else:
-                    print(f"    Skipping invalid assign: {lhs} = {rhs}")
-            # recurse
-            for c in node.children():
-                visit(c)
-        visit(self.ast)
+        if self.design is None:
+            self.design = DesignDatabase.from_ast(self.ast)
+        design = self.design
+        self.sdff_cells = design.sdff_cells
+        self.dff_cells = design.dff_cells
+        self.se_inputs = design.se_inputs  # SDFF instance -> SE net
+        self.si_inputs = design.si_inputs  # SDFF instance -> SI net
+        self.d_inputs = design.d_inputs
+        self.q_outputs = design.q_outputs
+        self.gate_types = design.gate_types
+        self.gate_ports = design.gate_ports
+        self.gate_inputs = design.gate_inputs
+        self.signal_drivers = design.signal_drivers
         # Print Q output mapping for debugging
-        print("[build_model] Q output mapping (flop instance -> Q net):")
-        for inst, qnet in self.q_outputs.items():
-            print(f"  {inst} -> {qnet}")
+        if TRACE_MODEL.debug:
+            TRACE_MODEL("[build_model] Q output mapping (flop instance -> Q net):")
+            for inst, qnet in self.q_outputs.items():
+                TRACE_MODEL(f"  {inst} -> {qnet}")
+        if design.model_state is not None:
+            # levelized model came with the design (see design_cache.py)
+            self.restore_model(design.model_state)
+        else:
+            self.levelize()
+
+    def intern_nets(self):
+        """
+        Give every net a dense integer ID and lay the model out in flat arrays:
+          • self.net_names / self.net_ids   ID ↔ net-name (the string view)
+          • self.values                     bytearray of net values, indexed by ID
+          • self.drive_kind                 per ID: UNDRIVEN, ASSIGN, or GATE_BASE + index
+                                            into GATE_KINDS (UNSUPPORTED for unknown cells)
+          • self.fanin_ptr / fanin_idx      CSR fan-in; a gate's pins are in GATE_EXPRESSIONS
+                                            order, an assign has its source as only fan-in
+          • self.fanout_ptr / fanout_idx    CSR fan-out: driven nets reading each net
+        signal_values becomes a name-keyed SignalView over self.values.
+        """
+        names = []
+        ids = {}
+
+        def intern(name):
+            idx = ids.get(name)
+            if idx is None:
+                idx = ids[name] = len(names)
+                names.append(name)
+            return idx
+
+        fanins = {}
+        kinds = {}
+        for net, drv in self.signal_drivers.items():
+            idx = intern(net)
+            if drv in self.gate_types:
+                ports = self.gate_ports[drv]
+                try:
+                    kind = gate_kind(self.gate_types[drv])
+                except NotImplementedError:
+                    # reported by evaluate_gate if the net is ever evaluated
+                    kinds[idx] = UNSUPPORTED
+                    fanins[idx] = [intern(n) for n in self.gate_inputs[drv]]
+                    continue
+                kinds[idx] = GATE_BASE + GATE_KINDS.index(kind)
+                fanins[idx] = [intern(ports.get(pn, '')) for pn in GATE_EXPRESSIONS[kind][0]]
+            else:
+                kinds[idx] = ASSIGN
+                fanins[idx] = [intern(drv)]
+        for net in list(self.q_outputs.values()) + list(self.d_inputs.values()):
+            if net is not None:
+                intern(net)
+
+        n = len(names)
+        self.net_names = names
+        self.net_ids = ids
+        self.drive_kind = bytearray(n)
+        self.fanin_ptr = array('i', [0]) * (n + 1)
+        fanin_idx = array('i')
+        fanout_count = array('i', [0]) * (n + 1)
+        for idx in range(n):
+            deps = fanins.get(idx, ())
+            self.drive_kind[idx] = kinds.get(idx, UNDRIVEN)
+            fanin_idx.extend(deps)
+            self.fanin_ptr[idx + 1] = len(fanin_idx)
+            for dep in deps:
+                fanout_count[dep + 1] += 1
+        self.fanin_idx = fanin_idx
+        # prefix sums give each net's slice of fanout_idx
+        for idx in range(n):
+            fanout_count[idx + 1] += fanout_count[idx]
+        self.fanout_ptr = array('i', fanout_count)
+        fill = array('i', fanout_count)
+        self.fanout_idx = array('i', [0]) * len(fanin_idx)
+        for idx in range(n):
+            for dep in fanin_idx[self.fanin_ptr[idx]:self.fanin_ptr[idx + 1]]:
+                self.fanout_idx[fill[dep]] = idx
+                fill[dep] += 1
+
+        self.attach_values()
+
+    def attach_values(self):
+        """Flop Q/D net IDs, a fresh bytearray of values, and the name-keyed view over it."""
+        ids = self.net_ids
+        self.q_ids = {inst: ids[net] for inst, net in self.q_outputs.items() if net is not None}
+        self.d_ids = {inst: ids[net] for inst, net in self.d_inputs.items() if net is not None}
+        previous = dict(self.signal_values)
+        self.values = bytearray(len(self.net_names))
+        self.signal_values = SignalView(ids, self.values)
+        self.signal_values.update(previous)
+
+    def driver_inputs(self, net):
+        """Nets read by the driver of `net` (gate input pins, or the source of an assign)."""
+        idx = self.net_ids[net]
+        return [self.net_names[dep] for dep in self.fanin_idx[self.fanin_ptr[idx]:self.fanin_ptr[idx + 1]]]
+
+    def levelize(self):
+        """
+        Rank every driven net topologically, once per model:
+          • self.levels      array of levels by net ID (undriven nets such as flop Qs are 0)
+          • self.order       driven net IDs in evaluation order
+          • self.loop_groups tuples of net IDs, one per combinational loop; each loop
+                             is contiguous in self.order
+          • self.unit_pos    per ID, position in self.order of the unit to re-evaluate
+                             (the net itself, or the first net of its loop)
+        Uses an iterative Tarjan SCC pass, so deep netlists don't hit the recursion limit.
+        Tarjan emits a component only after everything it reads from, which is exactly
+        the order in which the components must be evaluated.
+        """
+        self.intern_nets()
+        n = len(self.net_names)
+        drive_kind = self.drive_kind
+        fanin_ptr = self.fanin_ptr
+        fanin_idx = self.fanin_idx
+        index = array('i', [-1]) * n
+        lowlink = array('i', [0]) * n
+        on_stack = bytearray(n)
+        stack = []
+        components = []
+        counter = 0
+        for root in range(n):
+            if not drive_kind[root] or index[root] >= 0:
+                continue
+            work = [(root, fanin_ptr[root])]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            while work:
+                net, pos = work[-1]
+                end = fanin_ptr[net + 1]
+                pushed = False
+                while pos < end:
+                    dep = fanin_idx[pos]
+                    pos += 1
+                    if not drive_kind[dep]:
+                        continue
+                    if index[dep] < 0:
+                        work[-1] = (net, pos)
+                        index[dep] = lowlink[dep] = counter
+                        counter += 1
+                        stack.append(dep)
+                        on_stack[dep] = 1
+                        work.append((dep, fanin_ptr[dep]))
+                        pushed = True
+                        break
+                    if on_stack[dep]:
+                        lowlink[net] = min(lowlink[net], index[dep])
+                if pushed:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[net])
+                if lowlink[net] == index[net]:
+                    group = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        group.append(member)
+                        if member == net:
+                            break
+                    components.append(tuple(group))
+
+        levels = array('i', [0]) * n
+        loops = []
+        for group in components:
+            members = set(group)
+            level = 0
+            for net in group:
+                for dep in fanin_idx[fanin_ptr[net]:fanin_ptr[net + 1]]:
+                    if dep not in members:
+                        level = max(level, levels[dep])
+            for net in group:
+                levels[net] = level + 1
+            if len(group) > 1 or group[0] in fanin_idx[fanin_ptr[group[0]]:fanin_ptr[group[0] + 1]]:
+                loops.append(group)
+        # stable sort keeps Tarjan's dependency order inside each level
+        components.sort(key=lambda g: levels[g[0]])
+        self.levels = levels
+        self.depth = max(levels, default=0)
+        self.order = array('i')
+        self.unit_pos = array('i', [-1]) * n
+        for group in components:
+            start = len(self.order)
+            self.order.extend(group)
+            for net in group:
+                self.unit_pos[net] = start
+        self.loop_groups = loops
+        self.reset_propagation()
+        if TRACE_MODEL.info:
+            TRACE_MODEL(f"[levelize] {len(self.order)} driven nets, depth {self.depth}, "
+                        f"{len(self.loop_groups)} combinational loop(s)")
+
+    def reset_propagation(self):
+        """Derived lookups and per-run state that depend on the levelization."""
+        # loop by the order position of its first net
+        self.loop_at = {self.unit_pos[group[0]]: group for group in self.loop_groups}
+        self.settled = False
+        self.event_queue = []
+        self.event_queued = set()
+        self.compiled = None
+
+    # arrays making up the levelized model, see intern_nets() and levelize()
+    MODEL_ARRAYS = ('fanin_ptr', 'fanin_idx', 'fanout_ptr', 'fanout_idx', 'levels', 'order', 'unit_pos')
+
+    def model_state(self) -> dict:
+        """Levelized model as plain bytes/lists, for the on-disk design cache."""
+        state = {name: getattr(self, name).tobytes() for name in self.MODEL_ARRAYS}
+        state['net_names'] = self.net_names
+        state['drive_kind'] = bytes(self.drive_kind)
+        state['loop_groups'] = self.loop_groups
+        return state
+
+    def restore_model(self, state: dict):
+        """
+        Inverse of model_state(): skip interning and levelization entirely.
+        Arrays given as memoryviews (parallel_driver's shared memory) are used
+        in place instead of copied; the model is never written after levelize().
+        """
+        for name in self.MODEL_ARRAYS:
+            if isinstance(state[name], memoryview):
+                setattr(self, name, state[name])
+                continue
+            arr = array('i')
+            arr.frombytes(state[name])
+            setattr(self, name, arr)
+        self.net_names = list(state['net_names'])
+        self.net_ids = {name: idx for idx, name in enumerate(self.net_names)}
+        drive_kind = state['drive_kind']
+        self.drive_kind = drive_kind if isinstance(drive_kind, memoryview) else bytearray(drive_kind)
+        self.loop_groups = [tuple(group) for group in state['loop_groups']]
+        self.depth = max(self.levels, default=0)
+        self.attach_values()
+        self.reset_propagation()
 
     def debug_model(self):
         print("=== Flop .D nets ===")
@@ -146,98 +493,202 @@ class LogicEvaluator:
 
     def set_primary_inputs(self, values: dict):
         """Inject primary net-values before propagation."""
-        self.signal_values.update(values)
+        if self.order is None:
+            self.signal_values.update(values)
+            return
+        for net, val in values.items():
+            idx = self.net_ids.get(net)
+            if idx is None:
+                self.signal_values[net] = val
+            else:
+                self.set_value(idx, val)
+
+    def set_value(self, idx, val):
+        """Drive net ID `idx`; in event mode a change queues its fan-out."""
+        if self.values[idx] != val:
+            self.values[idx] = val
+            if self.propagate_mode == 'event' and self.settled:
+                self.schedule_fanout(idx)
+
+    def schedule_fanout(self, idx, skip=None):
+        """Queue every driver reading net ID `idx` (except the unit at `skip`) for event mode."""
+        for pos in range(self.fanout_ptr[idx], self.fanout_ptr[idx + 1]):
+            reader = self.fanout_idx[pos]
+            unit = self.unit_pos[reader]
+            if unit != skip and unit not in self.event_queued:
+                self.event_queued.add(unit)
+                heapq.heappush(self.event_queue, (self.levels[reader], unit))
 
     def evaluate_gate(self, inst_name):
         """Boolean eval of a single library/gate cell by substring of its type."""
         gtype = self.gate_types[inst_name]
         ports = self.gate_ports[inst_name]
-        # helper to fetch a port's current logic (default=0)
-        get = lambda pn: int(self.signal_values.get(ports.get(pn, ''), 0))
-
-        # inverter?
-        if 'inv' in gtype:
-            return int(not get('a'))
-
-        # NAND / AND
-        if 'nand' in gtype:
-            return int(not (get('a') and get('b')))
-        if 'and' in gtype:
-            return int(get('a') and get('b'))
-
-        # NOR / OR
-        if 'nor' in gtype:
-            return int(not (get('a') or get('b')))
-        if 'or' in gtype:
-            return int(get('a') or get('b'))
-
-        # XOR / XNOR
-        if 'xnor' in gtype:
-            return int((get('a') ^ get('b')) == 0)
-        if 'xor' in gtype:
-            return int(get('a') ^ get('b'))
-
-        # OAI2BB2:  Y = ~((~(A0N & A1N)) & (B0 & B1))
-        if 'oai2bb2' in gtype:
-            a0n = get('a0n')
-            a1n = get('a1n')
-            b0  = get('b0')
-            b1  = get('b1')
-            return int(not ((not (a0n and a1n)) and (b0 or b1)))
-
-        # AOI2BB1:  Y = ~((~(A0N | A1N)) | B0)
-        if 'aoi2bb1' in gtype:
-            a0n = get('a0n')
-            a1n = get('a1n')
-            b0  = get('b0')
-            return int(not ((not(a0n or a1n)) or b0))
-
-        # AOI21: Y = ~ (B0 | (A0 & A1))
-        if 'aoi21' in gtype:
-            a0 = get('a0')
-            a1 = get('a1')
-            b0 = get('b0')
-            return int(not (b0 or (a0 and a1)))
-
-        raise NotImplementedError(f"Gate type '{gtype}' not supported")
-
-    def propagate(self):
+        pins, func = GATE_FUNCTIONS[gate_kind(gtype)]
+        # fetch each input port's current logic (default=0)
+        return func(1, *(int(self.signal_values.get(ports.get(pn, ''), 0)) for pn in pins))
+
+    def evaluate_driver(self, net):
+        """Current value of `net` computed from its driver (gate or assign source)."""
+        return self.evaluate_net(self.net_ids[net])
+
+    def evaluate_net(self, idx):
+        """Current value of net ID `idx` computed from its fan-in in self.values."""
+        self.evaluations += 1
+        kind = self.drive_kind[idx]
+        lo = self.fanin_ptr[idx]
+        if kind == ASSIGN:
+            val = self.values[self.fanin_idx[lo]]
+            if TRACE_PROPAGATE.trace:
+                TRACE_PROPAGATE(f"  Wire {self.signal_drivers[self.net_names[idx]]} → {self.net_names[idx]}: {val}")
+            return val
+        drv = self.signal_drivers[self.net_names[idx]]
+        if kind == UNSUPPORTED:
+            return self.evaluate_gate(drv)
+        func = GATE_KIND_FUNCTIONS[kind - GATE_BASE]
+        val = func(1, *[self.values[dep] for dep in self.fanin_idx[lo:self.fanin_ptr[idx + 1]]])
+        if TRACE_PROPAGATE.trace:
+            TRACE_PROPAGATE(f"  Gate {drv} ({self.gate_types[drv]}): {self.net_names[idx]} = {val}")
+        return val
+
+    def propagate(self, mode=None):
+        """
+        Settle every driven net from the current primary values.
+        mode defaults to self.propagate_mode (see PROPAGATE_MODES).
+        """
+        if self.order is None:
+            self.levelize()
+        mode = mode or self.propagate_mode
+        if mode == 'iterative':
+            self.propagate_iterative()
+        elif mode == 'levelized':
+            self.propagate_levelized()
+        elif mode == 'event':
+            self.propagate_event()
+        elif mode == 'compiled':
+            if TRACE_PROPAGATE.trace:
+                # the generated code has no per-gate trace; same values either way
+                self.propagate_levelized()
+            else:
+                self.propagate_compiled()
+        else:
+            raise ValueError(f"Unknown propagate mode '{mode}'")
+
+    def propagate_levelized(self):
+        """
+        Evaluate each driver exactly once, in the order computed by levelize().
+        Only combinational loops are iterated, and only over their own nets.
+        """
+        order = self.order
+        values = self.values
+        loop_at = self.loop_at
+        pos = 0
+        while pos < len(order):
+            group = loop_at.get(pos)
+            if group is not None:
+                self.settle_loop(group)
+                pos += len(group)
+            else:
+                idx = order[pos]
+                values[idx] = self.evaluate_net(idx)
+                pos += 1
+
+    def compile(self):
+        """Generate (or fetch from the per-netlist cache) the straight-line evaluate function."""
+        from netlist_compiler import compile_model
+        if self.order is None:
+            self.levelize()
+        self.netlist_hash, self.compiled = compile_model(self)
+        return self.compiled
+
+    def propagate_compiled(self):
+        """One call of the compiled model; same result as propagate_levelized()."""
+        if self.compiled is None:
+            self.compile()
+        self.compiled(self.values)
+        self.evaluations += len(self.order)
+
+    def propagate_event(self):
+        """
+        Selective trace: pop queued drivers lowest level first, re-evaluate them,
+        and queue the fanout of every net whose value actually changed.
+        The first call (or any call after levelize()) settles the whole network.
+        """
+        if not self.settled:
+            self.propagate_levelized()
+            self.event_queue = []
+            self.event_queued = set()
+            self.settled = True
+            return
+        values = self.values
+        while self.event_queue:
+            _, pos = heapq.heappop(self.event_queue)
+            self.event_queued.discard(pos)
+            group = self.loop_at.get(pos)
+            if group is None:
+                idx = self.order[pos]
+                old_val = values[idx]
+                values[idx] = self.evaluate_net(idx)
+                if values[idx] != old_val:
+                    self.schedule_fanout(idx, skip=pos)
+                continue
+            old_values = [values[idx] for idx in group]
+            self.settle_loop(group)
+            for idx, old_val in zip(group, old_values):
+                if values[idx] != old_val:
+                    self.schedule_fanout(idx, skip=pos)
+
+    def settle_loop(self, group):
+        """Unit-delay iteration restricted to the nets (IDs) of one combinational loop."""
+        limit = max(self.max_iterations, 2 * len(group))
+        values = self.values
+        if TRACE_PROPAGATE.debug:
+            TRACE_PROPAGATE(f"[Loop {', '.join(self.net_names[idx] for idx in group)}]")
+        for iteration in range(1, limit + 1):
+            new_values = [(idx, self.evaluate_net(idx)) for idx in group]
+            changed = False
+            for idx, val in new_values:
+                if values[idx] != val:
+                    values[idx] = val
+                    changed = True
+            if not changed:
+                if TRACE_PROPAGATE.debug:
+                    TRACE_PROPAGATE(f"  Loop settled after {iteration} iterations")
+                return
+        if TRACE_PROPAGATE.info:
+            names = ', '.join(self.net_names[idx] for idx in group)
+            TRACE_PROPAGATE(f"  WARNING: Loop {names} still oscillating after {limit} iterations")
+
+    def propagate_iterative(self):
         """
         Iterate until no net-value changes.
         Simulates unit delay for all gates by updating all outputs simultaneously.
         """
         changed = True
         iteration = 0
-        max_iterations = 10  # Prevent infinite oscillation
+        max_iterations = self.max_iterations  # Prevent infinite oscillation
+        values = self.values
         while changed and iteration < max_iterations:
             iteration += 1
-            print(f"[Propagate iteration {iteration}]")
+            if TRACE_PROPAGATE.debug:
+                TRACE_PROPAGATE(f"[Propagate iteration {iteration}]")
             changed = False
             
             # Compute all new values first (unit delay simulation)
-            new_values = {}
-            for net, drv in list(self.signal_drivers.items()):
-                if drv in self.gate_types:
-                    val = self.evaluate_gate(drv)
-                    print(f"  Gate {drv} ({self.gate_types[drv]}): {net} = {val}")
-                else:
-                    # simple wire assignment
-                    val = int(self.signal_values.get(drv, 0))
-                    print(f"  Wire {drv} → {net}: {val}")
-                new_values[net] = val
+            new_values = [(idx, self.evaluate_net(idx)) for idx in self.order]
             
             # Now update all signal values at once (unit gate delay too avoid raciing aand oscillations)
-            for net, val in new_values.items():
-                old_val = self.signal_values.get(net, 0)
+            for idx, val in new_values:
+                old_val = values[idx]
                 if old_val != val:
-                    self.signal_values[net] = val
+                    values[idx] = val
                     changed = True
-                    print(f"    *** {net} changed from {old_val} to {val}")
+                    if TRACE_PROPAGATE.trace:
+                        TRACE_PROPAGATE(f"    *** {self.net_names[idx]} changed from {old_val} to {val}")
             
-            if not changed:
-                print(f"  No more changes after {iteration} iterations")
-        if iteration >= max_iterations:
-            print(f"  WARNING: Propagation stopped after {max_iterations} iterations due to oscillation")
+            if not changed and TRACE_PROPAGATE.debug:
+                TRACE_PROPAGATE(f"  No more changes after {iteration} iterations")
+        if iteration >= max_iterations and TRACE_PROPAGATE.info:
+            TRACE_PROPAGATE(f"  WARNING: Propagation stopped after {max_iterations} iterations due to oscillation")
 
     def evaluate_D_inputs(self) -> dict:
         """
@@ -249,6 +700,11 @@ class LogicEvaluator:
             for inst, d_net in self.d_inputs.items()
         }
 
+    def d_value(self, inst):
+        """Current value of a flop's D-net (0 if unconnected)."""
+        idx = self.d_ids.get(inst)
+        return self.values[idx] if idx is not None else 0
+
     def simulate_flops(self, current_q, se_map=None, si_map=None, reset_map=None):
         """
         Simulate all flops for one clock edge.
@@ -259,31 +715,77 @@ class LogicEvaluator:
         Returns new_q: dict of {inst_name: Q}
         """
         new_q = {}
-        print("[simulate_flops] Flop update:")
+        debug = TRACE_FLOPS.debug
+        if debug:
+            TRACE_FLOPS("[simulate_flops] Flop update:")
         for inst in current_q:
             reset_val = 1 if reset_map is None else reset_map.get(inst, 1)
             if reset_val == 0:
-                print(f"  {inst}: RESET asserted, Q=0")
+                if debug:
+                    TRACE_FLOPS(f"  {inst}: RESET asserted, Q=0")
                 new_q[inst] = 0
                 continue
             if inst in self.sdff_cells:
                 se = se_map.get(inst, 0) if se_map else 0
                 si = si_map.get(inst, 0) if si_map else 0
-                d_net = self.d_inputs[inst]
-                d_val = int(self.signal_values.get(d_net, 0))
-                print(f"  {inst} (SDFF): SE={se}, SI={si}, D={d_val}, Q_prev={current_q[inst]}")
+                d_val = self.d_value(inst)
+                if debug:
+                    TRACE_FLOPS(f"  {inst} (SDFF): SE={se}, SI={si}, D={d_val}, Q_prev={current_q[inst]}")
                 if se:
                     new_q[inst] = si
                 else:
                     new_q[inst] = d_val
             elif inst in self.dff_cells:
-                d_net = self.d_inputs[inst]
-                d_val = int(self.signal_values.get(d_net, 0))
-                print(f"  {inst} (DFF): D={d_val}, Q_prev={current_q[inst]}")
+                d_val = self.d_value(inst)
+                if debug:
+                    TRACE_FLOPS(f"  {inst} (DFF): D={d_val}, Q_prev={current_q[inst]}")
                 new_q[inst] = d_val
-        print(f"  New Qs: {new_q}")
+        if debug:
+            TRACE_FLOPS(f"  New Qs: {new_q}")
         return new_q
 
+    def next_state_table(self, current_q, se_map=None, reset_map=None):
+        """
+        The NextStateTable for this capture, or None when it can't apply:
+        scan-enabled or reset flops, or instances that aren't flops.
+        """
+        if se_map and any(se_map.values()):
+            return None
+        if reset_map and not all(reset_map.get(inst, 1) for inst in current_q):
+            return None
+        flops = tuple(current_q)
+        table = self.next_state_tables.get(flops)
+        if table is None:
+            if not all(inst in self.sdff_cells or inst in self.dff_cells for inst in flops):
+                return None
+            table = self.next_state_tables[flops] = NextStateTable(self, flops)
+        return table
+
+    def capture_cycle(self, current_q, se_map=None, si_map=None, reset_map=None, cycle=0) -> dict:
+        """One rising edge: drive the Q nets, propagate, and clock the flops."""
+        if TRACE_CAPTURE.debug:
+            TRACE_CAPTURE(f"\n[Capture cycle {cycle+1}] Q values: {current_q}")
+        primaries = {
+            self.q_ids[inst]: bit
+            for inst, bit in current_q.items()
+            if inst in self.q_ids
+        }
+        if self.propagate_mode == 'event':
+            # keep the settled network; Q nets no longer driven fall back to 0
+            for idx in self.event_primaries - primaries.keys():
+                self.set_value(idx, 0)
+            self.event_primaries = set(primaries)
+        else:
+            self.signal_values.clear()
+        for idx, bit in primaries.items():
+            self.set_value(idx, bit)
+        self.propagate()
+        # Print D inputs for all flops
+        if TRACE_CAPTURE.debug:
+            d_inputs_vals = {inst: self.signal_values.get(self.d_inputs[inst], 0) for inst in current_q}
+            TRACE_CAPTURE(f"[Capture cycle {cycle+1}] D inputs: {d_inputs_vals}")
+        return self.simulate_flops(current_q, se_map, si_map, reset_map)
+
     def capture(self, initial_q: dict, cycles: int = 2, se_map=None, si_map=None, reset_map=None) -> dict:
         """
         Simulate `cycles` back-to-back rising edges:
@@ -292,21 +794,21 @@ class LogicEvaluator:
           3) sample D-nets
           4) Q <- D (or SI for SDFF if SE=1)
         Returns final {inst_name: Q}
+        With next_state on, functional captures are table lookups instead
+        (not while capture/flops tracing is on, which needs the propagation).
         """
+        if self.order is None:
+            self.levelize()
+        if self.next_state and not (TRACE_CAPTURE.debug or TRACE_FLOPS.debug):
+            table = self.next_state_table(initial_q, se_map, reset_map)
+            if table is not None:
+                word = table.word(initial_q)
+                for _ in range(cycles):
+                    word = table.next(word)
+                return table.state(word)
         current_q = initial_q.copy()
         for cycle in range(cycles):
-            print(f"\n[Capture cycle {cycle+1}] Q values: {current_q}")
-            primaries = {
-                self.q_outputs[inst]: bit
-                for inst, bit in current_q.items()
-                if inst in self.q_outputs and self.q_outputs[inst] is not None
-            }
-            self.signal_values.clear()
-            self.set_primary_inputs(primaries)
-            self.propagate()
-            # Print D inputs for all flops
-            d_inputs_vals = {inst: self.signal_values.get(self.d_inputs[inst], 0) for inst in current_q}
-            print(f"[Capture cycle {cycle+1}] D inputs: {d_inputs_vals}")
-            current_q = self.simulate_flops(current_q, se_map, si_map, reset_map)
-        print(f"[Capture] Final Qs after {cycles} cycles: {current_q}")
+            current_q = self.capture_cycle(current_q, se_map, si_map, reset_map, cycle)
+        if TRACE_CAPTURE.debug:
+            TRACE_CAPTURE(f"[Capture] Final Qs after {cycles} cycles: {current_q}")
         return current_q
@@ -1,11 +1,54 @@
 import re
 import os
-import numpy as np
-import matplotlib.pyplot as plt
-from pyverilog.vparser.parser import parse
-import pyverilog.vparser.ast as vast
-from tabulate import tabulate
-from graphviz import Digraph
+from design_db import DesignDatabase
+from design_cache import load_design
+
+def balance_chains(input_wbcs, flops, output_wbcs, num_chains, clocks=None) -> list:
+    """
+    Split the cells of the extended scan chain into `num_chains` chains of
+    balanced length, each still ordered inputs → flops → outputs. With
+    `clocks` (flop → clock net) a chain only holds flops of one clock
+    domain: every domain gets a chain, spare chains go to the domain whose
+    chains are longest, and its flops are split evenly over them. WBCs are
+    not in a functional domain and top up the shortest chains.
+    """
+    if num_chains < 1:
+        raise ValueError("need at least one scan chain")
+    total = len(input_wbcs) + len(flops) + len(output_wbcs)
+    if num_chains > total:
+        raise ValueError(f"{num_chains} scan chains for {total} cells")
+    domains = {}
+    for flop in flops:
+        domains.setdefault(clocks.get(flop['instance']) if clocks else None, []).append(flop)
+    if len(domains) > num_chains:
+        raise ValueError(f"{len(domains)} clock domains need at least {len(domains)} scan chains")
+    share = {domain: 1 for domain in domains}
+    for _ in range(num_chains - len(domains) if domains else 0):
+        # the domain with the longest chains gets the next one
+        domain = max(domains, key=lambda d: -(-len(domains[d]) // share[d]))
+        if len(domains[domain]) <= share[domain]:
+            break
+        share[domain] += 1
+    middles = []
+    for domain, members in domains.items():
+        n = share[domain]
+        start = 0
+        for i in range(n):
+            size = len(members) // n + (1 if i < len(members) % n else 0)
+            middles.append(members[start:start + size])
+            start += size
+    middles.extend([] for _ in range(num_chains - len(middles)))
+    heads = [[] for _ in range(num_chains)]
+    tails = [[] for _ in range(num_chains)]
+
+    def shortest():
+        return min(range(num_chains), key=lambda k: (len(heads[k]) + len(middles[k]) + len(tails[k]), k))
+    for wbc in input_wbcs:
+        heads[shortest()].append(wbc)
+    for wbc in output_wbcs:
+        tails[shortest()].append(wbc)
+    return [heads[k] + middles[k] + tails[k] for k in range(num_chains)]
+
 
 class VerilogScanDFT:
     def __init__(self, filepath):
@@ -15,117 +58,36 @@ class VerilogScanDFT:
         self.scan_flops = []
         self.gates = []
         self.scan_chain = []
+        self.scan_chains = []
         self.module_io = {}
         self.wbc_cells = []
         self.ast = None
+        self.design = None  # DesignDatabase shared with LogicEvaluator
 
     def parse_file(self):
-        self.ast, _ = parse([self.filepath])
+        # parsed once per netlist; repeat runs load the cached design instead
+        self.ast, self.design = load_design(self.filepath)
         print("Parsed netlist file successfully.")
 
     def extract_design_info(self):
-        module_defs = set()
-        instantiated_modules = set()
-
-        def visit(node):
-            if isinstance(node, vast.ModuleDef):
-                module_defs.add(node.name)
-                self.modules.append(node.name)
-                input_names = []
-                output_names = []
-                print(f"Processing module: {node.name}")
-
-                for item in node.children():
-                    if isinstance(item, vast.Decl):
-                        print(f"  Found Decl: {type(item)}")
-                        for decl in item.list:
-                            print(f"    Declaration: {type(decl)} - {decl}")
-                            signal_base = decl.name if isinstance(decl.name, str) else decl.name.name
-                            width = decl.width
-                            print(f"      Signal: {signal_base}, Width: {width}")
-
-                            if width is None:
-                                if isinstance(decl, vast.Input):
-                                    input_names.append(signal_base)
-                                    print(f"      Added input: {signal_base}")
-                                elif isinstance(decl, vast.Output):
-                                    output_names.append(signal_base)
-                                    print(f"      Added output: {signal_base}")
-                            else:
-                                msb = int(width.msb.value)
-                                lsb = int(width.lsb.value)
-                                bit_range = range(msb, lsb - 1, -1) if msb >= lsb else range(msb, lsb + 1)
-                                expanded = [f"{signal_base}{i}" for i in bit_range]
-                                if isinstance(decl, vast.Input):
-                                    input_names.extend(expanded)
-                                    print(f"      Added input bus: {expanded}")
-                                elif isinstance(decl, vast.Output):
-                                    output_names.extend(expanded)
-                                    print(f"      Added output bus: {expanded}")
-
-                self.module_io[node.name] = {
-                    'input_count': len(input_names),
-                    'output_count': len(output_names),
-                    'input_names': input_names,
-                    'output_names': output_names
-                }
-                print(f"  Module {node.name} I/O: {len(input_names)} inputs, {len(output_names)} outputs")
-
-            elif isinstance(node, vast.InstanceList):
-                instantiated_modules.add(node.module)
-
-                for inst in node.instances:
-                    cell = node.module.lower()
-                    name = inst.name
-
-                    if "sdff" in cell:
-                        self.scan_flops.append((cell, name))
-                    elif "dff" in cell:
-                        self.flipflops.append((cell, name))
-                    elif any(gate in cell for gate in ['aoi', 'oai', 'and', 'or', 'nand', 'nor', 'xor', 'xnor', 'clkinv']):
-                        self.gates.append((cell, name))
-
-            for c in node.children():
-                visit(c)
-
-        visit(self.ast)
-
-        # Determine top-level module (defined but never instantiated)
-        top_candidates = module_defs - instantiated_modules
-        top_module = next(iter(top_candidates), None)
+        if self.design is None:
+            self.design = DesignDatabase.from_ast(self.ast)
+        design = self.design
+        self.modules = list(design.modules)
+        self.flipflops = list(design.flipflops)
+        self.scan_flops = list(design.scan_flops)
+        self.gates = list(design.gates)
+        self.module_io = dict(design.module_io)
+        for name, io in self.module_io.items():
+            print(f"  Module {name} I/O: {io['input_count']} inputs, {io['output_count']} outputs")
 
         # Add Wrapper Boundary Cells for top-level module only
-        excluded_inputs = {'clk', 'reset', 'en'}
-        wbc_inputs = ['CFI', 'WINT', 'WEXT', 'WRCK', 'DFT_sdi']
-        wbc_outputs = ['CFO', 'DFT_sdo']
-
-        if top_module and top_module in self.module_io:
-            print(f"Top-level module identified: {top_module}")
-            io = self.module_io[top_module]
-
-            for name in sorted(io['input_names']):
-                if name not in excluded_inputs:
-                    self.wbc_cells.append({
-                        'cell_type': 'WBC',
-                        'instance': f'WBC_{name}',
-                        'direction': 'input',
-                        'signal': name,
-                        'inputs': wbc_inputs,
-                        'outputs': wbc_outputs
-                    })
-
-            for name in sorted(io['output_names']):
-                self.wbc_cells.append({
-                    'cell_type': 'WBC',
-                    'instance': f'WBC_{name}',
-                    'direction': 'output',
-                    'signal': name,
-                    'inputs': wbc_inputs,
-                    'outputs': wbc_outputs
-                })
-
-    def construct_scan_chain(self):
-        print("Building extended scan chain.")
+        if design.top_module and design.top_module in self.module_io:
+            print(f"Top-level module identified: {design.top_module}")
+        self.wbc_cells = design.wrapper_boundary_cells()
+
+    def construct_scan_chain(self, num_chains=1, clock_domains=False):
+        print("Building extended scan chain." if num_chains == 1 else f"Building {num_chains} scan chains.")
 
         # Separate and sort WBCs for consistent order
         input_wbcs = sorted(
@@ -136,25 +98,46 @@ class VerilogScanDFT:
             [w for w in self.wbc_cells if w['direction'] == 'output'],
             key=lambda x: x['instance']
         )
-
-        # Combine full scan chain: inputs → all scan FFs (SDFFs and DFFs) → outputs
-        full_chain = input_wbcs + [
+        flops = [
             {'cell_type': cell, 'instance': name}
             for cell, name in (self.scan_flops + self.flipflops)
-        ] + output_wbcs
+        ]
 
         self.scan_chain = []
-
-        for idx, element in enumerate(full_chain):
-            scan_cell = {
-                'cell_type': element['cell_type'],
-                'instance': element['instance'],
-                'SI': 'scan_in' if idx == 0 else f'scan_out_{idx - 1}',
-                'SO': f'scan_out_{idx}'
-            }
-            self.scan_chain.append(scan_cell)
+        if num_chains == 1 and not clock_domains:
+            # Combine full scan chain: inputs → all scan FFs (SDFFs and DFFs) → outputs
+            chains = [input_wbcs + flops + output_wbcs]
+        else:
+            clocks = self.design.clock_nets() if clock_domains else {}
+            chains = balance_chains(input_wbcs, flops, output_wbcs, num_chains, clocks)
+
+        self.scan_chains = []
+        for k, chain in enumerate(chains):
+            cells = []
+            for idx, element in enumerate(chain):
+                if num_chains == 1:
+                    scan_cell = {
+                        'cell_type': element['cell_type'],
+                        'instance': element['instance'],
+                        'SI': 'scan_in' if idx == 0 else f'scan_out_{idx - 1}',
+                        'SO': f'scan_out_{idx}'
+                    }
+                else:
+                    scan_cell = {
+                        'cell_type': element['cell_type'],
+                        'instance': element['instance'],
+                        'chain': k,
+                        'SI': f'scan_in_{k}' if idx == 0 else f'scan_out_{k}_{idx - 1}',
+                        'SO': f'scan_out_{k}' if idx == len(chain) - 1 else f'scan_out_{k}_{idx}'
+                    }
+                cells.append(scan_cell)
+            self.scan_chains.append(cells)
+            self.scan_chain.extend(cells)
+        if num_chains > 1:
+            print(f"Scan chain lengths: {', '.join(str(len(c)) for c in self.scan_chains)}")
 
     def display_summary(self):
+        from tabulate import tabulate
         print("\n[ Flip-Flops ]")
         print(tabulate(self.flipflops, headers=["Cell", "Instance"]) or "None")
 
@@ -183,7 +166,8 @@ class VerilogScanDFT:
             headers=["Instance", "Direction", "Signal", "Inputs", "Outputs"]
         ) or "None")
 
-    def create_schematic(self, output_file="schematic"):
+    def create_schematic(self, output_file="schematic", view=True):
+        from graphviz import Digraph
         dot = Digraph(comment="Netlist Schematic")
 
         # Flip-flop port definitions
@@ -224,22 +208,23 @@ class VerilogScanDFT:
             )
             dot.node(w['instance'], label, shape="octagon", style="filled", color="yellow")
 
-        # Draw extended scan chain path
-        for idx in range(len(self.scan_chain) - 1):
-            from_cell = self.scan_chain[idx]
-            to_cell = self.scan_chain[idx + 1]
-            # For DFFRX1, connect Q to D; for SDFF, connect SO to SI
-            if from_cell['cell_type'].lower().startswith('dff'):
-                from_port = 'Q'
-            else:
-                from_port = 'SO'
-            if to_cell['cell_type'].lower().startswith('dff'):
-                to_port = 'D'
-            else:
-                to_port = 'SI'
-            dot.edge(from_cell['instance'], to_cell['instance'], label=f"{from_port}->{to_port}")
-
-        dot.render(output_file, view=True, format="pdf")
+        # Draw extended scan chain path (each chain on its own)
+        for chain in self.scan_chains or [self.scan_chain]:
+            for idx in range(len(chain) - 1):
+                from_cell = chain[idx]
+                to_cell = chain[idx + 1]
+                # For DFFRX1, connect Q to D; for SDFF, connect SO to SI
+                if from_cell['cell_type'].lower().startswith('dff'):
+                    from_port = 'Q'
+                else:
+                    from_port = 'SO'
+                if to_cell['cell_type'].lower().startswith('dff'):
+                    to_port = 'D'
+                else:
+                    to_port = 'SI'
+                dot.edge(from_cell['instance'], to_cell['instance'], label=f"{from_port}->{to_port}")
+
+        dot.render(output_file, view=view, format="pdf")
 
     def run(self):
         self.parse_file()
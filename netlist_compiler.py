@@ -0,0 +1,115 @@
+# netlist_compiler.py
+
+import hashlib
+from logic_evaluator import GATE_EXPRESSIONS, GATE_KINDS, GATE_BASE, ASSIGN, UNSUPPORTED
+
+# netlist hash → compiled evaluation function, shared by every evaluator of the same netlist
+_COMPILED = {}
+
+
+def netlist_hash(evaluator):
+    """SHA-256 over everything the generated code depends on: net IDs, driver kinds and fan-in."""
+    h = hashlib.sha256()
+    h.update('\0'.join(evaluator.net_names).encode())
+    h.update(bytes(evaluator.drive_kind))
+    h.update(evaluator.fanin_ptr.tobytes())
+    h.update(evaluator.fanin_idx.tobytes())
+    h.update(evaluator.order.tobytes())
+    h.update(repr(evaluator.max_iterations).encode())
+    return h.hexdigest()
+
+
+def generate_source(evaluator, name='evaluate'):
+    """
+    Straight-line Python for one propagate of the model: read the undriven nets
+    out of `v` (indexed by net ID), one assignment per driver in level order,
+    then write every driven net back into `v`. Combinational loops become a
+    bounded unit-delay loop over just their own nets, like
+    LogicEvaluator.settle_loop().
+
+    The generated function is evaluate(v, M=1, same=eq): M is the all-ones
+    value, so it runs on the evaluator's bytearray and on lists of bit-parallel
+    words alike. same(a, b) tells a loop it has settled: plain == for 0/1
+    values and int words, the lanes' own test for NumPy arrays (see
+    IntLanes.same).
+    """
+    names = evaluator.net_names
+    kinds = evaluator.drive_kind
+    fanin_ptr = evaluator.fanin_ptr
+    fanin_idx = evaluator.fanin_idx
+
+    def fanin(idx):
+        return fanin_idx[fanin_ptr[idx]:fanin_ptr[idx + 1]]
+
+    def expression(idx):
+        kind = kinds[idx]
+        if kind == ASSIGN:
+            return f"s{fanin(idx)[0]}"
+        if kind == UNSUPPORTED:
+            drv = evaluator.signal_drivers[names[idx]]
+            raise NotImplementedError(f"Gate type '{evaluator.gate_types[drv]}' not supported")
+        pins, expr = GATE_EXPRESSIONS[GATE_KINDS[kind - GATE_BASE]]
+        return _substitute(expr, {pn: f"s{dep}" for pn, dep in zip(pins, fanin(idx))})
+
+    lines = ["from operator import eq", "", f"def {name}(v, M=1, same=eq):"]
+    header = len(lines)
+    read = sorted({dep for idx in evaluator.order for dep in fanin(idx) if not kinds[dep]})
+    for idx in read:
+        lines.append(f"    s{idx} = v[{idx}]")
+    pos = 0
+    order = evaluator.order
+    while pos < len(order):
+        group = evaluator.loop_at.get(pos)
+        if group is None:
+            idx = order[pos]
+            lines.append(f"    s{idx} = {expression(idx)}  # {names[idx]!r}")
+            pos += 1
+            continue
+        pos += len(group)
+        limit = max(evaluator.max_iterations, 2 * len(group))
+        current = ', '.join(f"s{idx}" for idx in group) + ','
+        nxt = ', '.join(f"t{idx}" for idx in group) + ','
+        lines.append(f"    # combinational loop: {', '.join(repr(names[idx]) for idx in group)}")
+        for idx in group:
+            lines.append(f"    s{idx} = v[{idx}]")
+        lines.append(f"    for _ in range({limit}):")
+        for idx in group:
+            lines.append(f"        t{idx} = {expression(idx)}")
+        lines.append(f"        if all(map(same, ({nxt}), ({current}))):")
+        lines.append(f"            break")
+        lines.append(f"        {current} = {nxt}")
+    for idx in order:
+        lines.append(f"    v[{idx}] = s{idx}")
+    if len(lines) == header:
+        # nothing driven (only flops and wires): still a valid function
+        lines.append("    pass")
+    return '\n'.join(lines) + '\n'
+
+
+def _substitute(expr, args):
+    """Replace the pin names in a GATE_EXPRESSIONS entry by generated variable names."""
+    out = []
+    for token in expr.replace('(', ' ( ').replace(')', ' ) ').split():
+        out.append(args.get(token, token))
+    return ' '.join(out).replace('( ', '(').replace(' )', ')')
+
+
+def install_source(key, source):
+    """Compile generated source for netlist hash `key` into the cache (e.g. shipped to a worker)."""
+    func = _COMPILED.get(key)
+    if func is None:
+        namespace = {}
+        exec(compile(source, f"<wrapsim-netlist-{key[:12]}>", 'exec'), namespace)
+        func = namespace['evaluate']
+        func.source = source
+        _COMPILED[key] = func
+    return func
+
+
+def compile_model(evaluator):
+    """Compiled evaluate() for the evaluator's model, generated once per netlist hash."""
+    key = netlist_hash(evaluator)
+    func = _COMPILED.get(key)
+    if func is None:
+        func = install_source(key, generate_source(evaluator))
+    return key, func
@@ -0,0 +1,182 @@
+# parallel_driver.py
+
+import os
+import pickle
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+from design_db import DesignDatabase
+from logic_evaluator import LogicEvaluator
+from scan_chain_pipeline import ScanChainSimulator
+from extest_simulator import ExtestSimulator
+from bit_parallel import blocks
+
+# blocks in flight per worker; bounds the results held in the parent
+WINDOW_PER_WORKER = 4
+
+# the simulator rebuilt in each worker process by _attach(), and the segment its model lives in
+_worker = None
+_shm = None
+
+
+def simulator_spec(simulator) -> dict:
+    """Everything a worker needs to rebuild `simulator` without parsing or levelizing."""
+    if isinstance(simulator, ScanChainSimulator):
+        kind = 'intest'
+        evaluator = simulator.evaluator
+        chain = [{'instance': c.name, 'cell_type': c.cell_type, 'chain': c.chain} for c in simulator.cells]
+    elif isinstance(simulator, ExtestSimulator):
+        kind = 'extest'
+        evaluator = simulator.left_evaluator
+        chain = [{'instance': c.name, 'cell_type': c.cell_type, 'direction': c.direction, 'signal': c.signal}
+                 for c in simulator.wbc_cells]
+    else:
+        raise TypeError(f"Can't run {type(simulator).__name__} in parallel")
+    if evaluator.order is None:
+        evaluator.build_model()
+    compiled = evaluator.compiled or evaluator.compile()
+    return {
+        'kind': kind,
+        'chain': chain,
+        'design': evaluator.design.state(),
+        'model': evaluator.model_state(),
+        'propagate_mode': evaluator.propagate_mode,
+        'compiled': (evaluator.netlist_hash, compiled.source),
+    }
+
+
+def rebuild_simulator(spec):
+    from netlist_compiler import install_source
+    design = DesignDatabase.from_state(spec['design'])
+    design.model_state = spec['model']
+    install_source(*spec['compiled'])
+    if spec['kind'] == 'intest':
+        evaluator = LogicEvaluator(None, propagate_mode=spec['propagate_mode'], design=design)
+        evaluator.build_model()
+        simulator = ScanChainSimulator(spec['chain'], evaluator)
+        simulator.verbose = False
+    else:
+        analyzer = SimpleNamespace(extest_scan_chain=spec['chain'], ast=None, design=design)
+        simulator = ExtestSimulator(analyzer, propagate_mode=spec['propagate_mode'], verbose=False)
+    return simulator
+
+
+def _flat_arrays(model):
+    """(name, raw bytes, memoryview format) of the levelized model's flat arrays."""
+    arrays = [(name, model[name], 'i') for name in LogicEvaluator.MODEL_ARRAYS]
+    arrays.append(('drive_kind', model['drive_kind'], 'B'))
+    return arrays
+
+
+def pack_spec(spec):
+    """
+    Shared-memory image of a simulator_spec(): the flat model arrays (CSR
+    fan-in/fan-out, levels, order, unit_pos, drive_kind) as raw bytes at
+    8-byte aligned offsets, then a pickle of the rest (design dicts, net
+    names, chain, generated source). Returns (image, layout, rest) where
+    layout maps array name -> (offset, size, format) and rest is the
+    pickle's (offset, size).
+    """
+    model = dict(spec['model'])
+    image = bytearray()
+    layout = {}
+    for name, raw, fmt in _flat_arrays(model):
+        image.extend(bytes(-len(image) % 8))
+        layout[name] = (len(image), len(raw), fmt)
+        image.extend(raw)
+        del model[name]
+    rest = pickle.dumps(dict(spec, model=model), protocol=pickle.HIGHEST_PROTOCOL)
+    offset = len(image)
+    image.extend(rest)
+    return image, layout, (offset, len(rest))
+
+
+def _attach(shm_name, layout, rest):
+    """
+    Worker initializer: map the shared segment, wrap the model arrays in
+    read-only memoryviews over it (no copy), unpickle the small rest and
+    build the simulator once.
+    """
+    global _worker, _shm
+    try:
+        shm = shared_memory.SharedMemory(name=shm_name, track=False)
+    except TypeError:
+        # before Python 3.13 attaching also registers the segment with the
+        # resource tracker the workers share with the parent; the parent's
+        # unlink() unregisters it once
+        shm = shared_memory.SharedMemory(name=shm_name)
+    offset, size = rest
+    view = shm.buf[offset:offset + size]
+    try:
+        spec = pickle.loads(view)
+    finally:
+        view.release()
+    for name, (offset, size, fmt) in layout.items():
+        spec['model'][name] = shm.buf[offset:offset + size].toreadonly().cast(fmt)
+    # the evaluator reads the arrays straight out of the segment: keep it mapped for the worker's life
+    _shm = shm
+    _worker = rebuild_simulator(spec)
+
+
+def _run_block(base, width, length, backend):
+    return _worker.run_range(base, width, length, backend=backend)
+
+
+class SignaturePool:
+    """
+    Process pool computing signature blocks for one simulator (INTEST or
+    EXTEST). The levelized model's flat arrays are written once into a
+    shared-memory segment and every worker's evaluator indexes them in place;
+    the name-keyed parts (design dicts, net names, generated evaluate()
+    source) ride along as a pickle in the same segment, unpickled once per
+    worker. Nothing is re-parsed and no per-task model is sent. Blocks come
+    back in submission order.
+    """
+
+    def __init__(self, simulator, workers=None, backend='int'):
+        self.workers = workers or os.cpu_count() or 1
+        self.backend = backend
+        image, layout, rest = pack_spec(simulator_spec(simulator))
+        self.shm = shared_memory.SharedMemory(create=True, size=max(len(image), 1))
+        self.shm.buf[:len(image)] = image
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_attach,
+                                            initargs=(self.shm.name, layout, rest))
+
+    def map_blocks(self, count, length, width, start=0):
+        """(base, block_width, signatures) for range(start, count) in blocks of `width`, in order."""
+        window = self.workers * WINDOW_PER_WORKER
+        pending = deque()
+        for base, block_width in blocks(count, width, start):
+            pending.append((base, block_width,
+                            self.executor.submit(_run_block, base, block_width, length, self.backend)))
+            if len(pending) >= window:
+                base, block_width, future = pending.popleft()
+                yield base, block_width, future.result()
+        while pending:
+            base, block_width, future = pending.popleft()
+            yield base, block_width, future.result()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def signature_blocks(simulator, count, length, width, backend='int', workers=1, start=0):
+    """
+    (base, block_width, signatures) over vectors start .. count-1, in order:
+    in this process when workers is 1, otherwise through a SignaturePool.
+    """
+    if workers == 1:
+        for base, block_width in blocks(count, width, start):
+            yield base, block_width, simulator.run_range(base, block_width, length, backend=backend)
+        return
+    with SignaturePool(simulator, workers, backend) as pool:
+        yield from pool.map_blocks(count, length, width, start)
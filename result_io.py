@@ -0,0 +1,237 @@
+# result_io.py
+
+import csv
+import json
+import mmap
+import os
+import struct
+
+# packed result file: MAGIC, version, header length, JSON header (padded to
+# 8 bytes), then fixed-width records of (vector, signature), each packed
+# big-endian into field_bytes(length) bytes. The row count follows from the
+# file size, so a file can be appended to.
+PACKED_MAGIC = b'WSRB'
+PACKED_VERSION = 1
+PACKED_PREFIX = struct.Struct('<4sHxxI')
+PACKED_EXT = 'wsr'
+# buffered bytes per write() call
+CHUNK_BYTES = 1 << 20
+
+CSV_COLUMNS = ['Input Vector', 'Output Signature']
+
+
+def field_bytes(length):
+    """Bytes per packed vector/signature: 1, 2, 4 or 8 up to 64 bits (NumPy integer views), else ceil(length/8)."""
+    nbytes = (length + 7) // 8
+    for size in (1, 2, 4, 8):
+        if nbytes <= size:
+            return size
+    return nbytes
+
+
+def result_header(simulator, mode, length) -> dict:
+    """Mode, design hash and chain order of a result file."""
+    from netlist_compiler import netlist_hash
+    if mode == 'intest':
+        evaluator = simulator.evaluator
+        chain = [cell.name for cell in simulator.cells]
+    else:
+        evaluator = simulator.left_evaluator
+        chain = [cell.name for cell in simulator.wbc_cells]
+    if evaluator.order is None:
+        evaluator.build_model()
+    return {
+        'mode': mode,
+        'design': netlist_hash(evaluator),
+        'chain': chain,
+        'length': length,
+        'vectors': 2**length,
+    }
+
+
+class CsvResultWriter:
+    """
+    The original 'Input Vector,Output Signature' CSV; a header dict becomes
+    a shard line. append=True continues an existing file (resumed sweeps).
+    """
+
+    def __init__(self, path, header=None, index=None, append=False):
+        self.index = index
+        self.file = open(path, 'a' if append else 'w', newline='')
+        self.writer = csv.writer(self.file)
+        if not append:
+            if header is not None:
+                from sharding import write_shard_header
+                write_shard_header(self.file, header)
+            self.writer.writerow(CSV_COLUMNS)
+
+    def write_row(self, vec, sig):
+        self.writer.writerow([vec, sig])
+        if self.index is not None:
+            self.index.add_rows((vec,), (sig,))
+
+    def write_rows(self, vecs, sigs):
+        self.writer.writerows(zip(vecs, sigs))
+        if self.index is not None:
+            self.index.add_rows(vecs, sigs)
+
+    def sync(self):
+        """Flush to disk; returns the file size."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+        if self.index is not None:
+            self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PackedResultWriter:
+    """Bit-packed records, buffered into CHUNK_BYTES writes; append=True continues an existing file."""
+
+    def __init__(self, path, header, chunk_bytes=CHUNK_BYTES, index=None, append=False):
+        self.index = index
+        self.length = header['length']
+        self.width = field_bytes(self.length)
+        self.chunk_bytes = chunk_bytes
+        self.buffer = bytearray()
+        if append:
+            self.file = open(path, 'ab')
+            return
+        header = dict(header, field_bytes=self.width)
+        body = json.dumps(header, separators=(',', ':')).encode()
+        body += b' ' * (-(PACKED_PREFIX.size + len(body)) % 8)
+        self.file = open(path, 'wb')
+        self.file.write(PACKED_PREFIX.pack(PACKED_MAGIC, PACKED_VERSION, len(body)) + body)
+
+    def write_row(self, vec, sig):
+        self.write_rows((vec,), (sig,))
+
+    def write_rows(self, vecs, sigs):
+        width = self.width
+        buffer = self.buffer
+        for vec, sig in zip(vecs, sigs):
+            buffer += int(vec, 2).to_bytes(width, 'big')
+            buffer += int(sig, 2).to_bytes(width, 'big')
+        if len(buffer) >= self.chunk_bytes:
+            self.flush()
+        if self.index is not None:
+            self.index.add_rows(vecs, sigs)
+
+    def flush(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer = bytearray()
+
+    def sync(self):
+        """Flush to disk; returns the file size."""
+        self.flush()
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+        if self.index is not None:
+            self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_result_writer(path, result_format='csv', header=None, index_length=None, append=False):
+    """
+    Writer for `result_format`; with index_length (the vector/signature bit
+    count) the sidecar signature index is built as rows are written.
+    append=True continues a file written earlier with the same header.
+    """
+    index = None
+    if index_length is not None:
+        from signature_index import SignatureIndexBuilder, index_path
+        index = SignatureIndexBuilder(index_path(path), index_length)
+    if result_format == 'csv':
+        return CsvResultWriter(path, header, index=index, append=append)
+    if result_format == 'packed':
+        return PackedResultWriter(path, header, index=index, append=append)
+    raise ValueError(f"Unknown result format '{result_format}'")
+
+
+def is_packed(path) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(len(PACKED_MAGIC)) == PACKED_MAGIC
+
+
+class PackedResults:
+    """
+    Read-only view of a packed result file through mmap. rows() decodes
+    records lazily; array() is a zero-copy NumPy view of all records.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size = PACKED_PREFIX.unpack_from(self.mm)
+        if magic != PACKED_MAGIC:
+            self.mm.close()
+            raise ValueError(f"{path} is not a packed wrapsim result file")
+        if version != PACKED_VERSION:
+            self.mm.close()
+            raise ValueError(f"{path}: unsupported packed format version {version}")
+        self.offset = PACKED_PREFIX.size + size
+        self.header = json.loads(self.mm[PACKED_PREFIX.size:self.offset])
+        self.length = self.header['length']
+        self.width = self.header['field_bytes']
+        self.record = 2 * self.width
+
+    def __len__(self):
+        return (len(self.mm) - self.offset) // self.record
+
+    def dtype(self):
+        import numpy as np
+        field = f'>u{self.width}' if self.width <= 8 else f'V{self.width}'
+        return np.dtype([('vector', field), ('signature', field)])
+
+    def array(self):
+        """Structured ('vector', 'signature') array backed by the file; big-endian integers up to 64 bits."""
+        import numpy as np
+        return np.memmap(self.path, dtype=self.dtype(), mode='r', offset=self.offset, shape=(len(self),))
+
+    def rows(self, start=0, stop=None):
+        """(vector, signature) bit strings of records start .. stop-1."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        mm, width, fmt = self.mm, self.width, f'0{self.length}b'
+        position = self.offset + start * self.record
+        for _ in range(start, stop):
+            vec = int.from_bytes(mm[position:position + width], 'big')
+            sig = int.from_bytes(mm[position + width:position + self.record], 'big')
+            yield format(vec, fmt), format(sig, fmt)
+            position += self.record
+
+    def close(self):
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def packed_to_csv(path, csv_filename):
+    """Human-readable CSV (same columns as the CSV results) of a packed file; returns the row count."""
+    with PackedResults(path) as results, CsvResultWriter(csv_filename) as out:
+        for vec, sig in results.rows():
+            out.write_row(vec, sig)
+        return len(results)
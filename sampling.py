@@ -0,0 +1,262 @@
+# sampling.py
+
+import random
+import time
+from itertools import islice
+from math import comb
+from statistics import NormalDist
+from bit_parallel import DEFAULT_WIDTH
+import tracing
+
+TRACE_SCAN = tracing.get('scan')
+
+GENERATORS = ('uniform', 'weighted', 'stratified')
+
+
+def uniform_vectors(length, seed=None):
+    """Endless uniformly random `length`-bit vectors."""
+    rng = random.Random(seed)
+    while True:
+        yield format(rng.getrandbits(length), f'0{length}b')
+
+
+def weighted_vectors(length, p_one=0.5, seed=None):
+    """
+    Endless random vectors where each bit is '1' with probability p_one, or
+    p_one[k] for vector char k (chain cell N-1-k) when a list is given.
+    """
+    rng = random.Random(seed)
+    weights = [p_one] * length if isinstance(p_one, (int, float)) else list(p_one)
+    if len(weights) != length:
+        raise ValueError(f"{len(weights)} bit weights for a {length}-bit vector")
+    while True:
+        yield ''.join('1' if rng.random() < w else '0' for w in weights)
+
+
+def stratified_vectors(length, strata_bits=4, seed=None):
+    """
+    Endless random vectors cycling through the 2**strata_bits values of the
+    leading bits in shuffled rounds, so every stratum of the vector space is
+    sampled equally often; the remaining bits are uniform.
+    """
+    rng = random.Random(seed)
+    strata_bits = min(strata_bits, length)
+    rest = length - strata_bits
+    strata = list(range(2**strata_bits))
+    while True:
+        rng.shuffle(strata)
+        for prefix in strata:
+            yield format((prefix << rest) | rng.getrandbits(rest), f'0{length}b')
+
+
+def make_vectors(generator, length, seed=None, p_one=0.5, strata_bits=4):
+    if generator == 'uniform':
+        return uniform_vectors(length, seed)
+    if generator == 'weighted':
+        return weighted_vectors(length, p_one, seed)
+    if generator == 'stratified':
+        return stratified_vectors(length, strata_bits, seed)
+    raise ValueError(f"Unknown generator '{generator}', expected one of {', '.join(GENERATORS)}")
+
+
+def wilson_interval(successes, trials, confidence=0.95):
+    """Wilson score interval of a binomial proportion."""
+    if not trials:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    half = z * ((p * (1 - p) + z * z / (4 * trials)) / trials) ** 0.5 / denominator
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+class SampleResult:
+    """
+    Outcome of sample_test(): counts, the stop reason and the collision
+    estimates. Repeats within the sample say little about the design by
+    themselves: n sampled vectors of a 2**length space meet only about
+    n**2 / 2**(length + 1) of its colliding pairs (birthday effect). The
+    design estimates therefore scale the matching pairs and triples of
+    signatures by the sampling fraction; they assume uniform sampling.
+    """
+
+    def __init__(self, vectors, unique, duplicates, reason, elapsed, confidence, length=0, pairs=0, triples=0,
+                 uniform=True):
+        self.vectors = vectors
+        self.unique = unique
+        self.duplicates = duplicates
+        self.reason = reason
+        self.elapsed = elapsed
+        self.confidence = confidence
+        self.space = 2**length
+        # sampled vector pairs / triples with equal signatures
+        self.pairs = pairs
+        self.triples = triples
+        self.uniform = uniform
+
+    @property
+    def collisions(self):
+        """Sampled vectors whose signature an earlier sampled vector already had."""
+        return self.vectors - self.unique
+
+    @property
+    def sample_collision_rate(self):
+        return self.collisions / self.vectors if self.vectors else 0.0
+
+    def pair_interval(self):
+        """Wilson interval of the probability that two distinct random vectors share a signature."""
+        return wilson_interval(self.pairs, comb(self.vectors, 2), self.confidence)
+
+    def collision_bounds(self):
+        """
+        (low, high) estimates of the design's collision rate 1 - unique/2**length.
+        A class of k vectors adds k - 1 to the collisions, and
+        C(k,2) - C(k,3) <= k - 1 <= C(k,2), so the design's matching pairs
+        and triples, estimated from the sample's, bound it from both sides;
+        both are equal when no class has more than two vectors.
+        """
+        if self.vectors == self.space:
+            return (self.sample_collision_rate,) * 2
+        if self.vectors < 3:
+            return 0.0, 1.0
+        pairs = self.pairs * comb(self.space, 2) / comb(self.vectors, 2)
+        triples = self.triples * comb(self.space, 3) / comb(self.vectors, 3)
+        return max(0.0, min(1.0, (pairs - triples) / self.space)), min(1.0, pairs / self.space)
+
+    def collision_upper_bound(self):
+        """Collision rate of the design at most this, at `confidence`: C(k,2) >= k - 1 on the pair interval."""
+        if self.vectors == self.space:
+            return self.sample_collision_rate
+        return min(1.0, self.pair_interval()[1] * (self.space - 1) / 2)
+
+    def report(self, csv_filename=None):
+        if csv_filename is not None:
+            print(f"\nResults saved to: {csv_filename}")
+        print(f"Stopped: {self.reason} after {self.elapsed:.1f}s")
+        print(f"Total vectors tested: {self.vectors} ({self.duplicates} repeated draws skipped)")
+        if not self.vectors:
+            return
+        print(f"Unique signatures in the sample: {self.unique} "
+              f"({self.sample_collision_rate:.2%} of the sampled vectors repeat one)")
+        if self.vectors == self.space:
+            print(f"Collision rate: {self.sample_collision_rate:.2%} (every vector sampled)")
+            return
+        low, high = self.pair_interval()
+        print(f"Signature pairs in the sample: {self.pairs} of {comb(self.vectors, 2)} "
+              f"({self.confidence:.0%} Wilson interval of the aliasing probability {low:.3g} - {high:.3g})")
+        if not self.uniform:
+            print("Design collision rate: not estimated, the vectors were not sampled uniformly")
+            return
+        low, high = self.collision_bounds()
+        print(f"Design collision rate: estimated {low:.2%} - {high:.2%} (from signature pairs and triples), "
+              f"at most {self.collision_upper_bound():.2%} at {self.confidence:.0%} confidence")
+
+
+def batch_runner(simulator):
+    """The bit-parallel batch method of an INTEST or EXTEST simulator."""
+    if hasattr(simulator, 'run_extest_batch'):
+        return simulator.run_extest_batch
+    return simulator.run_batch
+
+
+def sample_test(simulator, vectors, csv_filename, width=DEFAULT_WIDTH, backend='int', max_vectors=None,
+                target_unique=None, plateau=None, plateau_rate=0.01, time_budget=None, confidence=0.95,
+                result_format='csv', uniform=True, precision=None):
+    """
+    Stream sampled vectors (any iterable, e.g. make_vectors()) through the
+    bit-parallel engine, `width` distinct vectors per pass, until the first
+    of: `max_vectors` tested, `target_unique` signatures seen, fewer than
+    plateau_rate * plateau new signatures over the last `plateau` vectors
+    (coverage plateau), `time_budget` seconds, the collision-rate bound at
+    `confidence` within `precision` of the pair estimate (uniform sampling
+    only), or the generator running out.
+    Repeated draws of a vector are skipped. Vectors and signatures seen are
+    kept in SeenFilters and the repeated signatures in Space-Saving counters,
+    so memory stays bounded however long the run; see SampleResult for the
+    collision estimates, which need `uniform` sampling.
+    """
+    from result_io import open_result_writer, result_header
+    from signature_stats import SeenFilter, SpaceSaving
+    print(f"\n=== Sampled Test: {width} vectors per pass ===")
+    run_batch = batch_runner(simulator)
+    vectors = iter(vectors)
+    seen_vectors = seen_signatures = None
+    repeated = SpaceSaving()
+    tested = duplicates = unique = pairs = triples = 0
+    length = 0
+    history = []   # new signatures per pass, for the plateau check
+    window_passes = -(-plateau // width) if plateau else 0
+    started = time.monotonic()
+    reason = 'generator exhausted'
+    header = None
+    out = None
+    try:
+        while True:
+            if max_vectors is not None and tested >= max_vectors:
+                reason = f'{max_vectors} vectors tested'
+                break
+            if time_budget is not None and time.monotonic() - started >= time_budget:
+                reason = f'time budget of {time_budget}s'
+                break
+            want = width if max_vectors is None else min(width, max_vectors - tested)
+            block = []
+            draws = 0
+            for vec in islice(vectors, 4 * want):
+                draws += 1
+                if seen_vectors is None:
+                    length = len(vec)
+                    seen_vectors = SeenFilter(length)
+                if not seen_vectors.add(vec):
+                    duplicates += 1
+                    continue
+                block.append(vec)
+                if len(block) == want:
+                    break
+            if not block:
+                if draws:
+                    reason = f'no new vectors in {draws} draws'
+                break
+            if out is None:
+                if result_format != 'csv':
+                    mode = 'extest' if hasattr(simulator, 'run_extest_batch') else 'intest'
+                    header = result_header(simulator, mode, len(block[0]))
+                out = open_result_writer(csv_filename, result_format, header)
+            sigs = run_batch(block, backend)
+            out.write_rows(block, sigs)
+            if seen_signatures is None:
+                seen_signatures = SeenFilter(len(sigs[0]))
+            before = unique
+            for vec, sig in zip(block, sigs):
+                if seen_signatures.add(sig):
+                    unique += 1
+                    continue
+                # c earlier vectors with this signature make c new pairs and C(c, 2) new triples
+                repeated.add(sig, vec)
+                c = repeated.entries[sig][0]
+                pairs += c
+                triples += c * (c - 1) // 2
+            tested += len(block)
+            history.append(unique - before)
+            if TRACE_SCAN.info:
+                TRACE_SCAN(f"  {tested} vectors, {unique} unique signatures")
+            if target_unique is not None and unique >= target_unique:
+                reason = f'{target_unique} unique signatures reached'
+                break
+            if precision is not None and uniform:
+                partial = SampleResult(tested, unique, duplicates, None, 0, confidence, length, pairs, triples)
+                if partial.collision_upper_bound() - partial.collision_bounds()[1] <= precision:
+                    reason = f'collision-rate bound within {precision:.2%}'
+                    break
+            if window_passes and len(history) >= window_passes:
+                recent = history[-window_passes:]
+                if sum(recent) < plateau_rate * window_passes * width:
+                    reason = f'coverage plateau (< {plateau_rate:.0%} new signatures over {plateau} vectors)'
+                    break
+    finally:
+        if out is not None:
+            out.close()
+    result = SampleResult(tested, unique, duplicates, reason, time.monotonic() - started, confidence,
+                          length=length, pairs=pairs, triples=triples, uniform=uniform)
+    result.report(csv_filename if out is not None else None)
+    return result
@@ -1,62 +1,149 @@
 # scan_chain_pipeline.py
 
 from logic_evaluator import LogicEvaluator
+from bit_parallel import BitParallelEvaluator, DEFAULT_WIDTH
 from main import VerilogScanDFT
+from itertools import islice
+from collections import defaultdict
 import random
 import csv
+import tracing
+from sweep import report_results, exhaustive_sweep
+
+TRACE_SCAN = tracing.get('scan')
 
 class ScanCell:
-    def __init__(self, name, cell_type):
+    def __init__(self, name, cell_type, chain=0):
         self.name = name
         self.cell_type = cell_type
-        self.Q = 0
-        self.D = 0
+        self.chain = chain
 
 class ScanChainSimulator:
     def __init__(self, scan_chain, evaluator: LogicEvaluator):
         # Now includes both SDFF and DFF cells in the scan chain
-        self.cells = [ScanCell(c['instance'], c['cell_type']) for c in scan_chain]
+        self.cells = [ScanCell(c['instance'], c['cell_type'], c.get('chain', 0)) for c in scan_chain]
+        # (first cell, length) of every scan chain; chains are consecutive runs of cells
+        self.chains = []
+        for j, cell in enumerate(self.cells):
+            if self.chains and self.cells[j - 1].chain == cell.chain:
+                start, length = self.chains[-1]
+                self.chains[-1] = (start, length + 1)
+            else:
+                self.chains.append((j, 1))
         self.evaluator = evaluator
         self.history = []
         self.verbose = True  # Add verbose flag
+        self.engine = None   # bit-parallel evaluator, built on first batch run
+        # chain contents as one int: bit j is the Q of cell j (cell 0 at scan-in)
+        self.state = 0
+        self.mask = (1 << len(self.cells)) - 1
+        # chain positions of every flop (non-WBC) cell, by instance name
+        self.flop_positions = defaultdict(list)
+        for j, cell in enumerate(self.cells):
+            if cell.cell_type.lower() != 'wbc':
+                self.flop_positions[cell.name].append(j)
+
+    def recording(self):
+        """Per-shift history is only kept when someone will look at it."""
+        return self.verbose or TRACE_SCAN.debug
+
+    def shift_length(self) -> int:
+        """Shift cycles of one full load or unload: all chains shift together, the longest sets the pace."""
+        return max((length for _, length in self.chains), default=0)
+
+    def chain_slices(self, vector):
+        """Part of a full vector each chain shifts in; cell j still ends up holding char n-1-j."""
+        n = len(self.cells)
+        return [vector[n - start - length:n - start] for start, length in self.chains]
+
+    def shift_chain(self, start, length, bit):
+        """One shift of a single chain; returns the bit leaving it."""
+        mask = (1 << length) - 1
+        chain = (self.state >> start) & mask
+        out = (chain >> (length - 1)) & 1
+        chain = ((chain << 1) | bit) & mask
+        self.state = (self.state & ~(mask << start)) | (chain << start)
+        return out
 
     def shift_in(self, vector):
         if self.verbose:
             print("[SHIFT-IN]")
-        for i, bit in enumerate(vector):
-            for j in reversed(range(1, len(self.cells))):
-                self.cells[j].Q = self.cells[j-1].Q
-            self.cells[0].Q = int(bit)
-            self.record_state(f"ShiftIn {i+1}")
+        if len(self.chains) > 1:
+            if not vector:
+                return
+            if len(vector) != len(self.cells):
+                # each chain takes its own slice, so a partial load has no meaning
+                raise ValueError(f"vector '{vector}' is not {len(self.cells)} bits for {len(self.chains)} scan chains")
+            if not self.recording():
+                # every chain loaded at once
+                self.state = int(vector, 2) & self.mask
+                return
+            # concurrent shift: shorter chains start late so all finish together
+            longest = self.shift_length()
+            slices = self.chain_slices(vector)
+            for cycle in range(longest):
+                for (start, length), bits in zip(self.chains, slices):
+                    offset = cycle - (longest - length)
+                    if offset >= 0:
+                        self.shift_chain(start, length, int(bits[offset]))
+                self.record_state(f"ShiftIn {cycle+1}")
+            return
+        if self.recording():
+            for i, bit in enumerate(vector):
+                self.state = ((self.state << 1) | int(bit)) & self.mask
+                self.record_state(f"ShiftIn {i+1}")
+        elif vector:
+            # a whole load in one go: the last bit shifted in ends up in cell 0
+            self.state = ((self.state << len(vector)) | int(vector, 2)) & self.mask
 
     def capture(self, se_map=None, si_map=None, reset_map=None):
         if self.verbose:
             print("[CAPTURE]")
         # Gather only real scan-FFs (exclude WBCs)
-        q_map = {cell.name: cell.Q for cell in self.cells if cell.cell_type.lower() != 'wbc'}
+        state = self.state
+        q_map = {name: (state >> positions[-1]) & 1 for name, positions in self.flop_positions.items()}
         # Use the new evaluator.capture interface
         final_q = self.evaluator.capture(q_map, cycles=1, se_map=se_map, si_map=si_map, reset_map=reset_map)
-        for cell in self.cells:
-            if cell.name in final_q:
-                cell.Q = final_q[cell.name]
+        for name, q in final_q.items():
+            for j in self.flop_positions.get(name, ()):
+                state = (state | (1 << j)) if q else (state & ~(1 << j))
+        self.state = state
         self.record_state("Capture Complete")
 
     def shift_out(self):
         if self.verbose:
             print("[SHIFT-OUT]")
+        n = len(self.cells)
+        if not self.recording():
+            # cell n-1 leaves first, so the signature is the state MSB first
+            output = format(self.state, f'0{n}b') if n else ''
+            self.state = 0
+            return output
+        if len(self.chains) > 1:
+            # concurrent shift: each chain emits its last cell first; chain k's
+            # output is the signature slice its cells map to
+            outputs = [''] * len(self.chains)
+            for cycle in range(self.shift_length()):
+                for k, (start, length) in enumerate(self.chains):
+                    if cycle < length:
+                        outputs[k] += str(self.shift_chain(start, length, 0))
+                self.record_state(f"ShiftOut {cycle+1}")
+            return ''.join(reversed(outputs))
         output = ''
-        for cycle in range(len(self.cells)):
-            out_bit = self.cells[-1].Q
-            output += str(out_bit)
-            for i in reversed(range(1, len(self.cells))):
-                self.cells[i].Q = self.cells[i-1].Q
-            self.cells[0].Q = 0
+        for cycle in range(n):
+            output += str((self.state >> (n - 1)) & 1)
+            self.state = (self.state << 1) & self.mask
             self.record_state(f"ShiftOut {cycle+1}")
         return output
 
+    def cell_values(self):
+        """Q of every cell as a '0'/'1' string, cell 0 first."""
+        n = len(self.cells)
+        return format(self.state, f'0{n}b')[::-1] if n else ''
+
     def record_state(self, label):
-        state = ''.join(str(cell.Q) for cell in self.cells)
-        self.history.append((label, state))
+        if self.recording():
+            self.history.append((label, self.cell_values()))
 
     def print_trace(self):
         if self.verbose:
@@ -68,68 +155,129 @@ class ScanChainSimulator:
         self.verbose = verbose
         self.history = []  # Clear history for each run
         
-        if verbose:
-            print(f"\n=== RUNNING SCAN CHAIN TEST: {test_vector} ===")
+        # verbose also turns the evaluator's trace on or off for this run
+        with tracing.verbosity(verbose):
+            if verbose:
+                print(f"\n=== RUNNING SCAN CHAIN TEST: {test_vector} ===")
+            
+            # --- Scan/shift-in mode ---
+            self.shift_in(test_vector)
+            # Set SE=0 for all SDFFs for functional mode
+            se_map_func = {inst: 0 for inst in self.evaluator.sdff_cells}
+            si_map_func = {inst: 0 for inst in self.evaluator.sdff_cells}
+            # --- Functional capture ---
+            self.capture(se_map=se_map_func, si_map=si_map_func)
+            # --- Scan/shift-out mode ---
+            signature = self.shift_out()
+            
+            if verbose:
+                self.print_trace()
+                print(f"\nFinal Signature: {signature}")
         
-        # --- Scan/shift-in mode ---
-        self.shift_in(test_vector)
-        # Set SE=0 for all SDFFs for functional mode
+        return signature
+
+    def shift_cycles(self, patterns) -> int:
+        """Clock cycles run() spends on `patterns` vectors: a full load, one capture and a full unload each."""
+        return patterns * (2 * self.shift_length() + 1)
+
+    def batch_engine(self, backend='int'):
+        if self.engine is None or self.engine.lanes.name != backend:
+            self.engine = BitParallelEvaluator(self.evaluator, backend=backend)
+        return self.engine
+
+    def run_batch(self, vectors, backend='int'):
+        """
+        Signatures for a block of vectors in a single bit-parallel pass.
+        Gives the same signature for each vector as run(), without the trace.
+        """
+        engine = self.batch_engine(backend)
+        words = engine.vector_words(vectors, len(self.cells))
+        return self.batch_signatures(engine, words, len(vectors))
+
+    def run_range(self, base, width, length=None, backend='int'):
+        """Signatures of the `length`-bit vectors base .. base+width-1, see run_batch()."""
+        n = len(self.cells)
+        length = n if length is None else length
+        engine = self.batch_engine(backend)
+        if length != n:
+            return self.run_batch([format(i, f'0{length}b') for i in range(base, base + width)], backend)
+        return self.batch_signatures(engine, engine.counter_words(base, width, n), width)
+
+    def batch_signatures(self, engine, words, width):
+        return engine.words_to_vectors(self.signature_words(engine, words, width), width)
+
+    def flop_words(self, words):
+        """Q word of every flop cell after a full shift-in of the vector words."""
+        n = len(self.cells)
+        # after a full shift-in cell j holds vector char n-1-j,
+        # and shift-out emits cell n-1-k as signature char k
+        return {
+            cell.name: words[n - 1 - j]
+            for j, cell in enumerate(self.cells)
+            if cell.cell_type.lower() != 'wbc'
+        }
+
+    def signature_words(self, engine, words, width):
+        """Signature word per chain position (signature char order) for the vector words of run_batch()."""
+        n = len(self.cells)
+        q_words = self.flop_words(words)
         se_map_func = {inst: 0 for inst in self.evaluator.sdff_cells}
         si_map_func = {inst: 0 for inst in self.evaluator.sdff_cells}
-        # --- Functional capture ---
-        self.capture(se_map=se_map_func, si_map=si_map_func)
-        # --- Scan/shift-out mode ---
-        signature = self.shift_out()
-        
-        if verbose:
-            self.print_trace()
-            print(f"\nFinal Signature: {signature}")
-        
-        return signature
+        final_q = engine.capture(q_words, width, cycles=1, se_map=se_map_func, si_map=si_map_func)
+        sig_words = list(words)
+        for j, cell in enumerate(self.cells):
+            if cell.name in final_q:
+                sig_words[n - 1 - j] = final_q[cell.name]
+        return sig_words
 
-def exhaustive_scan_test(simulator, chain_length):
-    print(f"\n=== Exhaustive Scan Chain Test: {2**chain_length} vectors ===")
+def batch_scan_test(simulator, vectors, csv_filename, width=DEFAULT_WIDTH, backend='int'):
+    """
+    Run any iterable of vectors (e.g. a sampled subset) through the
+    bit-parallel engine, `width` patterns per pass, into a results CSV.
+    """
+    print(f"\n=== Batch Scan Chain Test: {width} vectors per pass ===")
     results = {}
-    
-    # Create CSV file for results
-    csv_filename = f"scan_chain_results_{chain_length}bit.csv"
+    vectors = iter(vectors)
     with open(csv_filename, 'w', newline='') as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow(['Input Vector', 'Output Signature'])
-        
-        for i in range(2**chain_length):
-            vec = format(i, f'0{chain_length}b')
-            print(f"Testing vector {i+1}/{2**chain_length}: {vec}")
-            
-            # Run simulation with minimal output
-            sig = simulator.run(vec, verbose=False)
-            results[vec] = sig
-            
-            # Write to CSV
-            writer.writerow([vec, sig])
-            
-            # Print every 100th result to avoid overwhelming output
-            if (i + 1) % 100 == 0 or i < 10:
-                print(f"  {vec} -> {sig}")
-    
-    print(f"\nResults saved to: {csv_filename}")
-    print(f"Total vectors tested: {len(results)}")
-    
-    # Analyze results
-    unique_signatures = set(results.values())
-    print(f"Unique signatures: {len(unique_signatures)}")
-    print(f"Collision rate: {1 - len(unique_signatures)/len(results):.2%}")
-    
+        while True:
+            block = list(islice(vectors, width))
+            if not block:
+                break
+            sigs = simulator.run_batch(block, backend=backend)
+            for vec, sig in zip(block, sigs):
+                results[vec] = sig
+            writer.writerows(zip(block, sigs))
+            if TRACE_SCAN.info:
+                TRACE_SCAN(f"  {block[0]} -> {sigs[0]}  ({len(results)} vectors so far)")
+    report_results(results, csv_filename)
     return results
 
+def exhaustive_scan_test(simulator, chain_length, bit_parallel=True, width=DEFAULT_WIDTH, backend='int',
+                         csv_filename=None, workers=1, shard=None, stream=False,
+                         result_format='csv', index=False,
+                         checkpoint=None, resume=False):
+    """Run exhaustive test for all possible scan chain input vectors, see sweep.exhaustive_sweep()."""
+    return exhaustive_sweep(simulator, 'intest', chain_length, bit_parallel, width, backend,
+                            csv_filename, workers, shard, stream, result_format, index,
+                            checkpoint, resume)
+
 if __name__ == "__main__":
+    import argparse
+    from sharding import parse_shard
+    parser = argparse.ArgumentParser(description="Exhaustive INTEST scan chain test")
+    parser.add_argument('--shard', type=parse_shard, metavar='k/N',
+                        help="run only shard k of N (0-based) into a partial file for 'wrapsim.py merge'")
+    args = parser.parse_args()
+
     analyzer = VerilogScanDFT("./simple_counter.v")
     analyzer.run()
-    evaluator = LogicEvaluator(analyzer.ast)
+    evaluator = LogicEvaluator(analyzer.ast, design=analyzer.design)
     evaluator.build_model()
     evaluator.debug_model()
     scan_chain = analyzer.scan_chain
     simulator = ScanChainSimulator(scan_chain, evaluator)
 
     # Exhaustive test for all possible scan chain input vectors
-    exhaustive_scan_test(simulator, len(scan_chain))
+    exhaustive_scan_test(simulator, len(scan_chain), shard=args.shard)
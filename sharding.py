@@ -0,0 +1,149 @@
+# sharding.py
+
+import csv
+import json
+
+# first line of a partial result file: this prefix, then the JSON header
+SHARD_MAGIC = '# wrapsim-shard '
+SHARD_FORMAT = 1
+
+
+def parse_shard(spec):
+    """'k/N' → (k, N), with shards numbered 0 .. N-1."""
+    try:
+        k, n = (int(part) for part in str(spec).split('/'))
+    except ValueError:
+        raise ValueError(f"Bad shard spec '{spec}', expected k/N")
+    if n < 1 or not 0 <= k < n:
+        raise ValueError(f"Bad shard spec '{spec}': need 0 <= k < N")
+    return k, n
+
+
+def shard_range(count, shard, width=1):
+    """
+    (start, stop) of shard (k, N) over range(count). Shards are contiguous
+    and split on multiples of `width`, so bit-parallel blocks stay aligned.
+    """
+    k, n = shard
+    units = -(-count // width)
+    start = min(count, units * k // n * width)
+    stop = min(count, units * (k + 1) // n * width)
+    return start, stop
+
+
+def shard_filename(csv_filename, shard):
+    """results.csv → results.shard7of64.csv"""
+    k, n = shard
+    stem, dot, ext = csv_filename.rpartition('.')
+    if not dot:
+        return f"{csv_filename}.shard{k}of{n}"
+    return f"{stem}.shard{k}of{n}.{ext}"
+
+
+def shard_header(simulator, mode, length, shard, start, stop) -> dict:
+    """Everything merge_shards() needs to check that partial files belong together."""
+    from result_io import result_header
+    header = {'format': SHARD_FORMAT}
+    header.update(result_header(simulator, mode, length))
+    header.update(shard=list(shard), start=start, stop=stop)
+    return header
+
+
+def write_shard_header(csvfile, header):
+    csvfile.write(SHARD_MAGIC + json.dumps(header, separators=(',', ':')) + '\n')
+
+
+def read_shard_header(path) -> dict:
+    from result_io import is_packed, PackedResults
+    if is_packed(path):
+        with PackedResults(path) as results:
+            header = results.header
+        if 'shard' not in header:
+            raise ValueError(f"{path} is not a wrapsim shard file")
+    else:
+        with open(path, newline='') as f:
+            line = f.readline()
+        if not line.startswith(SHARD_MAGIC):
+            raise ValueError(f"{path} is not a wrapsim shard file")
+        header = json.loads(line[len(SHARD_MAGIC):])
+    if header.get('format') != SHARD_FORMAT:
+        raise ValueError(f"{path}: unsupported shard format {header.get('format')}")
+    return header
+
+
+def shard_rows(path):
+    """(vector, signature) rows of a shard file (CSV or packed), read lazily."""
+    from result_io import is_packed, PackedResults
+    if is_packed(path):
+        with PackedResults(path) as results:
+            yield from results.rows()
+        return
+    with open(path, newline='') as f:
+        f.readline()
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            yield row[0], row[1]
+
+
+def check_shards(headers):
+    """Validate a set of shard headers; returns them ordered by start."""
+    if not headers:
+        raise ValueError("No shard files to merge")
+    first = headers[0][1]
+    for path, header in headers:
+        for key in ('mode', 'design', 'chain', 'length', 'vectors'):
+            if header[key] != first[key]:
+                raise ValueError(f"{path}: {key} differs from {headers[0][0]}")
+        if header['shard'][1] != first['shard'][1]:
+            raise ValueError(f"{path}: shard count differs from {headers[0][0]}")
+    n = first['shard'][1]
+    seen = {}
+    for path, header in headers:
+        k = header['shard'][0]
+        if k in seen:
+            raise ValueError(f"Shard {k}/{n} given twice: {seen[k]} and {path}")
+        seen[k] = path
+    missing = sorted(set(range(n)) - set(seen))
+    if missing:
+        raise ValueError(f"Missing shard(s) {', '.join(f'{k}/{n}' for k in missing)}")
+    ordered = sorted(headers, key=lambda item: item[1]['start'])
+    position = 0
+    for path, header in ordered:
+        if header['start'] != position:
+            raise ValueError(f"{path}: starts at {header['start']}, expected {position}")
+        position = header['stop']
+    if position != first['vectors']:
+        raise ValueError(f"Shards end at {position}, expected {first['vectors']}")
+    return ordered
+
+
+def merge_shards(paths, csv_filename, result_format='csv', index=False):
+    """
+    Combine shard files into the final result file (same content as an
+    unsharded run). Returns (header of the first shard, SignatureStats), so
+    the unique-signature / collision summary stays in bounded memory.
+    """
+    from result_io import open_result_writer
+    from signature_stats import SignatureStats
+    ordered = check_shards([(path, read_shard_header(path)) for path in paths])
+    first = ordered[0][1]
+    stats = SignatureStats(first['length'])
+    header = None
+    if result_format != 'csv':
+        header = {key: first[key] for key in ('mode', 'design', 'chain', 'length', 'vectors')}
+    with open_result_writer(csv_filename, result_format, header, first['length'] if index else None) as out:
+        for path, part in ordered:
+            rows = 0
+            for vec, sig in shard_rows(path):
+                out.write_row(vec, sig)
+                stats.add(vec, sig)
+                rows += 1
+            if rows != part['stop'] - part['start']:
+                raise ValueError(f"{path}: {rows} rows, header says {part['stop'] - part['start']}")
+    return first, stats
+
+
+def report_merge(header, stats, csv_filename):
+    print(f"\nMerged {header['shard'][1]} {header['mode']} shard(s)")
+    stats.report(csv_filename)
@@ -0,0 +1,281 @@
+# signature_index.py
+
+import heapq
+import json
+import mmap
+import os
+import struct
+import tempfile
+from result_io import field_bytes, is_packed, PackedResults
+
+# sidecar index next to a result file: MAGIC, version, header length, record
+# and row counts, JSON header (padded to 8 bytes), then (signature, first
+# vector, count) records sorted by signature and vector; consecutive vectors
+# with the same signature share one record
+INDEX_MAGIC = b'WSSI'
+INDEX_VERSION = 1
+INDEX_PREFIX = struct.Struct('<4sHxxIQQ')
+INDEX_EXT = 'sidx'
+# (signature, vector) keys held in memory before a sorted run is spilled to disk
+RUN_ENTRIES = 1 << 20
+READ_CHUNK = 1 << 20
+
+
+def index_path(result_path):
+    return f"{result_path}.{INDEX_EXT}"
+
+
+def _read_run(path, key_bytes):
+    """Keys of one sorted run file, in order."""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(READ_CHUNK - READ_CHUNK % key_bytes)
+            if not chunk:
+                return
+            for pos in range(0, len(chunk), key_bytes):
+                yield int.from_bytes(chunk[pos:pos + key_bytes], 'big')
+
+
+class SignatureIndexBuilder:
+    """
+    Collects (vector, signature) rows as they are written and produces the
+    sorted index on close(). Memory is bounded by `run_entries` keys: full
+    runs are sorted and spilled next to the index, then k-way merged.
+    """
+
+    def __init__(self, path, length, run_entries=RUN_ENTRIES):
+        self.path = path
+        self.length = length
+        self.width = field_bytes(length)
+        self.count_bytes = field_bytes(length + 1)
+        self.key_bytes = 2 * field_bytes(length)
+        self.run_entries = run_entries
+        self.keys = []
+        self.runs = []
+        self.spill_dir = None
+
+    def add_rows(self, vecs, sigs):
+        length, keys = self.length, self.keys
+        for vec, sig in zip(vecs, sigs):
+            keys.append((int(sig, 2) << length) | int(vec, 2))
+        if len(keys) >= self.run_entries:
+            self.spill()
+
+    def spill(self):
+        if not self.keys:
+            return
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.TemporaryDirectory(prefix='wrapsim-sidx-', dir=os.path.dirname(self.path) or '.')
+        self.keys.sort()
+        run = os.path.join(self.spill_dir.name, f"run{len(self.runs)}")
+        key_bytes = self.key_bytes
+        with open(run, 'wb') as f:
+            f.write(b''.join(key.to_bytes(key_bytes, 'big') for key in self.keys))
+        self.runs.append(run)
+        self.keys = []
+
+    def sorted_keys(self):
+        if not self.runs:
+            self.keys.sort()
+            return iter(self.keys)
+        self.spill()
+        return heapq.merge(*(_read_run(run, self.key_bytes) for run in self.runs))
+
+    def close(self):
+        length, width, count_bytes = self.length, self.width, self.count_bytes
+        vec_mask = (1 << length) - 1
+        records = 0
+        rows = 0
+        buffer = bytearray()
+
+        def emit(sig, first, count):
+            buffer.extend(sig.to_bytes(width, 'big') + first.to_bytes(width, 'big')
+                          + count.to_bytes(count_bytes, 'big'))
+        header = {'length': length, 'field_bytes': width, 'count_bytes': count_bytes}
+        body = json.dumps(header, separators=(',', ':')).encode()
+        body += b' ' * (-(INDEX_PREFIX.size + len(body)) % 8)
+        with open(self.path, 'wb') as f:
+            # the prefix is rewritten with the totals once the records are known
+            f.write(INDEX_PREFIX.pack(INDEX_MAGIC, INDEX_VERSION, len(body), 0, 0) + body)
+            current = None
+            for key in self.sorted_keys():
+                sig, vec = key >> length, key & vec_mask
+                rows += 1
+                if current is not None and current[0] == sig and current[1] + current[2] == vec:
+                    current[2] += 1
+                    continue
+                if current is not None:
+                    emit(*current)
+                    records += 1
+                    if len(buffer) >= READ_CHUNK:
+                        f.write(buffer)
+                        buffer.clear()
+                current = [sig, vec, 1]
+            if current is not None:
+                emit(*current)
+                records += 1
+            f.write(buffer)
+            f.seek(0)
+            f.write(INDEX_PREFIX.pack(INDEX_MAGIC, INDEX_VERSION, len(body), records, rows))
+        self.keys = []
+        if self.spill_dir is not None:
+            self.spill_dir.cleanup()
+            self.spill_dir = None
+        return records
+
+
+class SignatureIndex:
+    """Binary search over a sidecar index through mmap."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size, self.records, self.rows = INDEX_PREFIX.unpack_from(self.mm)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            self.mm.close()
+            raise ValueError(f"{path} is not a wrapsim signature index")
+        self.offset = INDEX_PREFIX.size + size
+        header = json.loads(self.mm[INDEX_PREFIX.size:self.offset])
+        self.length = header['length']
+        self.width = header['field_bytes']
+        self.count_bytes = header['count_bytes']
+        self.record_bytes = 2 * self.width + self.count_bytes
+
+    def signature_key(self, i):
+        position = self.offset + i * self.record_bytes
+        return self.mm[position:position + self.width]
+
+    def ranges(self, sig):
+        """[(first vector, count)] of the vectors producing signature `sig` (bit string)."""
+        if len(sig) != self.length:
+            raise ValueError(f"signature '{sig}' is not {self.length} bits")
+        target = int(sig, 2).to_bytes(self.width, 'big')
+        lo, hi = 0, self.records
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.signature_key(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        found = []
+        width, mm = self.width, self.mm
+        while lo < self.records and self.signature_key(lo) == target:
+            position = self.offset + lo * self.record_bytes + width
+            first = int.from_bytes(mm[position:position + width], 'big')
+            count = int.from_bytes(mm[position + width:position + width + self.count_bytes], 'big')
+            found.append((first, count))
+            lo += 1
+        return found
+
+    def vectors(self, sig, limit=None):
+        """Vectors (bit strings) producing `sig`, at most `limit` of them."""
+        fmt = f'0{self.length}b'
+        out = []
+        for first, count in self.ranges(sig):
+            for v in range(first, first + count):
+                if limit is not None and len(out) >= limit:
+                    return out
+                out.append(format(v, fmt))
+        return out
+
+    def close(self):
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvRows:
+    """Fixed-width rows of a result CSV (every row is 'vector,signature' + newline) over mmap."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        columns = self.mm.find(b'Output Signature')
+        if columns < 0:
+            self.mm.close()
+            raise ValueError(f"{path} is not a wrapsim result file")
+        self.offset = self.mm.find(b'\n', columns) + 1
+        end = self.mm.find(b'\n', self.offset)
+        self.row = end - self.offset + 1 if end >= 0 else 1
+        self.length = self.mm.find(b',', self.offset) - self.offset
+        self.rows = (len(self.mm) - self.offset) // self.row if end >= 0 else 0
+
+    def __len__(self):
+        return self.rows
+
+    def record(self, i):
+        position = self.offset + i * self.row
+        vec = self.mm[position:position + self.length].decode()
+        sig = self.mm[position + self.length + 1:position + 2 * self.length + 1].decode()
+        return vec, sig
+
+    def __iter__(self):
+        return (self.record(i) for i in range(self.rows))
+
+    def close(self):
+        self.mm.close()
+
+
+class PackedRows:
+    """Records of a packed result file as (vector, signature) bit strings."""
+
+    def __init__(self, path):
+        self.results = PackedResults(path)
+        self.length = self.results.length
+
+    def __len__(self):
+        return len(self.results)
+
+    def record(self, i):
+        return next(self.results.rows(i, i + 1))
+
+    def __iter__(self):
+        return self.results.rows()
+
+    def close(self):
+        self.results.close()
+
+
+def open_rows(path):
+    return PackedRows(path) if is_packed(path) else CsvRows(path)
+
+
+def lookup_vector(rows, vec):
+    """
+    Signature of `vec` in a result file: binary search on the vector column
+    (exhaustive, shard and merged files are written in vector order), then a
+    linear scan for files that are not, e.g. sampled vectors.
+    """
+    lo, hi = 0, len(rows)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if rows.record(mid)[0] < vec:
+            lo = mid + 1
+        else:
+            hi = mid
+    if lo < len(rows):
+        found, sig = rows.record(lo)
+        if found == vec:
+            return sig
+    for found, sig in rows:
+        if found == vec:
+            return sig
+    return None
+
+
+def build_index(result_path, run_entries=RUN_ENTRIES):
+    """Build the sidecar index of an existing CSV or packed result file; returns its path."""
+    rows = open_rows(result_path)
+    try:
+        builder = SignatureIndexBuilder(index_path(result_path), rows.length, run_entries)
+        for vec, sig in rows:
+            builder.add_rows((vec,), (sig,))
+    finally:
+        rows.close()
+    builder.close()
+    return builder.path
@@ -0,0 +1,209 @@
+# signature_stats.py
+
+import hashlib
+import math
+
+# exact unique counting while the signature space fits in this many bits (128 MB)
+BITMAP_MAX_BITS = 2**30
+# HyperLogLog registers = 2**precision; standard error ~1.04 / sqrt(registers)
+HLL_PRECISION = 14
+# Space-Saving counters kept for the largest collision classes
+CLASS_COUNTERS = 1024
+# bits (16 MB) and hash functions of the Bloom filter of SeenFilter
+BLOOM_BITS = 2**27
+BLOOM_HASHES = 4
+
+
+class UniqueBitmap:
+    """One bit per possible signature; exact unique count for spaces up to BITMAP_MAX_BITS."""
+
+    def __init__(self, bits):
+        self.bits = bytearray((bits + 7) // 8)
+        self.count = 0
+
+    def add(self, index) -> bool:
+        """Set bit `index`; True if it was clear."""
+        byte, mask = index >> 3, 1 << (index & 7)
+        if self.bits[byte] & mask:
+            return False
+        self.bits[byte] |= mask
+        self.count += 1
+        return True
+
+
+class SeenFilter:
+    """
+    Membership of `length`-bit strings in at most `max_bits` bits: an exact
+    UniqueBitmap while 2**length fits, otherwise a Bloom filter, whose rare
+    false positives make a new string look seen.
+    """
+
+    def __init__(self, length, max_bits=BLOOM_BITS, hashes=BLOOM_HASHES):
+        self.exact = 2**length <= max_bits
+        self.bitmap = UniqueBitmap(2**length if self.exact else max_bits)
+        self.size = 2**length if self.exact else max_bits
+        self.hashes = hashes
+
+    def add(self, item: str) -> bool:
+        """Record `item`; True if it was not seen before."""
+        if self.exact:
+            return self.bitmap.add(int(item, 2))
+        x = int.from_bytes(hashlib.blake2b(item.encode(), digest_size=16).digest(), 'big')
+        h1, h2 = x >> 64, (x & ((1 << 64) - 1)) | 1
+        new = False
+        for i in range(self.hashes):
+            new |= self.bitmap.add((h1 + i * h2) % self.size)
+        return new
+
+
+class HyperLogLog:
+    """Cardinality estimate in 2**precision bytes."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, data: bytes):
+        x = int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+        j = x >> (64 - self.precision)
+        rest = x & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - rest.bit_length() + 1
+        if rank > self.registers[j]:
+            self.registers[j] = rank
+
+    def merge(self, other):
+        """Fold in another sketch of the same precision: the union of both streams."""
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge HyperLogLog precision {other.precision} into {self.precision}")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # small-range correction: linear counting
+            estimate = m * math.log(m / zeros)
+        return estimate
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters with `capacity` counters. Any signature seen
+    more than n / capacity times is guaranteed to be kept; a kept count
+    overestimates the true one by at most its error. Counters sit in
+    per-count buckets so every update is O(1).
+    """
+
+    def __init__(self, capacity=CLASS_COUNTERS):
+        self.capacity = capacity
+        self.entries = {}   # item -> [count, error, sample]
+        self.buckets = {}   # count -> set of items
+        self.min_count = 0
+
+    def _bump(self, item, entry):
+        old = entry[0]
+        bucket = self.buckets.get(old)
+        if bucket is not None:
+            bucket.discard(item)
+            if not bucket:
+                del self.buckets[old]
+                if old == self.min_count:
+                    self.min_count = old + 1
+        entry[0] = old + 1
+        self.buckets.setdefault(old + 1, set()).add(item)
+
+    def add(self, item, sample=None):
+        entry = self.entries.get(item)
+        if entry is None:
+            if len(self.entries) < self.capacity:
+                self.entries[item] = [1, 0, sample]
+                self.buckets.setdefault(1, set()).add(item)
+                self.min_count = 1
+                return
+            # evict a minimum counter; the newcomer inherits its count as error
+            low = self.min_count
+            victim = self.buckets[low].pop()
+            self.buckets[low].add(item)
+            del self.entries[victim]
+            entry = self.entries[item] = [low, low, sample]
+        self._bump(item, entry)
+
+    def top(self, n):
+        """[(item, count, error, sample)] with the largest counts first."""
+        ranked = sorted(self.entries.items(), key=lambda kv: (-kv[1][0], kv[0]))
+        return [(item, count, error, sample) for item, (count, error, sample) in ranked[:n]]
+
+
+class SignatureStats:
+    """
+    Streaming replacement for the results dict of the exhaustive drivers:
+    unique signatures and collision rate in bounded memory. Signatures are
+    `length`-bit strings; the count is exact via a bitmap while 2**length
+    bits fit in `bitmap_max_bits`, otherwise a HyperLogLog estimate. The
+    largest collision classes come from Space-Saving counters.
+    """
+
+    def __init__(self, length, bitmap_max_bits=BITMAP_MAX_BITS, precision=HLL_PRECISION,
+                 capacity=CLASS_COUNTERS):
+        self.length = length
+        self.vectors = 0
+        self.bitmap = UniqueBitmap(2**length) if 2**length <= bitmap_max_bits else None
+        self.hll = None if self.bitmap else HyperLogLog(precision)
+        self.classes = SpaceSaving(capacity)
+
+    @property
+    def exact(self) -> bool:
+        return self.bitmap is not None
+
+    def add(self, vec, sig):
+        self.vectors += 1
+        if self.bitmap is not None:
+            self.bitmap.add(int(sig, 2))
+        else:
+            self.hll.add(sig.encode())
+        self.classes.add(sig, vec)
+
+    def add_block(self, vecs, sigs):
+        for vec, sig in zip(vecs, sigs):
+            self.add(vec, sig)
+
+    @property
+    def unique(self) -> int:
+        if self.bitmap is not None:
+            return self.bitmap.count
+        return min(self.vectors, round(self.hll.estimate()))
+
+    @property
+    def collision_rate(self) -> float:
+        return 1 - self.unique / self.vectors if self.vectors else 0.0
+
+    def top_classes(self, n=5):
+        """
+        Largest collision classes as (signature, count, error, sample vector);
+        only classes guaranteed to hold more than one vector (count - error > 1).
+        """
+        return [c for c in self.classes.top(n) if c[1] - c[2] > 1]
+
+    def report(self, csv_filename=None, top=5):
+        if csv_filename is not None:
+            print(f"\nResults saved to: {csv_filename}")
+        print(f"Total vectors tested: {self.vectors}")
+        if not self.vectors:
+            return
+        if self.exact:
+            print(f"Unique signatures: {self.unique}")
+        else:
+            print(f"Unique signatures: ~{self.unique} (HyperLogLog estimate, ±{self.hll.relative_error:.1%})")
+        print(f"Collision rate: {self.collision_rate:.2%}")
+        classes = self.top_classes(top)
+        if classes:
+            print("Largest collision classes:")
+            for sig, count, error, sample in classes:
+                size = f"{count - error}-{count}" if error else f"{count}"
+                print(f"  {sig}: {size} vectors, e.g. {sample}")
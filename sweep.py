@@ -0,0 +1,155 @@
+# sweep.py
+
+from bit_parallel import DEFAULT_WIDTH
+import tracing
+
+# mode → (banner, default result file stem, trace component)
+SWEEPS = {
+    'intest': ("Exhaustive Scan Chain Test", 'scan_chain_results', 'scan'),
+    'extest': ("Exhaustive Extest Test", 'extest_results', 'extest'),
+}
+
+
+def report_results(results, csv_filename):
+    print(f"\nResults saved to: {csv_filename}")
+    print(f"Total vectors tested: {len(results)}")
+    if not results:
+        return
+
+    # Analyze results
+    unique_signatures = set(results.values())
+    print(f"Unique signatures: {len(unique_signatures)}")
+    print(f"Collision rate: {1 - len(unique_signatures)/len(results):.2%}")
+
+
+def exhaustive_sweep(simulator, mode, length, bit_parallel=True, width=DEFAULT_WIDTH, backend='int',
+                     csv_filename=None, workers=1, shard=None, stream=False,
+                     result_format='csv', index=False,
+                     checkpoint=None, resume=False):
+    """
+    Every `length`-bit vector through an INTEST (ScanChainSimulator) or
+    EXTEST (ExtestSimulator) simulator, `mode` naming which: bit-parallel
+    blocks (optionally over a worker pool) or one run per vector, into a
+    CSV or packed result file, optionally one shard of the range, with
+    bounded-memory stream statistics, an index, and checkpoint/resume.
+    """
+    title, stem, component = SWEEPS[mode]
+    trace = tracing.get(component)
+    run_vector = simulator.run if mode == 'intest' else simulator.run_extest
+    print(f"\n=== {title}: {2**length} vectors ===")
+    results = {}
+    # stream: keep no per-vector results, only bounded-memory signature statistics
+    stats = None
+    if stream:
+        from signature_stats import SignatureStats
+        stats = SignatureStats(length)
+
+    # Result file: CSV, or .wsr for result_format='packed'
+    if csv_filename is None:
+        csv_filename = f"{stem}_{length}bit.{'wsr' if result_format == 'packed' else 'csv'}"
+    # shard (k, N): only this node's slice of the vectors, into a self-describing partial file
+    start, stop = 0, 2**length
+    if shard is not None:
+        from sharding import shard_range, shard_filename, shard_header
+        start, stop = shard_range(2**length, shard, width if bit_parallel else 1)
+        csv_filename = shard_filename(csv_filename, shard)
+        print(f"Shard {shard[0]}/{shard[1]}: vectors {start}-{stop - 1}")
+
+    # checkpoint: every `checkpoint` seconds save the completed range (and stream stats) next to
+    # the result file; resume appends from the last checkpoint instead of starting over
+    ckpt = None
+    done = start
+    resumed = False
+    if checkpoint or resume:
+        from checkpoint import SweepCheckpoint
+        from result_io import result_header
+        identity = dict(result_header(simulator, mode, length), start=start, stop=stop,
+                        result_format=result_format, stream=stream)
+        ckpt = SweepCheckpoint(csv_filename, identity, checkpoint)
+    if resume:
+        state = ckpt.load()
+        if state is None:
+            print(f"No checkpoint for {csv_filename}, starting from vector {start}")
+        else:
+            done = ckpt.restore(state)
+            resumed = True
+            if stream:
+                stats = state['stats']
+            else:
+                from signature_index import open_rows
+                rows = open_rows(csv_filename)
+                results.update(rows)
+                rows.close()
+            print(f"Resuming at vector {done} ({done - start}/{stop - start} already done)")
+
+    def open_results():
+        # CSV, or bit-packed records (result_format='packed') with a header naming mode and chain order
+        from result_io import open_result_writer, result_header
+        header = None
+        if shard is not None:
+            header = shard_header(simulator, mode, length, shard, start, stop)
+        elif result_format != 'csv':
+            header = result_header(simulator, mode, length)
+        # index: sidecar signature -> vectors index built while writing, see signature_index.py
+        return open_result_writer(csv_filename, result_format, header,
+                                  length if index and not resumed else None, append=resumed)
+
+    def finish():
+        if ckpt is not None:
+            ckpt.remove()
+        if index and resumed:
+            # rows from before the restart never went through this run's index builder
+            from signature_index import build_index
+            build_index(csv_filename)
+        if stats is not None:
+            stats.report(csv_filename)
+            return stats
+        report_results(results, csv_filename)
+        return results
+
+    if bit_parallel:
+        with open_results() as out:
+            # workers > 1 shards the blocks over a process pool, merged back in order
+            from parallel_driver import signature_blocks
+            for base, block_width, sigs in signature_blocks(simulator, stop, length, width, backend=backend,
+                                                            workers=workers, start=done):
+                if trace.info:
+                    trace(f"Testing vectors {base+1}-{base+block_width}/{2**length}")
+                vecs = [format(i, f'0{length}b') for i in range(base, base + block_width)]
+                if stats is None:
+                    results.update(zip(vecs, sigs))
+                else:
+                    stats.add_block(vecs, sigs)
+                if trace.info:
+                    for i, (vec, sig) in enumerate(zip(vecs, sigs), start=base):
+                        if (i + 1) % 100 == 0 or i < 10:
+                            trace(f"  {vec} -> {sig}")
+                out.write_rows(vecs, sigs)
+                if ckpt is not None and ckpt.due():
+                    ckpt.save(out, base + block_width, stats)
+        return finish()
+
+    with open_results() as out:
+        for i in range(done, stop):
+            vec = format(i, f'0{length}b')
+            if trace.debug:
+                trace(f"Testing vector {i+1}/{2**length}: {vec}")
+
+            # Run simulation with minimal output
+            sig = run_vector(vec, verbose=False)
+            if stats is None:
+                results[vec] = sig
+            else:
+                stats.add(vec, sig)
+
+            # Write to the result file
+            out.write_row(vec, sig)
+
+            # Print every 100th result to avoid overwhelming output
+            if trace.info and ((i + 1) % 100 == 0 or i < 10):
+                trace(f"  {vec} -> {sig}")
+
+            if ckpt is not None and ckpt.due():
+                ckpt.save(out, i + 1, stats)
+
+    return finish()
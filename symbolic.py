@@ -0,0 +1,223 @@
+# symbolic.py
+
+import heapq
+from itertools import count, product
+from bdd import BDD
+
+
+def combine_histograms(a: dict, b: dict) -> dict:
+    """Class-size histogram of two independent parts: sizes multiply, signature counts multiply."""
+    out = {}
+    for size_a, count_a in a.items():
+        for size_b, count_b in b.items():
+            out[size_a * size_b] = out.get(size_a * size_b, 0) + count_a * count_b
+    return out
+
+
+class SignatureComponent:
+    """
+    Signature bits whose functions share vector bits, analysed together:
+    the relation R(y, x) = AND_i (y_i <-> F_i(x)) is built in its own manager
+    with the signature variables y ordered before the vector variables x,
+    so every path from the root through y nodes is one signature and the
+    node where it leaves the y levels is the set of vectors producing it.
+    """
+
+    def __init__(self, manager, functions, sig_bits, vec_bits):
+        self.sig_bits = sig_bits
+        self.vec_bits = vec_bits
+        m = len(sig_bits)
+        self.manager = BDD()
+        ys = [self.manager.add_var(f"y{k}") for k in sig_bits]
+        for k in vec_bits:
+            self.manager.add_var(f"v{k}")
+        var_map = {k: m + i for i, k in enumerate(vec_bits)}
+        relation = self.manager.true
+        for y, k in zip(ys, sig_bits):
+            f = manager.transfer(functions[k], self.manager, var_map)
+            relation = relation & ~(y ^ f)
+        self.relation = relation
+        self.histogram, self.largest = self._classes()
+
+    def _classes(self):
+        """({class size: signatures}, (size, signature bits) of a largest class)."""
+        bdd, m = self.manager, len(self.sig_bits)
+        x_vars = range(m, m + len(self.vec_bits))
+
+        def level(n):
+            return min(n.var, m)
+        weight = {self.relation: 1 << level(self.relation)}
+        path = {self.relation: {}}
+        # nodes in level order, so a node's weight is complete before it is expanded
+        order = count()
+        frontier = [(self.relation.var, next(order), self.relation)]
+        cuts = []
+        while frontier:
+            _, _, n = heapq.heappop(frontier)
+            if level(n) == m:
+                cuts.append(n)
+                continue
+            for bit, child in ((0, n.low), (1, n.high)):
+                ways = weight[n] << (level(child) - n.var - 1)
+                if child not in weight:
+                    weight[child] = 0
+                    path[child] = {**path[n], n.var: bit}
+                    heapq.heappush(frontier, (child.var, next(order), child))
+                weight[child] += ways
+        histogram = {}
+        largest = (0, None)
+        for cut in cuts:
+            if cut is bdd.false:
+                continue
+            size = bdd.satcount(cut, x_vars)
+            histogram[size] = histogram.get(size, 0) + weight[cut]
+            if size > largest[0]:
+                largest = (size, ''.join(str(path[cut].get(i, 0)) for i in range(m)))
+        return histogram, largest
+
+    def vectors(self, sig_bits: str):
+        """Assignments of vec_bits (tuples of 0/1) producing the signature bits `sig_bits`."""
+        m = len(self.sig_bits)
+        restricted = self.manager.restrict(self.relation, {i: int(c) for i, c in enumerate(sig_bits)})
+        return self.manager.assignments(restricted, range(m, m + len(self.vec_bits)))
+
+
+class SymbolicSignatures:
+    """
+    Every signature of a scan simulator as Boolean functions of the vector.
+    The simulator's signature_words() runs on BddLanes with vector char k as
+    BDD variable k, so signature char k is the exact function F_k(vector)
+    the bit-parallel engine computes pattern by pattern, capture and
+    combinational loops included. Signature bits are split into independent
+    components by shared support: a wrapper cell that only passes its bit
+    through is a component of its own with two signatures, and vector bits
+    no signature depends on double every class. Unique signatures, the
+    collision class histogram and vector <-> signature lookups follow
+    without enumerating the 2**N vectors.
+    """
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+        engine = simulator.batch_engine('bdd')
+        self.manager = engine.lanes.manager
+        cells = simulator.cells if hasattr(simulator, 'cells') else simulator.wbc_cells
+        self.length = len(cells)
+        words = [self.manager.add_var(f"v{k}") for k in range(self.length)]
+        self.functions = simulator.signature_words(engine, words, 1)
+        self.components = []
+        self.free_bits = []
+        self._split()
+        histogram = {1: 1}
+        for component in self.components:
+            histogram = combine_histograms(histogram, component.histogram)
+        scale = 1 << len(self.free_bits)
+        self.histogram = {size * scale: count for size, count in histogram.items()}
+
+    def _split(self):
+        """Union-find of signature bits over the vector bits in their support."""
+        parent = list(range(self.length))
+
+        def find(k):
+            while parent[k] != k:
+                parent[k] = parent[parent[k]]
+                k = parent[k]
+            return k
+        supports = [self.manager.support(f) for f in self.functions]
+        for support in supports:
+            support = sorted(support)
+            for k in support[1:]:
+                parent[find(k)] = find(support[0])
+        groups = {}
+        for k, support in enumerate(supports):
+            root = find(min(support)) if support else ('const', k)
+            groups.setdefault(root, ([], set()))
+            groups[root][0].append(k)
+            groups[root][1].update(support)
+        used = set()
+        for sig_bits, vec_bits in groups.values():
+            used |= vec_bits
+            self.components.append(SignatureComponent(self.manager, self.functions, sig_bits, sorted(vec_bits)))
+        self.free_bits = [k for k in range(self.length) if k not in used]
+
+    @property
+    def vectors(self) -> int:
+        return 2**self.length
+
+    @property
+    def unique(self) -> int:
+        return sum(self.histogram.values())
+
+    @property
+    def collision_rate(self) -> float:
+        return 1 - self.unique / self.vectors
+
+    def signature(self, vec) -> str:
+        """Signature of one vector, as run() / run_extest() would give it."""
+        if len(vec) != self.length:
+            raise ValueError(f"vector '{vec}' is not {self.length} bits")
+        assignment = [int(c) for c in vec]
+        return ''.join(str(self.manager.evaluate(f, assignment)) for f in self.functions)
+
+    def class_size(self, sig) -> int:
+        """Number of vectors producing `sig` (0 when it can't occur)."""
+        size = 1 << len(self.free_bits)
+        for component in self.components:
+            restricted = component.manager.restrict(
+                component.relation, {i: int(sig[k]) for i, k in enumerate(component.sig_bits)})
+            m = len(component.sig_bits)
+            size *= component.manager.satcount(restricted, range(m, m + len(component.vec_bits)))
+        return size
+
+    def vectors_for(self, sig, limit=None):
+        """Vectors producing `sig`, sorted, at most `limit` of them."""
+        if len(sig) != self.length:
+            raise ValueError(f"signature '{sig}' is not {self.length} bits")
+        choices = []
+        for component in self.components:
+            found = []
+            for bits in component.vectors(''.join(sig[k] for k in component.sig_bits)):
+                found.append(bits)
+                if limit is not None and len(found) >= limit:
+                    break
+            if not found:
+                return []
+            choices.append((component.vec_bits, found))
+        free = product((0, 1), repeat=len(self.free_bits))
+        if limit is not None:
+            free = (bits for _, bits in zip(range(limit), free))
+        choices.append((self.free_bits, list(free)))
+        out = []
+        for parts in product(*(found for _, found in choices)):
+            vec = ['0'] * self.length
+            for (vec_bits, _), bits in zip(choices, parts):
+                for k, bit in zip(vec_bits, bits):
+                    vec[k] = str(bit)
+            out.append(''.join(vec))
+            if limit is not None and len(out) >= limit:
+                break
+        return sorted(out)
+
+    def largest_class(self):
+        """(size, signature) of a largest collision class."""
+        sig = ['0'] * self.length
+        size = 1 << len(self.free_bits)
+        for component in self.components:
+            part, bits = component.largest
+            size *= part
+            for k, c in zip(component.sig_bits, bits):
+                sig[k] = c
+        return size, ''.join(sig)
+
+    def report(self, top=5):
+        print(f"Vectors: 2^{self.length}" + (f" = {self.vectors}" if self.length <= 64 else ""))
+        print(f"Signature components: {len(self.components)} "
+              f"(largest {max((len(c.vec_bits) for c in self.components), default=0)} vector bits), "
+              f"{len(self.free_bits)} vector bits ignored")
+        print(f"Unique signatures: {self.unique}")
+        print(f"Collision rate: {self.collision_rate:.2%}")
+        print("Collision classes (vectors per signature: signatures):")
+        for size in sorted(self.histogram, reverse=True)[:top]:
+            print(f"  {size}: {self.histogram[size]}")
+        size, sig = self.largest_class()
+        if size > 1:
+            print(f"Largest collision class: {sig} ({size} vectors, e.g. {self.vectors_for(sig, 1)[0]})")
@@ -0,0 +1,47 @@
+#tests/conftest.py
+
+import contextlib
+import io
+import os
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the cocotb testbenches run under a simulator (see the Makefiles), not plain pytest
+try:
+    import cocotb  # noqa: F401
+except ImportError:
+    collect_ignore = ['test_scan.py', 'test_extest.py']
+
+
+@pytest.fixture(autouse=True, scope='session')
+def design_cache_dir(tmp_path_factory):
+    # keep the design cache out of the user's home directory
+    os.environ['WRAPSIM_CACHE_DIR'] = str(tmp_path_factory.mktemp('cache'))
+
+
+def netlist(name):
+    return os.path.join(REPO, name)
+
+
+@pytest.fixture
+def intest():
+    """intest_simulator() for a netlist of the repo, without the build chatter."""
+    from wrapsim import intest_simulator
+
+    def build(name, **options):
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulator = intest_simulator(netlist(name), **options)
+        simulator.verbose = False
+        return simulator
+    return build
+
+
+@pytest.fixture
+def extest():
+    from wrapsim import extest_simulator
+
+    def build(name, **options):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return extest_simulator(netlist(name), **options)
+    return build
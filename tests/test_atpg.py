@@ -0,0 +1,63 @@
+#tests/test_atpg.py
+
+import random
+import pytest
+import atpg
+
+NETLISTS = ['simple_counter.v', 'net.v', 'net1.v']
+
+
+def targets(gen):
+    fsim = gen.fsim
+    return [f for f in fsim.collapsed.simulated if fsim.is_observable(f)]
+
+
+def detects(gen, fault, vector):
+    return fault in gen.fsim.simulate([fault], [vector], 1)
+
+
+@pytest.mark.parametrize('name', NETLISTS)
+def test_podem_vectors_detect_their_target(intest, name):
+    gen = atpg.TestGenerator(intest(name))
+    n = len(gen.simulator.cells)
+    exhaustive = gen.fsim.detections(targets(gen), [format(i, f'0{n}b') for i in range(2**n)])
+    rng = random.Random(0)
+    for fault in targets(gen):
+        outcome = gen.podem(fault)
+        if outcome.status == 'detected':
+            # any fill of the cube's free bits is a test
+            assert detects(gen, fault, gen.vector(outcome.cube, 'zero'))
+            assert detects(gen, fault, gen.vector(outcome.cube, 'random', rng))
+        else:
+            assert outcome.status == 'redundant'
+            assert fault not in exhaustive
+
+
+@pytest.mark.parametrize('name', NETLISTS)
+def test_secondary_targets_extend_the_cube(intest, name):
+    gen = atpg.TestGenerator(intest(name))
+    faults = targets(gen)
+    primary = gen.podem(faults[0])
+    assert primary.status == 'detected'
+    extended = 0
+    for fault in faults[1:]:
+        outcome = gen.podem(fault, fixed=primary.cube)
+        if outcome.status != 'detected':
+            continue
+        assert outcome.cube.items() >= primary.cube.items()
+        vector = gen.vector(outcome.cube, 'zero')
+        assert detects(gen, faults[0], vector) and detects(gen, fault, vector)
+        extended += 1
+    assert extended
+
+
+@pytest.mark.parametrize('name', NETLISTS)
+def test_atpg_reaches_exhaustive_coverage(intest, name):
+    simulator = intest(name)
+    gen = atpg.TestGenerator(simulator)
+    n = len(simulator.cells)
+    exhaustive = gen.fsim.run([format(i, f'0{n}b') for i in range(2**n)])
+    result = gen.run()
+    assert set(result.fault_result.detected) == set(exhaustive.detected)
+    assert not result.aborted
+    assert len(result.patterns) < 2**n
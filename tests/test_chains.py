@@ -0,0 +1,59 @@
+#tests/test_chains.py
+
+import random
+import pytest
+from main import balance_chains
+
+
+def vectors(n, count=32, seed=0):
+    rng = random.Random(seed)
+    return [format(rng.getrandbits(n), f'0{n}b') for _ in range(count)]
+
+
+@pytest.mark.parametrize('chains', [2, 3, 5])
+def test_multi_chain_run_matches_batch(intest, chains):
+    simulator = intest('simple_counter.v', chains=chains)
+    assert len(simulator.chains) == chains
+    batch_vectors = vectors(len(simulator.cells))
+    batch = simulator.run_batch(batch_vectors)
+    for vec, sig in zip(batch_vectors, batch):
+        assert simulator.run(vec, verbose=False) == sig
+        # the cycle-by-cycle concurrent shift gives the same signature
+        assert simulator.run(vec, verbose=True) == sig
+
+
+@pytest.mark.parametrize('chains', [1, 2, 3, 5])
+def test_shift_cycles_follow_longest_chain(intest, chains):
+    simulator = intest('simple_counter.v', chains=chains)
+    longest = max(length for _, length in simulator.chains)
+    assert sum(length for _, length in simulator.chains) == len(simulator.cells)
+    assert longest - min(length for _, length in simulator.chains) <= 1
+    assert simulator.shift_length() == longest
+    assert simulator.shift_cycles(10) == 10 * (2 * longest + 1)
+
+
+def test_single_chain_keeps_reference_signatures(intest):
+    single = intest('simple_counter.v')
+    assert single.chains == [(0, len(single.cells))]
+    assert single.run('101010101010', verbose=False) == '101001101010'
+
+
+def test_multi_chain_rejects_partial_vectors(intest):
+    simulator = intest('simple_counter.v', chains=2)
+    with pytest.raises(ValueError):
+        simulator.shift_in('101')
+    state = simulator.state
+    simulator.shift_in('')
+    assert simulator.state == state
+
+
+def test_clock_domains_stay_apart():
+    flops = [{'cell_type': 'dffrx1', 'instance': f'r{i}'} for i in range(7)]
+    wbcs = [{'cell_type': 'WBC', 'instance': f'w{i}'} for i in range(3)]
+    clocks = {f'r{i}': 'clk2' if i % 3 == 0 else 'clk' for i in range(7)}
+    chains = balance_chains(wbcs[:2], flops, wbcs[2:], 3, clocks)
+    assert sorted(len(chain) for chain in chains) == [3, 3, 4]
+    for chain in chains:
+        assert len({clocks[c['instance']] for c in chain if c['instance'] in clocks}) <= 1
+    with pytest.raises(ValueError):
+        balance_chains([], flops, [], 1, clocks)
@@ -0,0 +1,80 @@
+#tests/test_checkpoint.py
+
+import os
+import pytest
+from checkpoint import SweepCheckpoint, checkpoint_path
+from scan_chain_pipeline import exhaustive_scan_test
+from signature_index import index_path
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt(monkeypatch, simulator, method, after):
+    """Make simulator.<method> fail on call `after`, checkpointing only every other block."""
+    original = getattr(simulator, method)
+    calls = []
+
+    def run(*args, **kwargs):
+        calls.append(1)
+        if len(calls) > after:
+            raise Interrupted()
+        return original(*args, **kwargs)
+    monkeypatch.setattr(simulator, method, run)
+    due = []
+    # every other due() is a checkpoint, so the rows after the last one get written and cut back
+    monkeypatch.setattr(SweepCheckpoint, 'due', lambda self: due.append(1) or len(due) % 2 == 0)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('bit_parallel', [True, False])
+@pytest.mark.parametrize('result_format', ['csv', 'packed'])
+def test_resumed_sweep_equals_uninterrupted(intest, tmp_path, monkeypatch, bit_parallel, result_format):
+    simulator = intest('simple_counter.v')
+    n = len(simulator.cells)
+    options = dict(bit_parallel=bit_parallel, width=64, result_format=result_format, index=True)
+    whole = str(tmp_path / 'whole')
+    expected = exhaustive_scan_test(simulator, n, csv_filename=whole, **options)
+
+    path = str(tmp_path / 'resumed')
+    with monkeypatch.context() as m:
+        interrupt(m, simulator, 'run_range' if bit_parallel else 'run', 11 if bit_parallel else 700)
+        with pytest.raises(Interrupted):
+            exhaustive_scan_test(simulator, n, csv_filename=path, checkpoint=1, **options)
+    assert os.path.exists(checkpoint_path(path))
+    assert exhaustive_scan_test(simulator, n, csv_filename=path, resume=True, **options) == expected
+    assert read(path) == read(whole)
+    assert read(index_path(path)) == read(index_path(whole))
+    assert not os.path.exists(checkpoint_path(path))
+
+
+def test_resumed_stream_stats_equal_uninterrupted(intest, tmp_path, monkeypatch):
+    simulator = intest('net.v')
+    n = len(simulator.cells)
+    whole = exhaustive_scan_test(simulator, n, width=32, stream=True, csv_filename=str(tmp_path / 'whole'))
+    path = str(tmp_path / 'resumed')
+    with monkeypatch.context() as m:
+        interrupt(m, simulator, 'run_range', 40)
+        with pytest.raises(Interrupted):
+            exhaustive_scan_test(simulator, n, width=32, stream=True, csv_filename=path, checkpoint=1)
+    resumed = exhaustive_scan_test(simulator, n, width=32, stream=True, csv_filename=path, resume=True)
+    assert (resumed.vectors, resumed.unique) == (whole.vectors, whole.unique)
+    assert resumed.top_classes(5) == whole.top_classes(5)
+    assert read(path) == read(str(tmp_path / 'whole'))
+
+
+def test_checkpoint_of_another_sweep_is_refused(intest, tmp_path, monkeypatch):
+    simulator = intest('simple_counter.v')
+    n = len(simulator.cells)
+    path = str(tmp_path / 'r.csv')
+    with monkeypatch.context() as m:
+        interrupt(m, simulator, 'run_range', 3)
+        with pytest.raises(Interrupted):
+            exhaustive_scan_test(simulator, n, width=64, csv_filename=path, checkpoint=1)
+    with pytest.raises(ValueError, match='result_format'):
+        exhaustive_scan_test(simulator, n, width=64, csv_filename=path, result_format='packed', resume=True)
@@ -0,0 +1,41 @@
+#tests/test_collapse.py
+
+import random
+import pytest
+from faultsim import FaultSimulator
+
+NETLISTS = ['simple_counter.v', 'net.v', 'net1.v']
+
+
+def exhaustive(n):
+    return [format(i, f'0{n}b') for i in range(2**n)]
+
+
+@pytest.mark.parametrize('name', NETLISTS)
+@pytest.mark.parametrize('count', [3, 40, None])
+def test_collapsed_coverage_equals_full(intest, name, count):
+    simulator = intest(name)
+    n = len(simulator.cells)
+    if count is None:
+        vecs = exhaustive(n)
+    else:
+        rng = random.Random(count)
+        vecs = [format(rng.getrandbits(n), f'0{n}b') for _ in range(count)]
+    full = FaultSimulator(simulator).run(vecs)
+    collapsed = FaultSimulator(simulator, collapse=True).run(vecs)
+    assert collapsed.simulated < full.simulated
+    assert set(collapsed.detected) == set(full.detected)
+    assert collapsed.coverage == full.coverage
+
+
+@pytest.mark.parametrize('name', NETLISTS)
+def test_classes_and_dominance_hold_exhaustively(intest, name):
+    fsim = FaultSimulator(intest(name), collapse=True)
+    masks = fsim.detections(fsim.faults, exhaustive(len(fsim.simulator.cells)))
+    collapsed = fsim.collapsed
+    for fault, rep in collapsed.representative.items():
+        # equivalent faults are detected by exactly the same vectors
+        assert masks.get(fault, 0) == masks.get(rep, 0)
+    for dropped, kept in collapsed.dominates.items():
+        # every test of the kept fault also detects the dropped one
+        assert masks.get(kept, 0) & ~masks.get(dropped, 0) == 0
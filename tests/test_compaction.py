@@ -0,0 +1,36 @@
+#tests/test_compaction.py
+
+import random
+import pytest
+from compaction import COMPACTION_METHODS, compact_patterns, cube_masks, merge_cubes
+from faultsim import FaultSimulator
+
+
+def vectors(n, count=300, seed=2):
+    rng = random.Random(seed)
+    return [format(rng.getrandbits(n), f'0{n}b') for _ in range(count)]
+
+
+@pytest.mark.parametrize('name', ['simple_counter.v', 'net.v', 'net1.v'])
+@pytest.mark.parametrize('method', COMPACTION_METHODS)
+@pytest.mark.parametrize('collapse', [False, True])
+def test_compaction_keeps_detected_faults(intest, name, method, collapse):
+    fsim = FaultSimulator(intest(name), collapse=collapse)
+    vecs = vectors(len(fsim.simulator.cells))
+    result = compact_patterns(fsim, vecs, method)
+    assert len(result.patterns) < len(vecs)
+    assert set(result.patterns) <= set(vecs)
+    assert set(result.after.detected) == set(result.before.detected)
+    assert set(result.before.detected) == set(FaultSimulator(fsim.simulator).run(vecs).detected)
+
+
+def test_merged_cubes_contain_every_cube():
+    rng = random.Random(3)
+    cubes = [''.join(rng.choice('01XXX') for _ in range(10)) for _ in range(40)]
+    merged = merge_cubes(cubes)
+    assert len(merged) < len(cubes)
+    masks = [cube_masks(m) for m in merged]
+    for cube in cubes:
+        care, value = cube_masks(cube)
+        # some merged cube specifies every care bit of this one, to the same value
+        assert any(m_care & care == care and (m_value ^ value) & care == 0 for m_care, m_value in masks)
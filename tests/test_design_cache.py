@@ -0,0 +1,66 @@
+#tests/test_design_cache.py
+
+import os
+import stat
+import pytest
+import tracing
+from design_cache import DesignCache, default_cache, load_design
+from tests.conftest import netlist
+
+
+@pytest.fixture
+def design_trace():
+    tracing.configure(components={'design': 'debug'})
+    yield
+    tracing.reset()
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_entries_are_private_and_counted(tmp_path):
+    cache = DesignCache(str(tmp_path / 'cache'))
+    name = netlist('simple_counter.v')
+    load_design(name, cache=cache)
+    assert cache.stats() == {'hits': 0, 'misses': 1, 'stores': 1, 'evictions': 0}
+    assert mode(cache.directory) == 0o700
+    entry = cache.path(cache.key(name, os.path.join(os.path.dirname(name), 'lib_cells.v')))
+    assert mode(entry) == 0o600
+    ast, design = load_design(name, cache=cache)
+    assert ast is None and design.model_state is not None
+    assert cache.stats()['hits'] == 1
+
+
+def test_shared_directories_are_not_unpickled(tmp_path):
+    cache = DesignCache(str(tmp_path / 'cache'))
+    name = netlist('simple_counter.v')
+    load_design(name, cache=cache)
+    os.chmod(cache.directory, 0o777)
+    other = DesignCache(cache.directory)
+    load_design(name, cache=other)
+    # parsed again instead of trusting an entry anyone could have replaced
+    assert other.stats() == {'hits': 0, 'misses': 1, 'stores': 1, 'evictions': 0}
+    # storing took the directory back to private, so the next run may use it
+    assert mode(other.directory) == 0o700
+    again = DesignCache(cache.directory)
+    load_design(name, cache=again)
+    assert again.stats()['hits'] == 1
+
+
+def test_counters_go_to_the_design_trace(tmp_path, capsys, design_trace):
+    cache = DesignCache(str(tmp_path / 'cache'))
+    load_design(netlist('net.v'), cache=cache)
+    load_design(netlist('net.v'), cache=cache)
+    out = capsys.readouterr().out
+    assert 'hits 0, misses 1, stores 1, evictions 0' in out
+    assert 'hits 1, misses 1, stores 1, evictions 0' in out
+
+
+def test_load_design_shares_one_default_cache():
+    before = default_cache().stats()
+    load_design(netlist('net1.v'))
+    load_design(netlist('net1.v'))
+    after = default_cache().stats()
+    assert after['hits'] + after['misses'] - before['hits'] - before['misses'] == 2
+    assert after['hits'] > before['hits']
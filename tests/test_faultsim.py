@@ -0,0 +1,56 @@
+#tests/test_faultsim.py
+
+import random
+import pytest
+from faultsim import FaultSimulator
+
+
+def vectors(n, count=200, seed=1):
+    rng = random.Random(seed)
+    return [format(rng.getrandbits(n), f'0{n}b') for _ in range(count)]
+
+
+def resimulate(fsim, vector, fault=None):
+    """Captured D values for one vector: every driven net re-evaluated in order, the fault in place."""
+    ev = fsim.evaluator
+    values = fsim.good_values([vector])   # only the undriven nets (chain Qs, constants) are kept
+    if fault is not None and fault.reader is None:
+        values[fault.net] = fault.value
+    for idx in ev.order:
+        pins = [values[dep] for dep in fsim.fanin[idx]]
+        if fault is not None and idx == fault.reader:
+            pins[fault.pin] = fault.value
+        func = fsim.functions.get(idx)
+        values[idx] = func(1, *pins) if func is not None else pins[0]
+        if fault is not None and fault.reader is None and idx == fault.net:
+            values[idx] = fault.value
+    captured = {inst: values[d] for inst, d in fsim.observed.items()}
+    if fault is not None and isinstance(fault.reader, str) and fault.reader in captured:
+        captured[fault.reader] = fault.value
+    return captured
+
+
+@pytest.mark.parametrize('name', ['simple_counter.v', 'net.v', 'net1.v'])
+def test_detections_match_naive_resimulation(intest, name):
+    fsim = FaultSimulator(intest(name))
+    assert not fsim.evaluator.loop_groups
+    vecs = vectors(len(fsim.simulator.cells))
+    good = [resimulate(fsim, vec) for vec in vecs]
+    expected = {}
+    for fault in fsim.faults:
+        for p, vec in enumerate(vecs):
+            if resimulate(fsim, vec, fault) != good[p]:
+                expected[fault] = p
+                break
+    # dropping at the first detecting pattern, whatever the block width
+    assert fsim.run(vecs, width=64).detected == expected
+    assert fsim.run(vecs, width=7).detected == expected
+    masks = fsim.detections(fsim.faults, vecs, width=64)
+    assert {fault: (mask & -mask).bit_length() - 1 for fault, mask in masks.items()} == expected
+
+
+def test_unobservable_faults_are_never_detected(intest):
+    fsim = FaultSimulator(intest('simple_counter.v'))
+    result = fsim.run(vectors(len(fsim.simulator.cells)))
+    assert not set(result.unobservable) & set(result.detected)
+    assert result.coverage == len(result.detected) / len(fsim.faults)
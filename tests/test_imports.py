@@ -0,0 +1,57 @@
+#tests/test_imports.py
+
+import os
+import subprocess
+import sys
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# only loaded by the subcommands that actually need them
+HEAVY_MODULES = ['numpy', 'matplotlib', 'graphviz', 'tabulate', 'pyverilog']
+# only loaded once a subcommand runs, not to build the parser
+SUBCOMMAND_MODULES = ['atpg', 'bit_parallel', 'checkpoint', 'compaction', 'sharding']
+
+
+def loaded_modules(code, modules=HEAVY_MODULES):
+    """Modules of `modules` present in sys.modules after running `code` in a fresh interpreter."""
+    probe = code + f"\nimport sys\nprint('loaded:' + ','.join(m for m in {modules!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, '-c', probe], cwd=REPO, capture_output=True, text=True, check=True)
+    last = out.stdout.splitlines()[-1]
+    return [m for m in last[len('loaded:'):].split(',') if m]
+
+
+def test_entry_points_import_light():
+    code = "import wrapsim, main, extest_mode, scan_chain_pipeline, extest_simulator, design_cache"
+    assert loaded_modules(code) == []
+
+
+def test_cli_parser_imports_light():
+    assert loaded_modules("import wrapsim; wrapsim.build_parser()") == []
+    assert loaded_modules("import wrapsim; wrapsim.build_parser()", SUBCOMMAND_MODULES) == []
+
+
+def test_cli_defaults_resolve_in_the_subcommands():
+    import wrapsim
+    from bit_parallel import DEFAULT_WIDTH
+    from compaction import COMPACTION_METHODS
+    parser = wrapsim.build_parser()
+    args = parser.parse_args(['exhaustive', 'intest', '--shard', '1/4'])
+    assert args.shard == (1, 4) and args.width is None and args.checkpoint is None
+    assert wrapsim.block_width(args) == DEFAULT_WIDTH
+    assert wrapsim.block_width(parser.parse_args(['sample', 'intest', '--width', '64'])) == 64
+    assert parser.parse_args(['atpg']).backtrack_limit is None
+    method = next(a for a in parser._subparsers._group_actions[0].choices['compact']._actions if a.dest == 'method')
+    assert tuple(method.choices) == COMPACTION_METHODS
+    with pytest.raises(SystemExit):
+        parser.parse_args(['exhaustive', 'intest', '--shard', '4/4'])
+
+
+def test_cached_design_skips_pyverilog(tmp_path):
+    # first run reads and caches the netlist, the second loads it from the cache
+    code = (f"import os; os.environ['WRAPSIM_CACHE_DIR'] = {str(tmp_path)!r}\n"
+            "from design_cache import load_design\n"
+            "ast, design = load_design('simple_counter.v')\n"
+            "assert ast is None and design.model_state is not None")
+    loaded_modules(code)
+    assert loaded_modules(code) == []
@@ -0,0 +1,66 @@
+#tests/test_next_state.py
+
+import random
+import pytest
+from logic_evaluator import NextStateTable
+
+NETLISTS = ['simple_counter.v', 'net.v', 'net1.v']
+
+
+def vectors(n, count=300, seed=4):
+    rng = random.Random(seed)
+    return [format(rng.getrandbits(n), f'0{n}b') for _ in range(count)]
+
+
+@pytest.mark.parametrize('name', NETLISTS)
+def test_intest_table_matches_plain_capture(intest, name):
+    plain = intest(name)
+    tabled = intest(name, next_state=True)
+    for vec in vectors(len(plain.cells)):
+        assert tabled.run(vec, verbose=False) == plain.run(vec, verbose=False)
+    tables = tabled.evaluator.next_state_tables
+    assert tables, "captures never went through a NextStateTable"
+    for table in tables.values():
+        assert table.hits > 0
+        assert table.misses <= 2**len(table.flops)
+
+
+def test_extest_table_matches_plain_capture(extest):
+    plain = extest('simple_counter.v')
+    tabled = extest('simple_counter.v', next_state=True)
+    plain.verbose = tabled.verbose = False
+    n = len(plain.wbc_cells)
+    for i in range(2**n):
+        vec = format(i, f'0{n}b')
+        assert tabled.run_extest(vec, verbose=False) == plain.run_extest(vec, verbose=False)
+    assert tabled.left_evaluator.next_state_tables
+
+
+@pytest.mark.parametrize('name', NETLISTS)
+@pytest.mark.parametrize('cycles', [1, 3])
+def test_lru_and_flat_table_agree_with_capture(intest, name, cycles):
+    evaluator = intest(name).evaluator
+    flops = tuple(sorted(evaluator.sdff_cells | evaluator.dff_cells))
+    flat = NextStateTable(evaluator, flops)
+    lru = NextStateTable(evaluator, flops, table_bits=0, lru_size=4)
+    assert flat.table is not None and lru.lru is not None
+    rng = random.Random(cycles)
+    for _ in range(100):
+        q = {inst: rng.getrandbits(1) for inst in flops}
+        expected = evaluator.capture(q, cycles)
+        for table in (flat, lru):
+            word = table.word(q)
+            for _ in range(cycles):
+                word = table.next(word)
+            assert table.state(word) == expected
+    assert len(lru.lru) <= 4
+
+
+def test_table_size_tunables_are_read_at_construction(intest, monkeypatch):
+    import logic_evaluator
+    evaluator = intest('simple_counter.v').evaluator
+    flops = tuple(sorted(evaluator.sdff_cells | evaluator.dff_cells))
+    monkeypatch.setattr(logic_evaluator, 'NEXT_STATE_TABLE_BITS', 0)
+    monkeypatch.setattr(logic_evaluator, 'NEXT_STATE_LRU_SIZE', 3)
+    table = NextStateTable(evaluator, flops)
+    assert table.table is None and table.lru_size == 3
@@ -0,0 +1,45 @@
+#tests/test_parallel.py
+
+import parallel_driver
+from parallel_driver import SignaturePool, signature_blocks
+
+
+def all_blocks(simulator, length, workers, width=64):
+    return list(signature_blocks(simulator, 2**length, length, width, workers=workers))
+
+
+def test_two_workers_match_one_intest(intest):
+    simulator = intest('simple_counter.v')
+    n = len(simulator.cells)
+    assert all_blocks(simulator, n, 2) == all_blocks(simulator, n, 1)
+
+
+def test_two_workers_match_one_extest(extest):
+    simulator = extest('simple_counter.v')
+    simulator.verbose = False
+    n = len(simulator.wbc_cells)
+    assert all_blocks(simulator, n, 2, width=16) == all_blocks(simulator, n, 1, width=16)
+
+
+def test_start_offset_matches(intest):
+    simulator = intest('net.v')
+    n = len(simulator.cells)
+    serial = all_blocks(simulator, n, 1, width=8)
+    resumed = list(signature_blocks(simulator, 2**n, n, 8, workers=2, start=16))
+    assert resumed == [block for block in serial if block[0] >= 16]
+
+
+def worker_model():
+    evaluator = parallel_driver._worker.left_evaluator
+    if evaluator.order is None:
+        evaluator.build_model()
+    return [type(getattr(evaluator, name)).__name__ for name in evaluator.MODEL_ARRAYS + ('drive_kind',)]
+
+
+def test_workers_index_the_shared_arrays(extest, capfd):
+    simulator = extest('simple_counter.v')
+    with SignaturePool(simulator, workers=2) as pool:
+        kinds = pool.executor.submit(worker_model).result()
+    assert set(kinds) == {'memoryview'}
+    # rebuilding the simulator in a worker prints nothing
+    assert capfd.readouterr().out == ''
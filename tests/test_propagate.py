@@ -0,0 +1,87 @@
+#tests/test_propagate.py
+
+import csv
+import random
+import pytest
+from tests.conftest import netlist
+from logic_evaluator import LogicEvaluator
+
+MODES = LogicEvaluator.PROPAGATE_MODES
+
+
+def reference(name):
+    with open(netlist(name), newline='') as f:
+        return {row[0]: row[1] for row in list(csv.reader(f))[1:]}
+
+
+def sample(n, count=64, seed=0):
+    rng = random.Random(seed)
+    return [format(rng.getrandbits(n), f'0{n}b') for _ in range(count)]
+
+
+def test_compiled_is_the_default():
+    assert LogicEvaluator(None).propagate_mode == 'compiled'
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_intest_captures_match_reference(intest, mode):
+    simulator = intest('simple_counter.v', propagate_mode=mode)
+    expected = reference('scan_chain_results_12bit.csv')
+    for vec in sample(len(simulator.cells)):
+        assert simulator.run(vec, verbose=False) == expected[vec]
+    # the serial capture really ran the generated code
+    assert (simulator.evaluator.compiled is not None) == (mode == 'compiled')
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_extest_captures_match_reference(extest, mode):
+    simulator = extest('simple_counter.v', propagate_mode=mode)
+    expected = reference('extest_results_8bit.csv')
+    for vec in sample(len(simulator.wbc_cells)):
+        assert simulator.run_extest(vec, verbose=False) == expected[vec]
+
+
+@pytest.mark.parametrize('name', ['net.v', 'net1.v'])
+def test_modes_agree(intest, name):
+    signatures = {}
+    for mode in MODES:
+        simulator = intest(name, propagate_mode=mode)
+        signatures[mode] = [simulator.run(vec, verbose=False) for vec in sample(len(simulator.cells))]
+    assert all(sigs == signatures['levelized'] for sigs in signatures.values())
+
+
+def deep_netlist(path, stages=31):
+    """`stages` inverters from a to y (deeper than the old 10-sweep cap), then a NAND latch set by y, reset by b."""
+    chain = ['a'] + [f"c{k}" for k in range(1, stages)] + ['y']
+    # written output first, so no single sweep in file order settles the chain
+    cells = [f"  CLKINVX1 i{k} (.A ({chain[k]}), .Y ({chain[k + 1]}));" for k in reversed(range(stages))]
+    path.write_text("module deep(a, b, q, qn);\n"
+                    "  input a, b;\n  output q, qn;\n"
+                    f"  wire {', '.join(chain[1:])};\n" + "\n".join(cells) + "\n"
+                    "  NAND2XL l0 (.A (y), .B (qn), .Y (q));\n"
+                    "  NAND2XL l1 (.A (b), .B (q), .Y (qn));\n"
+                    "endmodule\n")
+    return str(path)
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_deep_paths_and_loops_settle(tmp_path, mode):
+    from verilog_reader import read_design
+    _, design = read_design(deep_netlist(tmp_path / 'deep.v'))
+    evaluator = LogicEvaluator(None, propagate_mode=mode, design=design)
+    evaluator.build_model()
+    assert max(evaluator.levels) > evaluator.max_iterations
+    assert len(evaluator.loop_at) == 1
+    # (a, b) → (y, q, qn): a=1 sets the latch through the chain, b=0 resets it, a=0 b=1 holds
+    steps = [((1, 1), (0, 1, 0)), ((0, 1), (1, 1, 0)), ((0, 0), (1, 0, 1)), ((0, 1), (1, 0, 1)),
+             ((1, 1), (0, 1, 0))]
+    got = []
+    for (a, b), _ in steps:
+        evaluator.set_primary_inputs({'a': a, 'b': b})
+        evaluator.propagate()
+        got.append((evaluator.signal_values['y'], evaluator.signal_values['q'], evaluator.signal_values['qn']))
+    if mode == 'iterative':
+        # the unit-delay sweep stops after max_iterations, short of the chain's depth
+        assert got != [expected for _, expected in steps]
+    else:
+        assert got == [expected for _, expected in steps]
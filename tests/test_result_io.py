@@ -0,0 +1,68 @@
+#tests/test_result_io.py
+
+import random
+import pytest
+from result_io import (PackedResults, field_bytes, is_packed, open_result_writer, packed_to_csv,
+                       result_header)
+from scan_chain_pipeline import exhaustive_scan_test
+from extest_simulator import exhaustive_extest_test
+
+
+def read_csv(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_exhaustive_csv_wsr_csv_round_trip(intest, tmp_path):
+    simulator = intest('simple_counter.v')
+    n = len(simulator.cells)
+    results = exhaustive_scan_test(simulator, n, csv_filename=str(tmp_path / 'r.csv'))
+    exhaustive_scan_test(simulator, n, csv_filename=str(tmp_path / 'r.wsr'), result_format='packed')
+    assert is_packed(tmp_path / 'r.wsr') and not is_packed(tmp_path / 'r.csv')
+    assert packed_to_csv(str(tmp_path / 'r.wsr'), str(tmp_path / 'back.csv')) == 2**n
+    assert read_csv(tmp_path / 'back.csv') == read_csv(tmp_path / 'r.csv')
+    with PackedResults(str(tmp_path / 'r.wsr')) as packed:
+        assert packed.header['mode'] == 'intest'
+        assert packed.header['chain'] == [cell.name for cell in simulator.cells]
+        assert dict(packed.rows()) == results
+        assert list(packed.rows(5, 8)) == [(format(i, f'0{n}b'), results[format(i, f'0{n}b')]) for i in (5, 6, 7)]
+
+
+def test_packed_numpy_view(intest, tmp_path):
+    pytest.importorskip('numpy')
+    simulator = intest('simple_counter.v')
+    n = len(simulator.cells)
+    results = exhaustive_scan_test(simulator, n, csv_filename=str(tmp_path / 'r.wsr'), result_format='packed')
+    with PackedResults(str(tmp_path / 'r.wsr')) as packed:
+        array = packed.array()
+        assert [int(v) for v in array['vector'][:4]] == [0, 1, 2, 3]
+        assert [int(s) for s in array['signature']] == [int(results[format(i, f'0{n}b')], 2) for i in range(2**n)]
+
+
+def test_extest_round_trip(extest, tmp_path):
+    simulator = extest('simple_counter.v')
+    simulator.verbose = False
+    n = len(simulator.wbc_cells)
+    exhaustive_extest_test(simulator, n, csv_filename=str(tmp_path / 'e.csv'))
+    exhaustive_extest_test(simulator, n, csv_filename=str(tmp_path / 'e.wsr'), result_format='packed')
+    packed_to_csv(str(tmp_path / 'e.wsr'), str(tmp_path / 'back.csv'))
+    assert read_csv(tmp_path / 'back.csv') == read_csv(tmp_path / 'e.csv')
+
+
+@pytest.mark.parametrize('length', [1, 8, 9, 33, 64, 65, 130])
+def test_packed_rows_any_width(intest, tmp_path, length):
+    header = dict(result_header(intest('simple_counter.v'), 'intest', 12), length=length)
+    rng = random.Random(length)
+    rows = [(format(rng.getrandbits(length), f'0{length}b'), format(rng.getrandbits(length), f'0{length}b'))
+            for _ in range(100)]
+    path = str(tmp_path / 'x.wsr')
+    with open_result_writer(path, 'packed', header) as out:
+        out.write_rows(*zip(*rows[:60]))
+    # appending continues the same records
+    with open_result_writer(path, 'packed', header, append=True) as out:
+        for vec, sig in rows[60:]:
+            out.write_row(vec, sig)
+    with PackedResults(path) as packed:
+        assert packed.width == field_bytes(length)
+        assert len(packed) == len(rows)
+        assert list(packed.rows()) == rows
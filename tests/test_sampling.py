@@ -0,0 +1,129 @@
+#tests/test_sampling.py
+
+import csv
+from itertools import islice
+import pytest
+from sampling import (SampleResult, make_vectors, sample_test, stratified_vectors, uniform_vectors,
+                      weighted_vectors, wilson_interval)
+from signature_stats import BLOOM_BITS, SeenFilter
+
+
+def draw(generator, count):
+    return list(islice(generator, count))
+
+
+def rows(path):
+    with open(path, newline='') as f:
+        return {row[0]: row[1] for row in list(csv.reader(f))[1:]}
+
+
+def test_generators_are_reproducible():
+    for name in ('uniform', 'weighted', 'stratified'):
+        first = draw(make_vectors(name, 20, seed=3, p_one=0.3), 50)
+        assert first == draw(make_vectors(name, 20, seed=3, p_one=0.3), 50)
+        assert first != draw(make_vectors(name, 20, seed=4, p_one=0.3), 50)
+        assert all(len(vec) == 20 and set(vec) <= {'0', '1'} for vec in first)
+    with pytest.raises(ValueError):
+        make_vectors('gray', 8)
+
+
+def test_weighted_and_stratified_vectors():
+    assert set(draw(weighted_vectors(6, 0.0, seed=1), 10)) == {'000000'}
+    assert set(draw(weighted_vectors(6, 1.0, seed=1), 10)) == {'111111'}
+    # per-bit weights, first char first
+    assert set(draw(weighted_vectors(3, [1, 0, 1], seed=1), 10)) == {'101'}
+    with pytest.raises(ValueError):
+        draw(weighted_vectors(3, [0.5, 0.5]), 1)
+    # every round of 2**strata_bits vectors covers each leading-bit prefix once
+    vectors = draw(stratified_vectors(10, strata_bits=3, seed=2), 8 * 5)
+    for k in range(5):
+        assert sorted(vec[:3] for vec in vectors[8 * k:8 * (k + 1)]) == [format(p, '03b') for p in range(8)]
+    assert draw(uniform_vectors(12, seed=7), 5) == draw(make_vectors('uniform', 12, seed=7), 5)
+
+
+def test_wilson_interval_known_values():
+    assert wilson_interval(0, 10) == pytest.approx((0.0, 0.27753), abs=1e-5)
+    assert wilson_interval(5, 10) == pytest.approx((0.23659, 0.76341), abs=1e-5)
+    # all successes: the lower end is n / (n + z**2), z = 2.5758 at 99%
+    assert wilson_interval(10, 10, 0.99) == pytest.approx((0.60115, 1.0), abs=1e-5)
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+
+
+def test_seen_filter_is_bounded():
+    exact = SeenFilter(8)
+    assert exact.exact and exact.add('00000001') and not exact.add('00000001')
+    bloom = SeenFilter(64, max_bits=2**16)
+    assert not bloom.exact and len(bloom.bitmap.bits) == 2**13
+    vectors = draw(uniform_vectors(64, seed=0), 1000)
+    assert all(bloom.add(vec) for vec in vectors)
+    assert not any(bloom.add(vec) for vec in vectors)
+    assert SeenFilter(64).size == BLOOM_BITS
+
+
+def test_sample_is_reproducible_and_skips_repeats(intest, tmp_path):
+    simulator = intest('simple_counter.v')
+    n = len(simulator.cells)
+    for name in ('a.csv', 'b.csv'):
+        sample_test(simulator, make_vectors('uniform', n, seed=5), str(tmp_path / name), width=64, max_vectors=300)
+    assert (tmp_path / 'a.csv').read_bytes() == (tmp_path / 'b.csv').read_bytes()
+    sampled = rows(tmp_path / 'a.csv')
+    assert len(sampled) == 300
+    assert list(sampled.values()) == simulator.run_batch(list(sampled))
+    # a finite iterable with repeats: each vector is tested once, the repeats are counted
+    vectors = ['0' * n, '1' * n, '0' * n, '01' * (n // 2), '1' * n]
+    result = sample_test(simulator, vectors, str(tmp_path / 'c.csv'), width=64, max_vectors=10)
+    assert (result.vectors, result.duplicates, result.reason) == (3, 2, 'generator exhausted')
+    assert list(rows(tmp_path / 'c.csv')) == ['0' * n, '1' * n, '01' * (n // 2)]
+
+
+def test_stop_conditions(intest, tmp_path):
+    simulator = intest('simple_counter.v')
+    n = len(simulator.cells)
+    path = str(tmp_path / 's.csv')
+
+    def run(**stop):
+        return sample_test(simulator, make_vectors('uniform', n, seed=1), path, width=64, **stop)
+    result = run(max_vectors=100)
+    assert result.vectors == 100 and result.reason == '100 vectors tested'
+    result = run(target_unique=100)
+    assert result.unique >= 100 and result.vectors == 128 and 'unique signatures reached' in result.reason
+    result = run(time_budget=0)
+    assert result.vectors == 0 and result.reason.startswith('time budget')
+    result = run(plateau=256, plateau_rate=0.7)
+    assert result.reason.startswith('coverage plateau') and result.vectors < 2**n
+    result = run(precision=0.1)
+    assert result.reason.startswith('collision-rate bound') and result.vectors < 2**n
+    assert result.collision_upper_bound() - result.collision_bounds()[1] <= 0.1
+    # the whole space: the rate is exact
+    every = (format(i, f'0{n}b') for i in range(2**n))
+    result = sample_test(simulator, every, path, width=64, max_vectors=2**n + 1)
+    assert result.vectors == 2**n and result.reason == 'generator exhausted'
+    assert result.collision_bounds() == (0.25, 0.25) and result.collision_upper_bound() == 0.25
+
+
+def test_design_rate_is_bracketed_not_the_sample_rate(intest, tmp_path):
+    # exhaustively, simple_counter.v has 3072 of 4096 signatures unique: a 25% collision rate
+    simulator = intest('simple_counter.v')
+    n = len(simulator.cells)
+    bounds = []
+    for seed in range(5):
+        result = sample_test(simulator, make_vectors('uniform', n, seed=seed), str(tmp_path / 's.csv'), width=256,
+                             max_vectors=1024)
+        bounds.append(result.collision_bounds())
+        assert result.collision_bounds()[1] <= result.collision_upper_bound()
+        # birthday effect: the repeats within a quarter of the space are far below the design's rate
+        assert result.sample_collision_rate < 0.15
+    # the bounds are estimates: their means bracket the exhaustive rate
+    assert sum(low for low, _ in bounds) / 5 <= 0.25 <= sum(high for _, high in bounds) / 5
+
+
+def test_estimates_need_uniform_sampling(capsys):
+    result = SampleResult(1000, 990, 0, 'test', 0.0, 0.95, length=20, pairs=10, triples=0, uniform=False)
+    result.report()
+    assert 'not estimated' in capsys.readouterr().out
+    # pairs only: both bounds are 10 * C(2**20, 2) / C(10000, 2) pairs per vector
+    uniform = SampleResult(10000, 9990, 0, 'test', 0.0, 0.95, length=20, pairs=10, triples=0)
+    low, high = uniform.collision_bounds()
+    assert low == high == pytest.approx(10 * (2**20 - 1) / (10000 * 9999))
+    assert uniform.collision_upper_bound() > high
+
@@ -0,0 +1,109 @@
+#tests/test_sharding.py
+
+import pytest
+from extest_simulator import exhaustive_extest_test
+from scan_chain_pipeline import exhaustive_scan_test
+from result_io import PackedResults, open_result_writer
+from sharding import SHARD_FORMAT, merge_shards, parse_shard, read_shard_header, shard_filename, shard_range
+from signature_index import index_path
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def sweep(simulator, mode, **options):
+    if mode == 'intest':
+        return exhaustive_scan_test(simulator, len(simulator.cells), **options)
+    return exhaustive_extest_test(simulator, len(simulator.wbc_cells), **options)
+
+
+@pytest.mark.parametrize('mode', ['intest', 'extest'])
+@pytest.mark.parametrize('shard_format', ['csv', 'packed'])
+@pytest.mark.parametrize('result_format', ['csv', 'packed'])
+@pytest.mark.parametrize('count', [1, 3, 7])
+@pytest.mark.parametrize('bit_parallel', [True, False])
+def test_merged_shards_equal_a_single_run(intest, extest, tmp_path, mode, shard_format, result_format, count,
+                                          bit_parallel):
+    if mode == 'intest':
+        simulator = intest('simple_counter.v')
+    else:
+        simulator = extest('simple_counter.v')
+        simulator.verbose = False
+    single = str(tmp_path / 'single')
+    expected = sweep(simulator, mode, csv_filename=single, width=16, result_format=result_format, index=True)
+    base = str(tmp_path / 'part.out')
+    paths = []
+    # shards given to the merge in any order
+    for k in reversed(range(count)):
+        sweep(simulator, mode, csv_filename=base, width=16, shard=(k, count), result_format=shard_format,
+              bit_parallel=bit_parallel)
+        paths.append(shard_filename(base, (k, count)))
+    merged = str(tmp_path / 'merged')
+    header, stats = merge_shards(paths, merged, result_format, index=True)
+    assert header['mode'] == mode
+    assert read(merged) == read(single)
+    assert read(index_path(merged)) == read(index_path(single))
+    assert (stats.vectors, stats.unique) == (len(expected), len(set(expected.values())))
+
+
+def test_merge_rejects_incomplete_or_mixed_shards(intest, tmp_path):
+    simulator = intest('simple_counter.v')
+    base = str(tmp_path / 'p.csv')
+    for k in range(3):
+        sweep(simulator, 'intest', csv_filename=base, shard=(k, 3))
+    paths = [shard_filename(base, (k, 3)) for k in range(3)]
+    with pytest.raises(ValueError, match='Missing shard'):
+        merge_shards(paths[:2], str(tmp_path / 'm.csv'))
+    with pytest.raises(ValueError, match='given twice'):
+        merge_shards(paths + paths[:1], str(tmp_path / 'm.csv'))
+    other = intest('net.v')
+    sweep(other, 'intest', csv_filename=str(tmp_path / 'o.csv'), shard=(2, 3))
+    with pytest.raises(ValueError, match='design differs'):
+        merge_shards(paths[:2] + [shard_filename(str(tmp_path / 'o.csv'), (2, 3))], str(tmp_path / 'm.csv'))
+
+
+
+@pytest.mark.parametrize('shard_format', ['csv', 'packed'])
+def test_merge_rejects_other_shard_formats(intest, tmp_path, shard_format):
+    simulator = intest('simple_counter.v')
+    base = str(tmp_path / 'p.out')
+    for k in range(2):
+        sweep(simulator, 'intest', csv_filename=base, shard=(k, 2), result_format=shard_format)
+    paths = [shard_filename(base, (k, 2)) for k in range(2)]
+    # rewrite the second shard as if by another shard format version
+    header = dict(read_shard_header(paths[1]), format=SHARD_FORMAT + 1)
+    if shard_format == 'packed':
+        with PackedResults(paths[1]) as results:
+            rows = list(results.rows())
+        with open_result_writer(paths[1], 'packed', header) as out:
+            out.write_rows(*zip(*rows))
+    else:
+        with open(paths[1]) as f:
+            lines = f.readlines()
+        with open(paths[1], 'w') as f:
+            f.write(lines[0].replace(f'"format":{SHARD_FORMAT}', f'"format":{SHARD_FORMAT + 1}'))
+            f.writelines(lines[1:])
+    merged = tmp_path / 'merged.wsr'
+    with pytest.raises(ValueError, match='unsupported shard format'):
+        merge_shards(paths, str(merged), 'packed')
+    assert not merged.exists()
+
+@pytest.mark.parametrize('count', [1, 5, 100, 4097])
+@pytest.mark.parametrize('n', [1, 3, 64])
+def test_shard_ranges_tile_the_vectors(count, n):
+    position = 0
+    for k in range(n):
+        start, stop = shard_range(count, (k, n), width=8)
+        assert start == position and start <= stop
+        assert start % 8 == 0 or start == count
+        position = stop
+    assert position == count
+
+
+def test_parse_shard():
+    assert parse_shard('2/5') == (2, 5)
+    for bad in ('5/5', '-1/3', '1', 'a/b', '0/0'):
+        with pytest.raises(ValueError):
+            parse_shard(bad)
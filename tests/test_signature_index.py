@@ -0,0 +1,73 @@
+#tests/test_signature_index.py
+
+import os
+import random
+import pytest
+from result_io import open_result_writer, result_header
+from scan_chain_pipeline import exhaustive_scan_test
+from signature_index import SignatureIndex, build_index, index_path, lookup_vector, open_rows
+
+
+def classes(results):
+    out = {}
+    for vec, sig in sorted(results.items()):
+        out.setdefault(sig, []).append(vec)
+    return out
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('result_format', ['csv', 'packed'])
+def test_index_lookups_match_the_sweep(intest, tmp_path, result_format):
+    simulator = intest('net.v')
+    n = len(simulator.cells)
+    path = str(tmp_path / ('r.csv' if result_format == 'csv' else 'r.wsr'))
+    results = exhaustive_scan_test(simulator, n, csv_filename=path, result_format=result_format, index=True)
+    expected = classes(results)
+    with SignatureIndex(index_path(path)) as index:
+        assert index.rows == 2**n
+        for sig, vecs in expected.items():
+            assert index.vectors(sig) == vecs
+            assert sum(count for _, count in index.ranges(sig)) == len(vecs)
+            assert index.vectors(sig, limit=1) == vecs[:1]
+        missing = next(format(i, f'0{n}b') for i in range(2**n) if format(i, f'0{n}b') not in expected)
+        assert index.vectors(missing) == []
+    inline = read(index_path(path))
+    # rebuilding from the result file, also through spilled sorted runs, gives the same index
+    os.remove(index_path(path))
+    build_index(path)
+    assert read(index_path(path)) == inline
+    build_index(path, run_entries=100)
+    assert read(index_path(path)) == inline
+    rows = open_rows(path)
+    try:
+        for vec in random.Random(0).sample(sorted(results), 50):
+            assert lookup_vector(rows, vec) == results[vec]
+        assert lookup_vector(rows, '1' * (n + 1)) is None
+    finally:
+        rows.close()
+
+
+def test_lookup_in_unsorted_files(intest, tmp_path):
+    simulator = intest('simple_counter.v')
+    n = len(simulator.cells)
+    rng = random.Random(5)
+    vecs = [format(rng.getrandbits(n), f'0{n}b') for _ in range(200)]
+    vecs = list(dict.fromkeys(vecs))
+    sigs = simulator.run_batch(vecs)
+    for path, header in ((tmp_path / 's.csv', None), (tmp_path / 's.wsr', result_header(simulator, 'intest', n))):
+        result_format = 'csv' if header is None else 'packed'
+        with open_result_writer(str(path), result_format, header, index_length=n) as out:
+            out.write_rows(vecs, sigs)
+        rows = open_rows(str(path))
+        try:
+            for vec, sig in zip(vecs, sigs):
+                assert lookup_vector(rows, vec) == sig
+        finally:
+            rows.close()
+        with SignatureIndex(index_path(str(path))) as index:
+            for sig, members in classes(dict(zip(vecs, sigs))).items():
+                assert index.vectors(sig) == members
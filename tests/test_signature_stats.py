@@ -0,0 +1,95 @@
+#tests/test_signature_stats.py
+
+import random
+from collections import Counter
+import pytest
+from signature_stats import HyperLogLog, SignatureStats, SpaceSaving
+
+
+def signatures(count, length=40, seed=0):
+    """`count` distinct `length`-bit signatures."""
+    return [format(x, f'0{length}b') for x in random.Random(seed).sample(range(2**length), count)]
+
+
+def skewed(n, classes=500, seed=0):
+    """(vector, signature) pairs where signature k is drawn with weight 1 / (k + 1)."""
+    rng = random.Random(seed)
+    sigs = [format(k, '016b') for k in range(classes)]
+    drawn = rng.choices(sigs, weights=[1 / (k + 1) for k in range(classes)], k=n)
+    return [(format(i, '020b'), sig) for i, sig in enumerate(drawn)]
+
+
+def test_exact_bitmap_counts():
+    stream = skewed(5000)
+    stats = SignatureStats(16)
+    for vec, sig in stream:
+        stats.add(vec, sig)
+    unique = len({sig for _, sig in stream})
+    assert stats.exact and stats.unique == unique
+    assert stats.collision_rate == pytest.approx(1 - unique / len(stream))
+
+
+def test_large_spaces_switch_to_hyperloglog(capsys):
+    sigs = signatures(20000)
+    # the bitmap is kept while 2**length bits fit
+    assert SignatureStats(12, bitmap_max_bits=2**12).exact and not SignatureStats(13, bitmap_max_bits=2**12).exact
+    stats = SignatureStats(40, bitmap_max_bits=2**12, precision=12)
+    assert not stats.exact and stats.bitmap is None
+    # each signature twice: 40000 vectors, 20000 unique
+    for k, sig in enumerate(sigs + sigs):
+        stats.add(format(k, '016b'), sig)
+    assert stats.vectors == 40000
+    assert abs(stats.unique / 20000 - 1) <= 3 * stats.hll.relative_error
+    stats.report()
+    assert 'HyperLogLog estimate' in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('count', [50, 1000, 30000])
+@pytest.mark.parametrize('precision', [10, 14])
+def test_hyperloglog_within_its_error(count, precision):
+    hll = HyperLogLog(precision)
+    for sig in signatures(count, seed=count):
+        hll.add(sig.encode())
+    assert abs(hll.estimate() / count - 1) <= 3 * hll.relative_error
+
+
+def test_hyperloglog_merge_is_the_union():
+    sigs = signatures(12000, seed=3)
+    left, right, union = HyperLogLog(12), HyperLogLog(12), HyperLogLog(12)
+    for sig in sigs[:8000]:
+        left.add(sig.encode())
+    for sig in sigs[4000:]:
+        right.add(sig.encode())
+    for sig in sigs:
+        union.add(sig.encode())
+    left.merge(right)
+    assert left.registers == union.registers
+    assert abs(left.estimate() / 12000 - 1) <= 3 * left.relative_error
+    with pytest.raises(ValueError):
+        left.merge(HyperLogLog(10))
+
+
+def test_space_saving_against_exact_counts():
+    stream = skewed(20000)
+    exact = Counter(sig for _, sig in stream)
+    counters = SpaceSaving(capacity=64)
+    for vec, sig in stream:
+        counters.add(sig, vec)
+    top = counters.top(64)
+    kept = {sig for sig, _, _, _ in top}
+    # every signature above n / capacity is kept, with the true count inside [count - error, count]
+    assert {sig for sig, n in exact.items() if n > len(stream) / 64} <= kept
+    for sig, count, error, sample in top:
+        assert count - error <= exact[sig] <= count
+        assert sample in {vec for vec, s in stream if s == sig}
+    # the heavy head of the distribution comes out in the exact order
+    assert [sig for sig, _, _, _ in counters.top(5)] == [sig for sig, _ in exact.most_common(5)]
+
+
+def test_top_classes_only_guaranteed_collisions():
+    stats = SignatureStats(16, capacity=4)
+    stream = [('a', '01'), ('b', '01'), ('c', '01'), ('d', '10'), ('e', '11'), ('f', '00'), ('g', '10')]
+    for vec, sig in stream:
+        stats.add(vec, sig)
+    classes = stats.top_classes(4)
+    assert [(sig, count - error) for sig, count, error, _ in classes] == [('01', 3), ('10', 2)]
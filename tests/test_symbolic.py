@@ -0,0 +1,71 @@
+#tests/test_symbolic.py
+
+import sys
+from collections import Counter
+import pytest
+from bdd import BDD
+from symbolic import SymbolicSignatures
+
+
+def enumerate_classes(simulator, length):
+    vecs = [format(i, f'0{length}b') for i in range(2**length)]
+    if hasattr(simulator, 'cells'):
+        sigs = simulator.run_batch(vecs)
+    else:
+        sigs = simulator.run_extest_batch(vecs)
+    classes = {}
+    for vec, sig in zip(vecs, sigs):
+        classes.setdefault(sig, []).append(vec)
+    return classes
+
+
+def check(symbolic, classes):
+    assert symbolic.unique == len(classes)
+    assert symbolic.histogram == dict(Counter(len(vecs) for vecs in classes.values()))
+    size, sig = symbolic.largest_class()
+    assert size == max(len(vecs) for vecs in classes.values()) == len(classes[sig])
+    for sig, vecs in list(classes.items())[:50]:
+        assert symbolic.class_size(sig) == len(vecs)
+        assert symbolic.vectors_for(sig) == vecs
+        assert symbolic.vectors_for(sig, limit=2) == vecs[:2]
+        assert symbolic.signature(vecs[-1]) == sig
+
+
+@pytest.mark.parametrize('name', ['simple_counter.v', 'net.v', 'net1.v'])
+def test_intest_statistics_match_enumeration(intest, name):
+    simulator = intest(name)
+    check(SymbolicSignatures(simulator), enumerate_classes(simulator, len(simulator.cells)))
+
+
+def test_intest_reference_classes(intest):
+    symbolic = SymbolicSignatures(intest('simple_counter.v'))
+    assert symbolic.unique == 3072
+    assert symbolic.histogram == {4: 256, 2: 256, 1: 2560}
+
+
+def test_extest_statistics_match_enumeration(extest):
+    simulator = extest('simple_counter.v')
+    simulator.verbose = False
+    check(SymbolicSignatures(simulator), enumerate_classes(simulator, len(simulator.wbc_cells)))
+
+
+def test_deep_bdds_leave_the_recursion_limit_alone():
+    limit = sys.getrecursionlimit()
+    n = 3 * limit
+    bdd = BDD()
+    xs = [bdd.add_var() for _ in range(n)]
+    parity = bdd.false
+    for x in reversed(xs):
+        parity = x ^ parity
+    assert sys.getrecursionlimit() == limit
+    assert bdd.size(parity) == 2 * n + 1
+    assert bdd.satcount(parity, range(n)) == 2**(n - 1)
+    assert bdd.restrict(parity, {0: 1}) is ~bdd.restrict(parity, {0: 0})
+    assert bdd.exists(parity, [n - 1]) is bdd.true
+    other = BDD()
+    for _ in range(n):
+        other.add_var()
+    copy = bdd.transfer(parity, other, {i: i for i in range(n)})
+    assert other.satcount(copy, range(n)) == 2**(n - 1)
+    first = next(bdd.assignments(parity, range(n)))
+    assert first == (0,) * (n - 1) + (1,)
@@ -0,0 +1,78 @@
+#tests/test_verilog_reader.py
+
+import shutil
+import pytest
+from design_db import DesignDatabase
+from tests.conftest import netlist
+from verilog_reader import StructuralReader, UnsupportedVerilog, read_design
+
+# comments between every token, escaped names, positional flop ports, bus bits and constant assigns
+TRICKY = r"""
+// header comment
+module leaf(a, b, y); /* block
+   comment */ input a, b; output y;
+  NAND2XL g1 (.A (a), .B (b), .Y (y)); // trailing
+endmodule
+module top(clk, se, d, q);
+  input clk, se; input [1:0] d; output [1:0] q;
+  wire [1:0] n; wire t0, t1;
+  leaf \u0/x  (.a (d[0]), .b (d[1]), .y (t0)), u1 (.a (t0), .b (se), .y (t1));
+  SDFFRX1 \q_reg[0]  (t1, se, n[0], clk, 1'b1, q[0]);
+  DFFX1 \q_reg[1]  (n[1], clk, 1'b1, q[1]);
+  assign n[0] = t0;
+  assign n[1] = 1'b0;
+endmodule
+"""
+
+# pyverilog's own reader for the pure-structural files has no behavioural lib_cells.v
+STRUCTURAL = ['net.v', 'net1.v', 'scan_chain.v', 'simple_counter.v']
+
+
+@pytest.fixture(scope='module')
+def pyverilog_db():
+    """DesignDatabase.from_ast of pyverilog's parse of some Verilog text, without the iverilog preprocessor."""
+    pytest.importorskip('pyverilog')
+    from pyverilog.vparser.parser import VerilogParser
+    parser = VerilogParser()
+    return lambda text: DesignDatabase.from_ast(parser.parse(text))
+
+
+def text(name):
+    with open(netlist(name)) as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('name', STRUCTURAL)
+def test_streamed_design_matches_pyverilog(pyverilog_db, name):
+    ast, db = read_design(netlist(name))
+    assert ast is None
+    assert db.state() == pyverilog_db(text(name)).state()
+
+
+def test_comments_escapes_and_positional_ports(pyverilog_db, tmp_path):
+    path = tmp_path / 'tricky.v'
+    path.write_text(TRICKY)
+    ast, db = read_design(str(path))
+    assert ast is None
+    assert db.state() == pyverilog_db(TRICKY).state()
+    assert db.scan_flops == [('sdffrx1', '\\q_reg[0]')] and db.flipflops == [('dffx1', '\\q_reg[1]')]
+    assert (db.d_inputs['\\q_reg[0]'], db.se_inputs['\\q_reg[0]'], db.si_inputs['\\q_reg[0]']) == ('t1', 'se', 'n[0]')
+    assert (db.d_inputs['\\q_reg[1]'], db.q_outputs['\\q_reg[1]']) == ('n[1]', 'q[1]')
+
+
+@pytest.mark.parametrize('construct', ['reg r;', 'always @(posedge a) y = b;', 'assign y = a & b;',
+                                       'parameter W = 2;'])
+def test_unsupported_constructs_are_refused(construct):
+    source = f"module m(a, b, y); input a, b; output y; {construct} endmodule"
+    with pytest.raises(UnsupportedVerilog):
+        StructuralReader(source.encode()).read()
+
+
+@pytest.mark.skipif(shutil.which('iverilog') is None, reason="pyverilog preprocesses files with iverilog")
+def test_behavioural_netlist_falls_back_to_pyverilog(pyverilog_db):
+    # the cell library models flops with `reg` and `always`
+    with pytest.raises(UnsupportedVerilog):
+        StructuralReader(text('lib_cells.v').encode()).read()
+    ast, db = read_design(netlist('lib_cells.v'))
+    assert ast is not None
+    assert db.state() == pyverilog_db(text('lib_cells.v')).state()
@@ -0,0 +1,123 @@
+# tracing.py
+
+import os
+from contextlib import contextmanager
+
+# trace levels, each including the ones before it
+OFF, INFO, DEBUG, TRACE = 0, 1, 2, 3
+LEVELS = {'off': OFF, 'info': INFO, 'debug': DEBUG, 'trace': TRACE}
+
+# components with their own tracer:
+#   design    - netlist reading and the design cache
+#   model     - LogicEvaluator.build_model() / levelize()
+#   propagate - every net evaluation, loop settling and propagate sweep
+#   flops     - LogicEvaluator.simulate_flops()
+#   capture   - LogicEvaluator.capture() cycles
+#   scan      - ScanChainSimulator and the INTEST drivers
+#   extest    - ExtestSimulator and the EXTEST drivers
+#   fault     - fault simulation, collapsing and test generation
+COMPONENTS = ('design', 'model', 'propagate', 'flops', 'capture', 'scan', 'extest', 'fault')
+
+_level = INFO
+_component_levels = {}
+_tracers = {}
+
+
+class Tracer:
+    """
+    Trace output for one component. The info/debug/trace attributes are
+    plain bools, recomputed only when the configuration changes, so a
+    disabled call site costs a single attribute test and never builds
+    its message:
+
+        if TRACE.debug:
+            TRACE(f"expensive {message}")
+    """
+
+    def __init__(self, component):
+        self.component = component
+        self.update()
+
+    def update(self):
+        self.level = _component_levels.get(self.component, _level)
+        self.info = self.level >= INFO
+        self.debug = self.level >= DEBUG
+        self.trace = self.level >= TRACE
+
+    def __call__(self, message):
+        print(message)
+
+
+def get(component) -> Tracer:
+    """The shared tracer of a component (see COMPONENTS)."""
+    tracer = _tracers.get(component)
+    if tracer is None:
+        tracer = _tracers[component] = Tracer(component)
+    return tracer
+
+
+def parse_level(name) -> int:
+    if isinstance(name, int):
+        return name
+    try:
+        return LEVELS[name.strip().lower()]
+    except KeyError:
+        raise ValueError(f"Unknown trace level '{name}' (expected one of {', '.join(LEVELS)})")
+
+
+def configure(spec=None, level=None, components=None):
+    """
+    Set the default level and per-component levels, either from a spec
+    string like "info,propagate=trace,flops=off" or from keyword arguments.
+    Per-component levels take precedence over the default and over scoped().
+    """
+    global _level
+    if spec:
+        for item in spec.split(','):
+            if not item.strip():
+                continue
+            if '=' in item:
+                component, name = item.split('=', 1)
+                _component_levels[component.strip()] = parse_level(name)
+            else:
+                _level = parse_level(item)
+    if level is not None:
+        _level = parse_level(level)
+    for component, name in (components or {}).items():
+        _component_levels[component] = parse_level(name)
+    _refresh()
+
+
+def reset():
+    """Back to the default: INFO everywhere, no per-component levels."""
+    global _level
+    _level = INFO
+    _component_levels.clear()
+    _refresh()
+
+
+def _refresh():
+    for tracer in _tracers.values():
+        tracer.update()
+
+
+@contextmanager
+def scoped(level):
+    """Temporarily change the default level (per-component levels still apply)."""
+    global _level
+    previous = _level
+    _level = parse_level(level)
+    _refresh()
+    try:
+        yield
+    finally:
+        _level = previous
+        _refresh()
+
+
+def verbosity(verbose):
+    """scoped() for the simulators' verbose flags: everything when True, nothing when False."""
+    return scoped(TRACE if verbose else OFF)
+
+
+configure(os.environ.get('WRAPSIM_TRACE'))
@@ -0,0 +1,272 @@
+# verilog_reader.py
+
+import re
+import mmap
+import tracing
+from design_db import DesignDatabase, expand_bus, SDFF_POSITIONAL_PORTS, DFF_POSITIONAL_PORTS
+
+TRACE_DESIGN = tracing.get('design')
+
+# one token per match, leading whitespace/comments included; the catch-all
+# `other` alternative makes sure nothing is skipped silently
+TOKEN_RE = re.compile(rb"""
+    (?: \s+ | //[^\n]* | /\*.*?\*/ )*
+    (?: (?P<escaped> \\\S+ )
+      | (?P<ident> [A-Za-z_][A-Za-z0-9_$]* )
+      | (?P<number> [0-9]*\s*'[sS]?[bBoOdDhH]\s*[0-9a-fA-FxXzZ_?]+ | [0-9][0-9_]* )
+      | (?P<punct> [().,;\[\]:=] )
+      | (?P<other> . )
+    )?
+""", re.VERBOSE | re.DOTALL)
+
+# module items this reader understands; any other keyword means pyverilog is needed
+DIRECTIONS = ('input', 'output', 'inout')
+KEYWORDS = {
+    'module', 'endmodule', 'input', 'output', 'inout', 'wire', 'assign',
+    'reg', 'always', 'initial', 'begin', 'end', 'parameter', 'localparam',
+    'generate', 'endgenerate', 'function', 'task', 'specify', 'primitive',
+    'tri', 'supply0', 'supply1', 'integer', 'genvar', 'defparam', 'macromodule',
+}
+
+
+class UnsupportedVerilog(Exception):
+    """The netlist uses something outside the structural subset."""
+
+
+def tokens(buf):
+    """(kind, text) tokens from a bytes-like buffer (e.g. an mmap), produced lazily."""
+    for m in TOKEN_RE.finditer(buf):
+        kind = m.lastgroup
+        if kind is None:
+            # trailing whitespace/comments at the end of the file
+            continue
+        text = m.group(kind).decode('ascii', 'replace')
+        if kind == 'escaped':
+            # escaped identifiers keep the backslash, as pyverilog names them
+            yield 'ident', text
+        elif kind == 'number':
+            yield 'number', re.sub(r'\s+', '', text)
+        else:
+            yield kind, text
+
+
+class StructuralReader:
+    """
+    Streaming reader for purely structural gate-level Verilog: module headers,
+    input/output/wire declarations, cell instances with named or positional
+    ports, and simple `assign a = b;`. It fills a DesignDatabase directly,
+    in the same order and with the same net names as DesignDatabase.from_ast,
+    and raises UnsupportedVerilog on anything else (see read_design()).
+    """
+
+    def __init__(self, buf):
+        self.tokens = tokens(buf)
+        self.peeked = None
+        self.db = DesignDatabase()
+
+    def next(self):
+        if self.peeked is not None:
+            tok, self.peeked = self.peeked, None
+            return tok
+        return next(self.tokens, ('eof', ''))
+
+    def peek(self):
+        if self.peeked is None:
+            self.peeked = next(self.tokens, ('eof', ''))
+        return self.peeked
+
+    def expect(self, text):
+        kind, tok = self.next()
+        if tok != text:
+            raise UnsupportedVerilog(f"expected '{text}', got '{tok}'")
+
+    def ident(self):
+        kind, tok = self.next()
+        if kind != 'ident' or tok in KEYWORDS:
+            raise UnsupportedVerilog(f"expected an identifier, got '{tok}'")
+        return tok
+
+    def number(self):
+        kind, tok = self.next()
+        if kind != 'number' or not tok.replace('_', '').isdigit():
+            raise UnsupportedVerilog(f"expected a constant, got '{tok}'")
+        return int(tok.replace('_', ''))
+
+    def read(self) -> DesignDatabase:
+        while True:
+            kind, tok = self.next()
+            if kind == 'eof':
+                break
+            if tok != 'module':
+                raise UnsupportedVerilog(f"unexpected '{tok}' outside a module")
+            self.module()
+        self.db.finish()
+        return self.db
+
+    def module(self):
+        name = self.ident()
+        if self.peek()[1] == '(':
+            # header port list; as in from_ast, only body declarations count as I/O
+            self.next()
+            while self.next()[1] != ')':
+                if self.peek()[0] in ('eof', 'other'):
+                    raise UnsupportedVerilog(f"bad port list in module {name}")
+        self.expect(';')
+        inputs = []
+        outputs = []
+        while True:
+            kind, tok = self.peek()
+            if tok == 'endmodule':
+                self.next()
+                break
+            if tok in DIRECTIONS:
+                self.next()
+                names = self.declaration()
+                if tok == 'input':
+                    inputs.extend(names)
+                elif tok == 'output':
+                    outputs.extend(names)
+            elif tok == 'wire':
+                self.next()
+                self.declaration()
+            elif tok == 'assign':
+                self.next()
+                self.assign()
+            elif kind == 'ident' and tok not in KEYWORDS:
+                self.instances()
+            else:
+                raise UnsupportedVerilog(f"unsupported construct '{tok}' in module {name}")
+        self.db.modules.append(name)
+        self.db.add_module_io(name, inputs, outputs)
+
+    def declaration(self):
+        """Names declared by `[wire] [msb:lsb] a, b, c;`, bus bits expanded."""
+        if self.peek()[1] == 'wire':
+            self.next()
+        msb = lsb = None
+        if self.peek()[1] == '[':
+            self.next()
+            msb = self.number()
+            self.expect(':')
+            lsb = self.number()
+            self.expect(']')
+        names = []
+        while True:
+            base = self.ident()
+            names.extend([base] if msb is None else expand_bus(base, msb, lsb))
+            kind, tok = self.next()
+            if tok == ';':
+                return names
+            if tok != ',':
+                raise UnsupportedVerilog(f"unsupported declaration near '{tok}'")
+
+    def net(self, closing):
+        """Net name of a port connection or assign operand, up to (not past) `closing`."""
+        kind, tok = self.peek()
+        if tok in closing:
+            return None
+        self.next()
+        if kind == 'number':
+            return tok
+        if kind != 'ident' or tok in KEYWORDS:
+            raise UnsupportedVerilog(f"unsupported expression '{tok}'")
+        if self.peek()[1] == '[':
+            self.next()
+            index = self.number()
+            self.expect(']')
+            return f"{tok}[{index}]"
+        return tok
+
+    def assign(self):
+        while True:
+            lhs = self.net(('=',))
+            self.expect('=')
+            rhs = self.net((';', ','))
+            kind, tok = self.next()
+            if tok not in (';', ','):
+                raise UnsupportedVerilog(f"unsupported assign expression near '{tok}'")
+            self.db.add_assign(lhs, rhs)
+            if tok == ';':
+                return
+
+    def instances(self):
+        module = self.ident()
+        self.db.instantiated_modules.add(module)
+        while True:
+            inst_name = self.ident()
+            self.expect('(')
+            ports = self.port_list(module)
+            self.db.add_instance(module, inst_name, ports)
+            kind, tok = self.next()
+            if tok == ';':
+                return
+            if tok != ',':
+                raise UnsupportedVerilog(f"unsupported instance syntax near '{tok}'")
+
+    def port_list(self, module):
+        """portname_lower → net, like DesignDatabase.instance_ports; the '(' is already read."""
+        named = {}
+        positional = []
+        if self.peek()[1] == ')':
+            self.next()
+            return named
+        while True:
+            if self.peek()[1] == '.':
+                self.next()
+                pname = self.ident()
+                self.expect('(')
+                net = self.net((')',))
+                self.expect(')')
+                # an empty connection is named 'None', as extract_name(None) gives
+                named[pname.lower()] = 'None' if net is None else net
+            else:
+                net = self.net((',', ')'))
+                if net is None:
+                    raise UnsupportedVerilog(f"empty positional port on {module}")
+                positional.append(net)
+            kind, tok = self.next()
+            if tok == ')':
+                break
+            if tok != ',':
+                raise UnsupportedVerilog(f"unsupported port connection near '{tok}'")
+        if positional:
+            if named:
+                raise UnsupportedVerilog(f"mixed named and positional ports on {module}")
+            mtype = module.lower()
+            if 'sdff' in mtype:
+                pos_names = SDFF_POSITIONAL_PORTS
+            elif 'dff' in mtype:
+                pos_names = DFF_POSITIONAL_PORTS
+            else:
+                pos_names = []
+            return dict(zip(pos_names, positional))
+        return named
+
+
+def read_design(path):
+    """
+    (ast, DesignDatabase) for a netlist file. Structural netlists are streamed
+    through StructuralReader straight off an mmap (ast is None); anything it
+    doesn't understand goes through pyverilog and DesignDatabase.from_ast.
+    """
+    with open(path, 'rb') as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file, nothing to map
+            buf = b''
+        reader = StructuralReader(buf)
+        try:
+            return None, reader.read()
+        except UnsupportedVerilog as e:
+            reason = str(e)
+        finally:
+            # release the tokenizer's hold on the buffer before unmapping it
+            reader.tokens.close()
+            if isinstance(buf, mmap.mmap):
+                buf.close()
+    if TRACE_DESIGN.info:
+        TRACE_DESIGN(f"[verilog_reader] {path}: {reason}; falling back to pyverilog")
+    from pyverilog.vparser.parser import parse
+    ast, _ = parse([path])
+    return ast, DesignDatabase.from_ast(ast)
@@ -0,0 +1,558 @@
+# wrapsim.py
+
+"""
+WrapSim command line:
+
+  python wrapsim.py intest [VECTOR ...]              INTEST shift/capture/shift-out per vector
+  python wrapsim.py extest [VECTOR ...]              EXTEST through the wrapper boundary cells
+  python wrapsim.py exhaustive {intest,extest}       every vector of the chain, saved to CSV
+  python wrapsim.py sample {intest,extest}           seeded random / stratified sampling, early stop
+  python wrapsim.py merge SHARD.csv ...              combine --shard k/N partial files
+  python wrapsim.py convert RESULTS.wsr              packed result file to CSV
+  python wrapsim.py index RESULTS                    build the sidecar signature index
+  python wrapsim.py query RESULTS -s SIG -v VEC      vectors of a signature / signature of a vector
+  python wrapsim.py symbolic {intest,extest}         signature statistics from BDDs, no enumeration
+  python wrapsim.py faultsim [PATTERNS]              stuck-at fault coverage of a pattern set
+  python wrapsim.py atpg [-o FILE]                   generate stuck-at test patterns (PODEM)
+  python wrapsim.py compact PATTERNS -o FILE         fewer patterns, same fault coverage
+  python wrapsim.py schematic [--mode extest]        netlist / extest schematic PDF
+
+Every subcommand takes --netlist (default ./simple_counter.v), the INTEST ones
+--chains N [--clock-domains] for N balanced, concurrently shifted chains; --trace sets
+trace levels (see tracing.py), also read from WRAPSIM_TRACE. Modules are
+imported inside the subcommand that needs them, so startup stays cheap:
+tabulate, graphviz and pyverilog are only loaded for the summary, the
+schematic and non-structural netlists respectively.
+"""
+
+import argparse
+import sys
+
+DEFAULT_NETLIST = "./simple_counter.v"
+
+
+def check_vectors(parser, vectors, length):
+    for vec in vectors:
+        if len(vec) != length or set(vec) - {'0', '1'}:
+            parser.error(f"vector '{vec}' is not {length} bits of 0/1")
+
+
+def block_width(args):
+    """--width, or the bit-parallel default when not given."""
+    from bit_parallel import DEFAULT_WIDTH
+    return DEFAULT_WIDTH if args.width is None else args.width
+
+
+def shard_spec(spec):
+    """argparse type of --shard, importing sharding only once a shard is given."""
+    from sharding import parse_shard
+    try:
+        return parse_shard(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def intest_simulator(netlist, next_state=False, chains=1, clock_domains=False, propagate_mode='compiled'):
+    from main import VerilogScanDFT
+    from logic_evaluator import LogicEvaluator
+    from scan_chain_pipeline import ScanChainSimulator
+    analyzer = VerilogScanDFT(netlist)
+    analyzer.parse_file()
+    analyzer.extract_design_info()
+    analyzer.construct_scan_chain(chains, clock_domains)
+    evaluator = LogicEvaluator(analyzer.ast, propagate_mode=propagate_mode, design=analyzer.design,
+                               next_state=next_state)
+    evaluator.build_model()
+    return ScanChainSimulator(analyzer.scan_chain, evaluator)
+
+
+def scan_simulator(args, parser, next_state=False, propagate_mode='compiled'):
+    """intest_simulator() with the --chains/--clock-domains layout of the command line."""
+    try:
+        return intest_simulator(args.netlist, next_state, args.chains, args.clock_domains, propagate_mode)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def extest_simulator(netlist, next_state=False, propagate_mode='compiled'):
+    from extest_mode import ExtestModeDFT
+    from extest_simulator import ExtestSimulator
+    analyzer = ExtestModeDFT(netlist)
+    analyzer.parse_file()
+    analyzer.extract_design_info()
+    analyzer.initialize_three_cores()
+    analyzer.construct_extest_scan_chain()
+    return ExtestSimulator(analyzer, next_state=next_state, propagate_mode=propagate_mode)
+
+
+def cmd_intest(args, parser):
+    simulator = scan_simulator(args, parser, args.next_state, args.propagate)
+    length = len(simulator.cells)
+    vectors = args.vectors or ['0' * length]
+    check_vectors(parser, vectors, length)
+    for vec in vectors:
+        sig = simulator.run(vec, verbose=args.verbose)
+        print(f"{vec} -> {sig}")
+    return 0
+
+
+def cmd_extest(args, parser):
+    simulator = extest_simulator(args.netlist, args.next_state, args.propagate)
+    length = len(simulator.wbc_cells)
+    vectors = args.vectors or ['0' * length]
+    check_vectors(parser, vectors, length)
+    for vec in vectors:
+        sig = simulator.run_extest(vec, verbose=args.verbose)
+        print(f"{vec} -> {sig}")
+    return 0
+
+
+def cmd_exhaustive(args, parser):
+    if args.workers < 0:
+        parser.error("--workers must be >= 0")
+    if args.checkpoint is None:
+        from checkpoint import DEFAULT_INTERVAL
+        args.checkpoint = DEFAULT_INTERVAL
+    if args.checkpoint < 0:
+        parser.error("--checkpoint must be >= 0")
+    args.workers = args.workers or None
+    options = dict(bit_parallel=not args.serial, width=block_width(args), backend=args.backend,
+                   csv_filename=args.csv, workers=args.workers, shard=args.shard, stream=args.stream,
+                   result_format=args.format, index=args.index,
+                   checkpoint=args.checkpoint or None, resume=args.resume)
+    if args.mode == 'intest':
+        from scan_chain_pipeline import exhaustive_scan_test
+        simulator = scan_simulator(args, parser, args.next_state, args.propagate)
+        exhaustive_scan_test(simulator, len(simulator.cells), **options)
+    else:
+        from extest_simulator import exhaustive_extest_test
+        simulator = extest_simulator(args.netlist, args.next_state, args.propagate)
+        exhaustive_extest_test(simulator, len(simulator.wbc_cells), **options)
+    return 0
+
+
+def cmd_sample(args, parser):
+    from sampling import make_vectors, sample_test
+    if args.mode == 'intest':
+        simulator = scan_simulator(args, parser)
+        length = len(simulator.cells)
+    else:
+        simulator = extest_simulator(args.netlist)
+        length = len(simulator.wbc_cells)
+    if not 0 <= args.p_one <= 1:
+        parser.error("--p-one must be between 0 and 1")
+    if (args.max_vectors is None and args.target_unique is None and args.plateau is None and args.time_budget is None
+            and args.precision is None):
+        parser.error("give a stop condition: --max-vectors, --target-unique, --plateau, --time-budget or --precision")
+    vectors = make_vectors(args.generator, length, seed=args.seed, p_one=args.p_one, strata_bits=args.strata_bits)
+    csv_filename = args.csv or f"{args.mode}_samples_{length}bit.{'wsr' if args.format == 'packed' else 'csv'}"
+    sample_test(simulator, vectors, csv_filename, width=block_width(args), backend=args.backend,
+                max_vectors=args.max_vectors, target_unique=args.target_unique, plateau=args.plateau,
+                plateau_rate=args.plateau_rate, time_budget=args.time_budget, confidence=args.confidence,
+                result_format=args.format, uniform=args.generator != 'weighted' or args.p_one == 0.5,
+                precision=args.precision)
+    return 0
+
+
+def cmd_merge(args, parser):
+    from sharding import merge_shards, read_shard_header, report_merge
+    csv_filename = args.csv
+    try:
+        if csv_filename is None:
+            header = read_shard_header(args.shards[0])
+            prefix = 'scan_chain_results' if header['mode'] == 'intest' else 'extest_results'
+            csv_filename = f"{prefix}_{header['length']}bit.{'wsr' if args.format == 'packed' else 'csv'}"
+        header, stats = merge_shards(args.shards, csv_filename, args.format, args.index)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    report_merge(header, stats, csv_filename)
+    return 0
+
+
+def cmd_convert(args, parser):
+    from result_io import packed_to_csv, PACKED_EXT
+    csv_filename = args.csv
+    if csv_filename is None:
+        stem, dot, ext = args.results.rpartition('.')
+        csv_filename = f"{stem}.csv" if dot and ext == PACKED_EXT else f"{args.results}.csv"
+    try:
+        rows = packed_to_csv(args.results, csv_filename)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    print(f"Wrote {rows} rows to: {csv_filename}")
+    return 0
+
+
+def cmd_index(args, parser):
+    from signature_index import build_index, SignatureIndex
+    try:
+        path = build_index(args.results)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    with SignatureIndex(path) as index:
+        print(f"Indexed {index.rows} rows as {index.records} signature ranges: {path}")
+    return 0
+
+
+def cmd_query(args, parser):
+    import os
+    import time
+    from signature_index import SignatureIndex, index_path, open_rows, lookup_vector
+    if not args.signature and not args.vector:
+        parser.error("give at least one --signature or --vector")
+    if args.signature and not os.path.exists(index_path(args.results)):
+        parser.error(f"no index {index_path(args.results)}; run 'wrapsim.py index {args.results}' "
+                     "or write it with 'exhaustive --index'")
+    try:
+        if args.signature:
+            with SignatureIndex(index_path(args.results)) as index:
+                for sig in args.signature:
+                    started = time.perf_counter()
+                    total = sum(count for _, count in index.ranges(sig))
+                    vectors = index.vectors(sig, args.limit)
+                    elapsed = (time.perf_counter() - started) * 1000
+                    more = f" (first {len(vectors)})" if total > len(vectors) else ""
+                    print(f"signature {sig}: {total} vector(s){more} [{elapsed:.2f} ms]")
+                    for vec in vectors:
+                        print(f"  {vec}")
+        if args.vector:
+            rows = open_rows(args.results)
+            try:
+                for vec in args.vector:
+                    started = time.perf_counter()
+                    sig = lookup_vector(rows, vec)
+                    elapsed = (time.perf_counter() - started) * 1000
+                    print(f"vector {vec} -> {sig if sig is not None else 'not found'} [{elapsed:.2f} ms]")
+            finally:
+                rows.close()
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    return 0
+
+
+def cmd_symbolic(args, parser):
+    import time
+    from symbolic import SymbolicSignatures
+    if args.mode == 'intest':
+        simulator = scan_simulator(args, parser)
+        length = len(simulator.cells)
+    else:
+        simulator = extest_simulator(args.netlist)
+        length = len(simulator.wbc_cells)
+    check_vectors(parser, args.signature + args.vector, length)
+    print(f"\n=== Symbolic Analysis: {args.mode}, {length}-bit chain ===")
+    started = time.perf_counter()
+    symbolic = SymbolicSignatures(simulator)
+    symbolic.report(top=args.top)
+    print(f"Analysed in {time.perf_counter() - started:.2f}s")
+    for sig in args.signature:
+        size = symbolic.class_size(sig)
+        vectors = symbolic.vectors_for(sig, args.limit)
+        more = f" (first {len(vectors)})" if size > len(vectors) else ""
+        print(f"signature {sig}: {size} vector(s){more}")
+        for vec in vectors:
+            print(f"  {vec}")
+    for vec in args.vector:
+        print(f"vector {vec} -> {symbolic.signature(vec)}")
+    return 0
+
+
+def cmd_faultsim(args, parser):
+    from itertools import islice
+    from faultsim import FaultSimulator, read_vectors
+    simulator = scan_simulator(args, parser)
+    length = len(simulator.cells)
+    if (args.patterns is None) == (args.random is None):
+        parser.error("give a pattern file or --random N")
+    if args.patterns is not None:
+        try:
+            vectors = read_vectors(args.patterns)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    else:
+        from sampling import uniform_vectors
+        vectors = list(islice(uniform_vectors(length, args.seed), args.random))
+    check_vectors(parser, vectors, length)
+    print(f"\n=== Fault Simulation: {len(vectors)} patterns, {length}-bit chain ===")
+    fsim = FaultSimulator(simulator, collapse=args.collapse or args.fault_list is not None)
+    if fsim.collapsed is not None:
+        collapsed = fsim.collapsed
+        print(f"Collapsed {len(collapsed.faults)} faults to {len(collapsed.simulated)} "
+              f"({1 - collapsed.ratio:.1%} removed, {len(collapsed.dominates)} by dominance)")
+        if args.fault_list:
+            collapsed.write(args.fault_list, fsim.evaluator)
+            print(f"Fault list mapping saved to: {args.fault_list}")
+    result = fsim.run(vectors, width=block_width(args))
+    result.report(fsim.evaluator, per_pattern=args.per_pattern, undetected=args.undetected)
+    return 0
+
+
+def cmd_atpg(args, parser):
+    from atpg import BACKTRACK_LIMIT, TestGenerator
+    from faultsim import write_vectors
+    simulator = scan_simulator(args, parser)
+    length = len(simulator.cells)
+    if not 0 < args.target <= 1:
+        parser.error("--target must be in (0, 1]")
+    if args.backtrack_limit is None:
+        args.backtrack_limit = BACKTRACK_LIMIT
+    print(f"\n=== ATPG (PODEM): {length}-bit chain, backtrack limit {args.backtrack_limit} ===")
+    generator = TestGenerator(simulator, backtrack_limit=args.backtrack_limit, collapse=not args.no_collapse)
+    result = generator.run(target=args.target, fill=args.fill, seed=args.seed, compact=args.compact)
+    result.report(generator.evaluator, aborted=args.aborted)
+    if args.output:
+        write_vectors(args.output, result.patterns,
+                      f"{len(result.patterns)} ATPG patterns for {args.netlist}, {length}-bit chain, "
+                      f"fault coverage {result.fault_result.coverage:.2%}")
+        print(f"Patterns saved to: {args.output}")
+    if args.cubes:
+        write_vectors(args.cubes, result.cubes,
+                      f"{len(result.cubes)} ATPG test cubes for {args.netlist}, X = unassigned")
+        print(f"Test cubes saved to: {args.cubes}")
+    return 0
+
+
+def cmd_compact(args, parser):
+    from compaction import compact_patterns, fill_cubes, merge_cubes
+    from faultsim import FaultSimulator, read_vectors, write_vectors
+    simulator = scan_simulator(args, parser)
+    length = len(simulator.cells)
+    try:
+        vectors = read_vectors(args.patterns)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    print(f"\n=== Pattern Compaction: {len(vectors)} patterns, {length}-bit chain ===")
+    if any('X' in vec or 'x' in vec for vec in vectors):
+        for vec in vectors:
+            if len(vec) != length or set(vec) - {'0', '1', 'X', 'x'}:
+                parser.error(f"cube '{vec}' is not {length} bits of 0/1/X")
+        cubes = merge_cubes(vectors)
+        print(f"Merged {len(vectors)} test cubes into {len(cubes)}")
+        vectors = fill_cubes(cubes, args.fill, args.seed)
+    check_vectors(parser, vectors, length)
+    fsim = FaultSimulator(simulator, collapse=args.collapse)
+    result = compact_patterns(fsim, vectors, method=args.method, width=block_width(args))
+    result.report()
+    if args.output:
+        write_vectors(args.output, result.patterns,
+                      f"{len(result.patterns)} patterns ({args.method} compaction of {args.patterns}), "
+                      f"{length}-bit chain, fault coverage {result.after.coverage:.2%}")
+        print(f"Compacted patterns saved to: {args.output}")
+    return 0
+
+
+def cmd_schematic(args, parser):
+    if args.mode == 'intest':
+        from main import VerilogScanDFT
+        analyzer = VerilogScanDFT(args.netlist)
+        analyzer.parse_file()
+        analyzer.extract_design_info()
+        try:
+            analyzer.construct_scan_chain(args.chains, args.clock_domains)
+        except ValueError as e:
+            parser.error(str(e))
+        analyzer.display_summary()
+        analyzer.create_schematic(args.output or "schematic", view=args.view)
+    else:
+        from extest_mode import ExtestModeDFT
+        analyzer = ExtestModeDFT(args.netlist)
+        analyzer.parse_file()
+        analyzer.extract_design_info()
+        analyzer.initialize_three_cores()
+        analyzer.construct_extest_scan_chain()
+        analyzer.display_extest_summary()
+        analyzer.create_extest_schematic(args.output or "extest_schematic", view=args.view)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='wrapsim', description="Scan chain / IEEE 1500 wrapper simulation")
+    parser.add_argument('--trace', metavar='SPEC',
+                        help="trace levels, e.g. 'debug' or 'info,propagate=trace' (see tracing.py)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def add_netlist(p):
+        p.add_argument('-n', '--netlist', default=DEFAULT_NETLIST, help="gate-level Verilog netlist")
+
+    def add_chains(p):
+        p.add_argument('--chains', type=int, default=1, metavar='N',
+                       help="balanced INTEST scan chains shifted concurrently (1 keeps the single chain)")
+        p.add_argument('--clock-domains', action='store_true',
+                       help="keep flops of different clock domains on separate chains")
+
+    def add_next_state(p):
+        p.add_argument('--next-state', action='store_true',
+                       help="memoize the capture next-state function per flop-state word")
+
+    def add_propagate(p):
+        p.add_argument('--propagate', choices=('compiled', 'levelized', 'event', 'iterative'), default='compiled',
+                       help="how serial captures settle the logic (see LogicEvaluator.PROPAGATE_MODES)")
+
+    p = sub.add_parser('intest', help="simulate INTEST scan vectors")
+    add_netlist(p)
+    add_chains(p)
+    p.add_argument('vectors', nargs='*', help="scan-in vectors, one bit per chain cell")
+    p.add_argument('-v', '--verbose', action='store_true', help="print the shift/capture trace")
+    add_next_state(p)
+    add_propagate(p)
+    p.set_defaults(func=cmd_intest)
+
+    p = sub.add_parser('extest', help="simulate EXTEST vectors through the boundary cells")
+    add_netlist(p)
+    p.add_argument('vectors', nargs='*', help="WBC vectors, one bit per boundary cell")
+    p.add_argument('-v', '--verbose', action='store_true', help="print the shift/capture trace")
+    add_next_state(p)
+    add_propagate(p)
+    p.set_defaults(func=cmd_extest)
+
+    p = sub.add_parser('exhaustive', help="run every vector of the chain and save the signatures to CSV")
+    p.add_argument('mode', choices=('intest', 'extest'))
+    add_netlist(p)
+    add_chains(p)
+    p.add_argument('--csv', help="result file (default scan_chain_results_<N>bit.csv / extest_results_<N>bit.csv)")
+    p.add_argument('--width', type=int, help="patterns per bit-parallel block (default bit_parallel.DEFAULT_WIDTH)")
+    p.add_argument('--backend', choices=('int', 'numpy'), default='int', help="bit-parallel lane storage")
+    p.add_argument('--serial', action='store_true', help="one vector at a time instead of bit-parallel")
+    add_next_state(p)
+    add_propagate(p)
+    p.add_argument('-j', '--workers', type=int, default=1,
+                   help="worker processes for the bit-parallel blocks (0 = one per CPU)")
+    p.add_argument('--shard', type=shard_spec, metavar='k/N',
+                   help="run only shard k of N (0-based) into a self-describing partial file")
+    p.add_argument('--format', choices=('csv', 'packed'), default='csv',
+                   help="result file format; 'packed' is bit-packed binary (.wsr), see 'convert'")
+    p.add_argument('--index', action='store_true',
+                   help="also write the sidecar signature index (<result file>.sidx) for 'query'")
+    p.add_argument('--checkpoint', type=float, metavar='SECONDS',
+                   help="save progress every SECONDS for --resume (default checkpoint.DEFAULT_INTERVAL, 0 = never)")
+    p.add_argument('--resume', action='store_true',
+                   help="continue from the last checkpoint of the same result file instead of starting over")
+    p.add_argument('--stream', action='store_true',
+                   help="bounded-memory statistics (bitmap / HyperLogLog, top collision classes) "
+                        "instead of keeping every signature")
+    p.set_defaults(func=cmd_exhaustive)
+
+    p = sub.add_parser('sample', help="simulate sampled vectors until a stop condition is met")
+    p.add_argument('mode', choices=('intest', 'extest'))
+    add_netlist(p)
+    add_chains(p)
+    p.add_argument('--generator', choices=('uniform', 'weighted', 'stratified'), default='uniform')
+    p.add_argument('--seed', type=int, default=0, help="random seed; the same seed draws the same vectors")
+    p.add_argument('--p-one', type=float, default=0.5, help="probability of a '1' bit (weighted)")
+    p.add_argument('--strata-bits', type=int, default=4, help="leading bits defining the strata (stratified)")
+    p.add_argument('--max-vectors', type=int, help="stop after this many distinct vectors")
+    p.add_argument('--target-unique', type=int, help="stop once this many unique signatures are seen")
+    p.add_argument('--plateau', type=int, metavar='VECTORS',
+                   help="stop when the last VECTORS vectors found fewer than --plateau-rate new signatures")
+    p.add_argument('--plateau-rate', type=float, default=0.01, help="new signatures per vector counted as a plateau")
+    p.add_argument('--time-budget', type=float, metavar='SECONDS', help="stop after this many seconds")
+    p.add_argument('--precision', type=float, metavar='RATE',
+                   help="stop once the collision-rate bound at --confidence is within RATE of the estimate")
+    p.add_argument('--confidence', type=float, default=0.95, help="level of the aliasing interval and collision-rate bound")
+    p.add_argument('--csv', help="result file (default <mode>_samples_<N>bit.csv)")
+    p.add_argument('--format', choices=('csv', 'packed'), default='csv', help="result file format")
+    p.add_argument('--width', type=int, help="vectors per bit-parallel pass (default bit_parallel.DEFAULT_WIDTH)")
+    p.add_argument('--backend', choices=('int', 'numpy'), default='int', help="bit-parallel lane storage")
+    p.set_defaults(func=cmd_sample)
+
+    p = sub.add_parser('merge', help="combine the partial files of a sharded exhaustive run")
+    p.add_argument('shards', nargs='+', help="partial result files, one per shard")
+    p.add_argument('--csv', help="merged result file (default: the unsharded exhaustive file name)")
+    p.add_argument('--format', choices=('csv', 'packed'), default='csv', help="merged result file format")
+    p.add_argument('--index', action='store_true', help="also write the sidecar signature index")
+    p.set_defaults(func=cmd_merge)
+
+    p = sub.add_parser('convert', help="convert a packed (.wsr) result file to CSV")
+    p.add_argument('results', help="packed result file")
+    p.add_argument('--csv', help="CSV output (default: same name with .csv)")
+    p.set_defaults(func=cmd_convert)
+
+    p = sub.add_parser('index', help="build the sidecar signature index of a result file")
+    p.add_argument('results', help="CSV or packed result file")
+    p.set_defaults(func=cmd_index)
+
+    p = sub.add_parser('query', help="look up signatures and vectors in a result file")
+    p.add_argument('results', help="CSV or packed result file (signature lookups need its index)")
+    p.add_argument('-s', '--signature', action='append', default=[], help="list the vectors producing SIGNATURE")
+    p.add_argument('-v', '--vector', action='append', default=[], help="print the signature of VECTOR")
+    p.add_argument('--limit', type=int, default=20, help="vectors listed per signature")
+    p.set_defaults(func=cmd_query)
+
+    p = sub.add_parser('symbolic', help="unique signatures and collision classes from BDDs of the capture")
+    p.add_argument('mode', choices=('intest', 'extest'))
+    add_netlist(p)
+    add_chains(p)
+    p.add_argument('-s', '--signature', action='append', default=[], help="list the vectors producing SIGNATURE")
+    p.add_argument('-v', '--vector', action='append', default=[], help="print the signature of VECTOR")
+    p.add_argument('--limit', type=int, default=20, help="vectors listed per signature")
+    p.add_argument('--top', type=int, default=5, help="collision class sizes listed")
+    p.set_defaults(func=cmd_symbolic)
+
+    p = sub.add_parser('faultsim', help="stuck-at fault coverage of a pattern set over the INTEST scan view")
+    add_netlist(p)
+    add_chains(p)
+    p.add_argument('patterns', nargs='?', help="result file (CSV or packed) or text file with one vector per line")
+    p.add_argument('--random', type=int, metavar='N', help="fault-simulate N seeded uniform random vectors instead")
+    p.add_argument('--seed', type=int, default=0, help="seed of --random")
+    p.add_argument('--width', type=int, help="patterns per bit-parallel block (default bit_parallel.DEFAULT_WIDTH)")
+    p.add_argument('--per-pattern', action='store_true',
+                   help="print the coverage after each pattern that detects new faults")
+    p.add_argument('--undetected', type=int, default=0, metavar='K', help="list up to K undetected faults")
+    p.add_argument('--collapse', action='store_true',
+                   help="simulate the equivalence/dominance collapsed fault list (coverage stays exact)")
+    p.add_argument('--fault-list', metavar='CSV', help="save the collapsed list's mapping to the full list (implies --collapse)")
+    p.set_defaults(func=cmd_faultsim)
+
+    p = sub.add_parser('atpg', help="generate stuck-at test patterns for the INTEST scan view with PODEM")
+    add_netlist(p)
+    add_chains(p)
+    p.add_argument('--backtrack-limit', type=int, metavar='N',
+                   help="decisions flipped before a fault is aborted (default atpg.BACKTRACK_LIMIT)")
+    p.add_argument('--target', type=float, default=1.0, help="stop at this fault coverage of the targets (0-1]")
+    p.add_argument('--fill', choices=('random', 'zero'), default='random', help="fill of unassigned chain bits")
+    p.add_argument('--seed', type=int, default=0, help="seed of --fill random")
+    p.add_argument('--aborted', type=int, default=0, metavar='K', help="list up to K aborted faults")
+    p.add_argument('--no-collapse', action='store_true', help="target the full fault list instead of the collapsed one")
+    p.add_argument('-o', '--output', metavar='FILE', help="save the patterns, one vector per line")
+    p.add_argument('--cubes', metavar='FILE', help="save the unfilled test cubes ('X' = unassigned)")
+    p.add_argument('--compact', type=int, default=0, metavar='N',
+                   help="dynamic compaction: extend each cube with up to N further target faults")
+    p.set_defaults(func=cmd_atpg)
+
+    p = sub.add_parser('compact', help="reduce a pattern set while keeping its stuck-at fault coverage")
+    add_netlist(p)
+    add_chains(p)
+    p.add_argument('patterns', help="result file (CSV or packed) or text file of vectors or 'X' test cubes")
+    p.add_argument('--method', choices=('reverse', 'greedy'), default='reverse',
+                   help="static compaction: reverse-order fault simulation or greedy set cover")
+    p.add_argument('--fill', choices=('random', 'zero'), default='random', help="fill of merged test cubes")
+    p.add_argument('--seed', type=int, default=0, help="seed of --fill random")
+    p.add_argument('--width', type=int, help="patterns per bit-parallel block (default bit_parallel.DEFAULT_WIDTH)")
+    p.add_argument('--collapse', action='store_true', help="fault-simulate the collapsed list (coverage stays exact)")
+    p.add_argument('-o', '--output', metavar='FILE', help="save the compacted patterns, one vector per line")
+    p.set_defaults(func=cmd_compact)
+
+    p = sub.add_parser('schematic', help="print the design summary and render the schematic PDF")
+    add_netlist(p)
+    add_chains(p)
+    p.add_argument('--mode', choices=('intest', 'extest'), default='intest')
+    p.add_argument('-o', '--output', help="output file name without extension")
+    p.add_argument('--view', action='store_true', help="open the PDF once rendered")
+    p.set_defaults(func=cmd_schematic)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.trace:
+        import tracing
+        try:
+            tracing.configure(args.trace)
+        except ValueError as e:
+            parser.error(str(e))
+    return args.func(args, parser)
+
+
+if __name__ == "__main__":
+    sys.exit(main())